@@ -9,6 +9,8 @@ import asyncio
 import copy
 import logging
 import uuid
+from dataclasses import dataclass
+from dataclasses import field
 from typing import Any
 
 from homeassistant.components.energy.data import async_get_manager
@@ -18,6 +20,7 @@ from homeassistant.helpers.typing import UNDEFINED
 from slugify import slugify
 
 from .client.modbus_client import ModbusClient
+from .client.modbus_client import async_load_protocol
 from .common.types import HassData
 from .common.types import HassDataEntry
 from .const import ADAPTER_ID
@@ -28,31 +31,69 @@ from .const import ENTITY_ID_PREFIX
 from .const import FRIENDLY_NAME
 from .const import HOST
 from .const import INVERTER_CONN
+from .const import INVERTER_MODEL
+from .const import INVERTER_VERSION
 from .const import INVERTERS
 from .const import MAX_READ
 from .const import MODBUS_SLAVE
 from .const import MODBUS_TYPE
 from .const import PLATFORMS
 from .const import POLL_RATE
+from .const import READ_COST_MODEL
 from .const import RTU_OVER_TCP
 from .const import SERIAL
 from .const import STARTUP_MESSAGE
 from .const import TCP
 from .const import UDP
 from .const import UNIQUE_ID_PREFIX
+from .entities.entity_descriptions import get_entities
+from .invalid_ranges_store import async_get_invalid_ranges_store
 from .inverter_adapters import ADAPTERS
 from .inverter_profiles import inverter_connection_type_profile_from_config
+from .max_read_calibration import ReadCostModel
+from .modbus_controller import ControllerWarmState
 from .modbus_controller import ModbusController
+from .services import calibrate_max_read_service
+from .services import profile_service
 from .services import read_registers_service
+from .services import trace_service
 from .services import update_charge_period_service
 from .services import websocket_api
 from .services import write_registers_service
+from .site_aggregator import SiteAggregator
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+@dataclass
+class _WarmStart:
+    """Things handed across a reload of a config entry, so that changing options doesn't mean reconnecting"""
+
+    # {(modbus_type, host): (adapter_id, client)}
+    clients: dict[tuple[str, str], tuple[str, ModbusClient]] = field(default_factory=dict)
+    # {_warm_start_key(inverter): state}
+    controllers: dict[tuple[Any, ...], ControllerWarmState] = field(default_factory=dict)
+
+
+def _warm_start_key(inverter: dict[str, Any]) -> tuple[Any, ...]:
+    """A controller's state can only be handed over if these, which determine what its registers mean, are unchanged"""
+    return (
+        inverter[MODBUS_TYPE],
+        inverter[HOST],
+        inverter[MODBUS_SLAVE],
+        inverter[INVERTER_MODEL],
+        inverter[INVERTER_CONN],
+        inverter.get(INVERTER_VERSION),
+    )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
+    return await _async_setup_entry(hass, entry, None)
+
+
+async def _async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, warm_start: _WarmStart | None) -> bool:
+    """Set up this integration, taking over clients and controller state from warm_start if possible"""
 
     if DOMAIN not in hass.data:
         _LOGGER.info(STARTUP_MESSAGE)
@@ -68,7 +109,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry.entry_id, HassDataEntry(controllers=[], modbus_clients=[])
     )
 
-    def create_controller(client: ModbusClient, inverter: dict[str, Any]) -> None:
+    invalid_ranges_store = await async_get_invalid_ranges_store(hass)
+
+    def create_controller(client: ModbusClient, inverter: dict[str, Any], is_warm: bool) -> None:
+        warm_state = None
+        if is_warm:
+            assert warm_start is not None
+            warm_state = warm_start.controllers.get(_warm_start_key(inverter))
         controller = ModbusController(
             hass,
             client,
@@ -77,6 +124,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             inverter[MODBUS_SLAVE],
             inverter[POLL_RATE],
             inverter[MAX_READ],
+            ReadCostModel.from_dict(inverter.get(READ_COST_MODEL)),
+            invalid_ranges_store,
+            warm_state,
         )
         controllers.append(controller)
 
@@ -84,6 +134,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     # {(modbus_type, host): client}
     clients: dict[tuple[str, str], ModbusClient] = {}
+    # Keys of clients taken over from warm_start
+    warm_clients: set[tuple[str, str]] = set()
     for inverter_id, inverter in entry_data[INVERTERS].items():
         # Remember that there might not be any options
         options = entry_options.get(INVERTERS, {}).get(inverter_id, {})
@@ -103,6 +155,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         client_key = (inverter[MODBUS_TYPE], inverter[HOST])
         client = clients.get(client_key)
+        if client is None and warm_start is not None and client_key in warm_start.clients:
+            # Take over the existing connection, unless the adapter (which affects how the client is set up) changed
+            warm_adapter_id, warm_client = warm_start.clients[client_key]
+            if warm_adapter_id == adapter_id:
+                del warm_start.clients[client_key]
+                client = warm_client
+                clients[client_key] = client
+                warm_clients.add(client_key)
         if client is None:
             if inverter[MODBUS_TYPE] in [TCP, UDP, RTU_OVER_TCP]:
                 host_parts = inverter[HOST].split(":")
@@ -111,20 +171,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 params = {"port": inverter[HOST], "baudrate": 9600}
             else:
                 raise AssertionError()
+            await async_load_protocol(hass, inverter[MODBUS_TYPE])
             client = ModbusClient(hass, inverter[MODBUS_TYPE], adapter, params)
             clients[client_key] = client
-        create_controller(client, inverter)
+        create_controller(client, inverter, client_key in warm_clients)
+
+    if warm_start is not None:
+        # Close any connections which we didn't take over
+        await asyncio.gather(*[client.close() for _, client in warm_start.clients.values()])
+        warm_start.clients.clear()
 
     read_registers_service.register(hass, controllers)
     write_registers_service.register(hass, controllers)
     update_charge_period_service.register(hass, controllers)
+    calibrate_max_read_service.register(hass, controllers)
+    trace_service.register(hass)
+    profile_service.register(hass)
     websocket_api.register(hass)
 
     hass_data: HassData = hass.data[DOMAIN]
     hass_data[entry.entry_id]["controllers"] = controllers
     hass_data[entry.entry_id]["modbus_clients"] = list(clients.values())
+    if len(controllers) > 1:
+        hass_data[entry.entry_id]["site_aggregator"] = SiteAggregator(entry.entry_id, controllers)
     hass_data[entry.entry_id]["unload"] = entry.add_update_listener(async_reload_entry)
 
+    # The platforms create their entities on the event loop, so build the entity descriptions first
+    await hass.async_add_executor_job(get_entities)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
@@ -253,6 +326,21 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
+    return await _async_unload_entry(hass, entry, None)
+
+
+async def _async_unload_entry(hass: HomeAssistant, entry: ConfigEntry, warm_start: _WarmStart | None) -> bool:
+    """Unload an entry. If warm_start is given, the clients are left open and handed to it, with controller state"""
+
+    hass_data: HassData = hass.data[DOMAIN]
+    controllers = hass_data[entry.entry_id]["controllers"]
+    # Capture this before unloading the platforms, as removing the entities removes their registers
+    warm_states = (
+        {_warm_start_key(controller.inverter_details): controller.warm_state() for controller in controllers}
+        if warm_start is not None
+        else {}
+    )
+
     unloaded = all(
         await asyncio.gather(
             *[hass.config_entries.async_forward_entry_unload(entry, platform) for platform in PLATFORMS]
@@ -260,13 +348,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
 
     if unloaded:
-        hass_data: HassData = hass.data[DOMAIN]
-        controllers = hass_data[entry.entry_id]["controllers"]
         for controller in controllers:
             controller.unload()
 
-        clients = hass_data[entry.entry_id]["modbus_clients"]
-        await asyncio.gather(*[client.close() for client in clients])
+        if warm_start is None:
+            clients = hass_data[entry.entry_id]["modbus_clients"]
+            await asyncio.gather(*[client.close() for client in clients])
+        else:
+            warm_start.controllers.update(warm_states)
+            for controller in controllers:
+                inverter = controller.inverter_details
+                warm_start.clients[(inverter[MODBUS_TYPE], inverter[HOST])] = (inverter[ADAPTER_ID], controller.client)
 
         hass_data[entry.entry_id]["unload"]()
         hass_data.pop(entry.entry_id)
@@ -276,8 +368,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    # Hand the connections and what we've read across to the new controllers, so that e.g. a change to the poll rate
+    # takes effect immediately rather than after reconnecting
+    warm_start = _WarmStart()
+    await _async_unload_entry(hass, entry, warm_start)
+    await _async_setup_entry(hass, entry, warm_start)
 
 
 async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
@@ -3,6 +3,8 @@
 import asyncio
 import logging
 import os
+import time
+from dataclasses import dataclass
 from typing import Any
 from typing import Callable
 from typing import Type
@@ -13,6 +15,8 @@ import serial
 from homeassistant.core import HomeAssistant
 
 from .. import client
+from ..common.metrics import ClientMetrics
+from ..common.tracing import TRACER
 from ..common.types import ConnectionType
 from ..common.types import RegisterType
 from ..const import RTU_OVER_TCP
@@ -20,46 +24,89 @@ from ..const import SERIAL
 from ..const import TCP
 from ..const import UDP
 from ..inverter_adapters import InverterAdapter
+from ..vendor import pymodbus
+from ..vendor.pymodbus import ExceptionResponse
+from ..vendor.pymodbus import ModbusExceptions
 from ..vendor.pymodbus import ModbusResponse
 from ..vendor.pymodbus import ModbusRtuFramer
-from ..vendor.pymodbus import ModbusSerialClient
 from ..vendor.pymodbus import ModbusSocketFramer
-from ..vendor.pymodbus import ModbusUdpClient
 from ..vendor.pymodbus import ReadHoldingRegistersResponse
 from ..vendor.pymodbus import ReadInputRegistersResponse
 from ..vendor.pymodbus import WriteMultipleRegistersResponse
 from ..vendor.pymodbus import WriteSingleRegisterResponse
-from .custom_modbus_tcp_client import CustomModbusTcpClient
+from .priority_lock import PriorityLock
+from .priority_lock import RequestPriority
 
 _LOGGER = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
 
+# The client classes are loaded on demand by _load_client_class, as importing them is slow
 _CLIENTS: dict[str, dict[str, Any]] = {
     SERIAL: {
-        "client": ModbusSerialClient,
+        "client": "ModbusSerialClient",
         "framer": ModbusRtuFramer,
     },
     TCP: {
-        "client": CustomModbusTcpClient,
+        "client": "CustomModbusTcpClient",
         "framer": ModbusSocketFramer,
     },
     UDP: {
-        "client": ModbusUdpClient,
+        "client": "ModbusUdpClient",
         "framer": ModbusSocketFramer,
     },
     RTU_OVER_TCP: {
-        "client": CustomModbusTcpClient,
+        "client": "CustomModbusTcpClient",
         "framer": ModbusRtuFramer,
     },
 }
 
 _NUM_RETRIES = 3
 
+# If there's less time than this left before a request's deadline, don't bother starting the request: it's unlikely to
+# complete, and failing with a timeout looks like a communication failure
+_MIN_DEADLINE_TIMEOUT = 0.5
+
 serial.protocol_handler_packages.append(client.__name__)
 
 
+def _load_client_class(protocol: str) -> Any:
+    """Loads the pymodbus client class used by the given protocol. This imports modules, so may block"""
+    name = _CLIENTS[protocol]["client"]
+    if name == "CustomModbusTcpClient":
+        # This subclasses pymodbus's ModbusTcpClient, so importing it loads that
+        from .custom_modbus_tcp_client import CustomModbusTcpClient
+
+        return CustomModbusTcpClient
+    return pymodbus.load_client(name)
+
+
+async def async_load_protocol(hass: HomeAssistant, protocol: str) -> None:
+    """Loads everything needed to create a ModbusClient for the given protocol, without blocking the event loop"""
+    await hass.async_add_executor_job(_load_client_class, protocol)
+
+
+@dataclass
+class QueueDelayStats:
+    """Records how long requests spent waiting for access to the client"""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def record(self, delay: float) -> None:
+        self.count += 1
+        self.total += delay
+        self.max = max(self.max, delay)
+        self.last = delay
+
+
 class ModbusClient:
     """Modbus"""
 
@@ -67,10 +114,15 @@ class ModbusClient:
         """Init"""
         self._hass = hass
         self._config = config
-        self._lock = asyncio.Lock()
+        # Writes (e.g. from remote control) jump ahead of any queued poll reads
+        self._lock = PriorityLock()
+        self._write_queue_delay = QueueDelayStats()
+        self._metrics = ClientMetrics()
         self._protocol = protocol
 
         client = _CLIENTS[protocol]
+        # This is cheap if async_load_protocol has already been called
+        client_class = _load_client_class(protocol)
 
         # Delaying for a second after establishing a connection seems to help the inverter stability,
         # see https://github.com/nathanmarlor/foxess_modbus/discussions/132
@@ -95,7 +147,42 @@ class ModbusClient:
         # in case it helps.
         self._poll_delay = 30 / 1000 if protocol == SERIAL or adapter.connection_type == ConnectionType.LAN else 0
 
-        self._client = client["client"](**config)
+        self._client = client_class(**config)
+        self._default_timeout: float = self._client.comm_params.timeout_connect
+        self._instrument_client()
+
+    @property
+    def write_queue_delay(self) -> QueueDelayStats:
+        """How long writes spent waiting for the client to become free"""
+        return self._write_queue_delay
+
+    @property
+    def metrics(self) -> ClientMetrics:
+        """Metrics about the requests made by this client"""
+        return self._metrics
+
+    def _instrument_client(self) -> None:
+        """Wraps the pymodbus client's send and recv, so that we can count what goes over the wire"""
+        send = self._client.send
+        recv = self._client.recv
+        metrics = self._metrics
+
+        # These are called by pymodbus for every attempt at a request, including retries
+        def _send(request: bytes) -> Any:
+            metrics.num_sends += 1
+            metrics.bytes_sent += len(request)
+            return send(request)
+
+        def _recv(size: int | None) -> Any:
+            result = recv(size)
+            if isinstance(result, bytes | bytearray):
+                if len(result) == 0:
+                    metrics.num_timeouts += 1
+                metrics.bytes_received += len(result)
+            return result
+
+        self._client.send = _send
+        self._client.recv = _recv
 
     async def close(self) -> None:
         """Close connection"""
@@ -108,27 +195,53 @@ class ModbusClient:
         num_registers: int,
         register_type: RegisterType,
         slave: int,
+        *,
+        num_retries: int | None = None,
+        deadline: float | None = None,
+        priority: RequestPriority = RequestPriority.READ,
     ) -> list[int]:
-        """Read registers"""
+        """
+        Read registers
+
+        :param num_retries: Number of retries to use for this read, or None to use the client's default
+        :param deadline: Time (from time.monotonic()) by which this read must complete, or None for no deadline. The
+            timeout and number of retries are reduced to fit. Raises ModbusClientDeadlineExceededError if there isn't
+            enough time left before the deadline to make a request, or if a request with a shortened timeout timed out.
+        :param priority: Priority of this read, relative to other requests waiting for the client
+        """
         expected_response_type: Type[Any]
-        if register_type == RegisterType.HOLDING:
-            response = await self._async_pymodbus_call(
-                self._client.read_holding_registers,
-                start_address,
-                num_registers,
-                slave,
-            )
-            expected_response_type = ReadHoldingRegistersResponse
-        elif register_type == RegisterType.INPUT:
-            response = await self._async_pymodbus_call(
-                self._client.read_input_registers,
-                start_address,
-                num_registers,
-                slave,
-            )
-            expected_response_type = ReadInputRegistersResponse
-        else:
-            raise AssertionError()
+        with TRACER.span(
+            "read_registers",
+            client=self,
+            slave=slave,
+            start_address=start_address,
+            count=num_registers,
+            register_type=register_type.name,
+        ):
+            if register_type == RegisterType.HOLDING:
+                response = await self._async_pymodbus_call(
+                    self._client.read_holding_registers,
+                    start_address,
+                    num_registers,
+                    slave,
+                    num_retries=num_retries,
+                    deadline=deadline,
+                    priority=priority,
+                )
+                expected_response_type = ReadHoldingRegistersResponse
+            elif register_type == RegisterType.INPUT:
+                response = await self._async_pymodbus_call(
+                    self._client.read_input_registers,
+                    start_address,
+                    num_registers,
+                    slave,
+                    num_retries=num_retries,
+                    deadline=deadline,
+                    priority=priority,
+                )
+                expected_response_type = ReadInputRegistersResponse
+            else:
+                raise AssertionError()
 
         if response.isError():
             message = (
@@ -161,23 +274,32 @@ class ModbusClient:
     async def write_registers(self, register_address: int, register_values: list[int], slave: int) -> None:
         """Write registers"""
         expected_response_type: Type[Any]
-        if len(register_values) > 1:
-            register_values = [int(i) for i in register_values]
-            response = await self._async_pymodbus_call(
-                self._client.write_registers,
-                register_address,
-                register_values,
-                slave,
-            )
-            expected_response_type = WriteMultipleRegistersResponse
-        else:
-            response = await self._async_pymodbus_call(
-                self._client.write_register,
-                register_address,
-                int(register_values[0]),
-                slave,
-            )
-            expected_response_type = WriteSingleRegisterResponse
+        with TRACER.span(
+            "write_registers",
+            client=self,
+            slave=slave,
+            start_address=register_address,
+            count=len(register_values),
+        ):
+            if len(register_values) > 1:
+                register_values = [int(i) for i in register_values]
+                response = await self._async_pymodbus_call(
+                    self._client.write_registers,
+                    register_address,
+                    register_values,
+                    slave,
+                    priority=RequestPriority.WRITE,
+                )
+                expected_response_type = WriteMultipleRegistersResponse
+            else:
+                response = await self._async_pymodbus_call(
+                    self._client.write_register,
+                    register_address,
+                    int(register_values[0]),
+                    slave,
+                    priority=RequestPriority.WRITE,
+                )
+                expected_response_type = WriteSingleRegisterResponse
 
         if response.isError():
             message = f"Error writing registers. Start: {register_address}; values: {register_values}; slave: {slave}"
@@ -200,26 +322,126 @@ class ModbusClient:
                 response,
             )
 
-    async def _async_pymodbus_call(self, call: Callable[..., T], *args: Any, auto_connect: bool = True) -> T:
+    async def _async_pymodbus_call(
+        self,
+        call: Callable[..., T],
+        *args: Any,
+        auto_connect: bool = True,
+        num_retries: int | None = None,
+        deadline: float | None = None,
+        priority: RequestPriority = RequestPriority.READ,
+    ) -> T:
         """Convert async to sync pymodbus call."""
 
-        def _call() -> T:
-            # When using pollserial://, connected calls into serial.serial_for_url, which calls importlib.import_module,
-            # which HA doesn't like (see https://github.com/nathanmarlor/foxess_modbus/issues/618).
-            # Therefore we need to do this check inside the executor job
-            if auto_connect and not self._client.connected:
-                self._client.connect()
-            # If the connection failed, this call will throw an appropriate error
-            return call(*args)
-
-        async with self._lock:
-            result = await self._hass.async_add_executor_job(_call)
+        def _call(submitted_at: float) -> T:
+            started_at = time.monotonic()
+            self._metrics.executor_wait.record(started_at - submitted_at)
+            TRACER.record("executor_wait", submitted_at, started_at)
+            num_sends = self._metrics.num_sends
+            bytes_sent = self._metrics.bytes_sent
+            bytes_received = self._metrics.bytes_received
+
+            transaction = self._client.transaction
+            default_retries = transaction.retries
+            retries = num_retries if num_retries is not None else default_retries
+            timeout = self._default_timeout
+
+            # We might have spent a while waiting for the lock and for an executor thread, so do this check here
+            timeout_shortened = False
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < min(_MIN_DEADLINE_TIMEOUT, timeout):
+                    raise ModbusClientDeadlineExceededError(f"Deadline exceeded before request to {self}")
+                # Shrink the timeout to fit, and only retry if there's time for another full attempt
+                timeout_shortened = remaining < timeout
+                timeout = min(timeout, remaining)
+                retries = min(retries, int(remaining // timeout) - 1)
+
+            # pymodbus only lets us configure retries and timeouts for the client as a whole. We hold self._lock, so
+            # nothing else can observe the temporary values
+            transaction.retries = retries
+            self._set_timeout(timeout)
+            try:
+                # When using pollserial://, connected calls into serial.serial_for_url, which calls
+                # importlib.import_module, which HA doesn't like (see
+                # https://github.com/nathanmarlor/foxess_modbus/issues/618).
+                # Therefore we need to do this check inside the executor job
+                if auto_connect and not self._client.connected:
+                    self._client.connect()
+                # If the connection failed, this call will throw an appropriate error
+                result = call(*args)
+            except Exception as ex:
+                if timeout_shortened and self._timed_out_at_deadline(deadline):
+                    raise ModbusClientDeadlineExceededError(f"Deadline exceeded during request to {self}") from ex
+                raise
+            else:
+                # A timeout is returned as an error response. If we shortened the timeout to fit the deadline, that's
+                # a symptom of running out of time rather than of the inverter not responding. ExceptionResponse means
+                # that the inverter did respond
+                is_error = getattr(result, "isError", None)
+                if (
+                    timeout_shortened
+                    and is_error is not None
+                    and is_error()
+                    and not isinstance(result, ExceptionResponse)
+                    and self._timed_out_at_deadline(deadline)
+                ):
+                    raise ModbusClientDeadlineExceededError(f"Deadline exceeded during request to {self}")
+                return result
+            finally:
+                transaction.retries = default_retries
+                self._set_timeout(self._default_timeout)
+
+                # Don't count calls (e.g. close) which didn't send anything
+                num_sends = self._metrics.num_sends - num_sends
+                if num_sends > 0:
+                    finished_at = time.monotonic()
+                    self._metrics.num_requests += 1
+                    self._metrics.num_retries += num_sends - 1
+                    self._metrics.request_latency.record(finished_at - started_at)
+                    TRACER.record(
+                        "modbus_request",
+                        started_at,
+                        finished_at,
+                        function=getattr(call, "__name__", None),
+                        timeout=timeout,
+                        retries=num_sends - 1,
+                        bytes_sent=self._metrics.bytes_sent - bytes_sent,
+                        bytes_received=self._metrics.bytes_received - bytes_received,
+                    )
+
+        queued_at = time.monotonic()
+        async with self._lock.acquire(priority):
+            TRACER.record("client_lock_wait", queued_at, time.monotonic(), priority=priority.name)
+            if priority == RequestPriority.WRITE:
+                delay = time.monotonic() - queued_at
+                self._write_queue_delay.record(delay)
+                _LOGGER.debug("Write to %s waited %.3fs for the client", self, delay)
+            result = await self._hass.async_add_executor_job(_call, time.monotonic())
             # This seems to be required for serial devices, otherwise subsequent reads fail
             # The HA modbus integration does the same
             if self._poll_delay > 0:
                 await asyncio.sleep(self._poll_delay)
             return result
 
+    @staticmethod
+    def _timed_out_at_deadline(deadline: float | None) -> bool:
+        """Whether a request which failed used up all of the time until the deadline"""
+        return deadline is not None and time.monotonic() >= deadline
+
+    def _set_timeout(self, timeout: float) -> None:
+        """Sets the timeout used for subsequent requests. Must be called from inside the executor"""
+        if self._client.comm_params.timeout_connect == timeout:
+            return
+
+        self._client.comm_params.timeout_connect = timeout
+        # The UDP and serial clients only apply the timeout to their socket when connecting
+        if self._client.socket is not None:
+            if self._protocol == UDP:
+                self._client.socket.settimeout(timeout)
+            elif self._protocol == SERIAL:
+                self._client.socket.timeout = timeout
+
     def __str__(self) -> str:
         if self._protocol == SERIAL:
             return f"{self._config['port']}"
@@ -235,5 +457,17 @@ class ModbusClientFailedError(Exception):
         self.client = client
         self.response = response
 
+    @property
+    def is_illegal_address(self) -> bool:
+        """Whether the inverter responded with IllegalAddress, i.e. it doesn't support one of the registers"""
+        return (
+            isinstance(self.response, ExceptionResponse)
+            and self.response.exception_code == ModbusExceptions.IllegalAddress
+        )
+
     def __str__(self) -> str:
         return f"{self.message} from {self.client}: {self.response}"
+
+
+class ModbusClientDeadlineExceededError(Exception):
+    """Raised when the ModbusClient runs out of time to make a request before that request's deadline"""
@@ -0,0 +1,70 @@
+"""A lock which is granted in priority order"""
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator
+
+
+class RequestPriority(IntEnum):
+    """Priority of a request to the ModbusClient. Lower values are served first"""
+
+    WRITE = 0
+    READ = 1
+    # Housekeeping which can wait for everything else, e.g. re-probing invalid registers
+    BACKGROUND = 2
+
+
+class PriorityLock:
+    """
+    asyncio lock where waiters are granted the lock in order of priority, then in order of arrival.
+
+    This lets writes jump ahead of any reads which are queued up as part of a poll.
+    """
+
+    def __init__(self) -> None:
+        self._locked = False
+        # Heap of (priority, sequence number, future)
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+
+    @property
+    def locked(self) -> bool:
+        return self._locked
+
+    @asynccontextmanager
+    async def acquire(self, priority: RequestPriority) -> AsyncIterator[None]:
+        """Acquire the lock with the given priority, releasing it when the context exits"""
+        if not self._locked and len(self._waiters) == 0:
+            self._locked = True
+        else:
+            future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            entry = (int(priority), next(self._counter), future)
+            heapq.heappush(self._waiters, entry)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    if entry in self._waiters:
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                else:
+                    # We were handed the lock, but got cancelled before we could run. Pass it on
+                    self._release()
+                raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        # Hand the lock straight to the next waiter (if any), so that nothing can barge in ahead of it
+        while len(self._waiters) > 0:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._locked = False
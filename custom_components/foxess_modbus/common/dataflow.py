@@ -0,0 +1,87 @@
+"""Values derived from registers, which are shared between entities and only recomputed when their inputs change"""
+
+from typing import Any
+from typing import Callable
+from typing import Generic
+from typing import Hashable
+from typing import Iterable
+from typing import Sequence
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# The values of a node's input registers, in the order given when the node was created. None if a register hasn't been
+# read
+NodeInputs = tuple[int | None, ...]
+
+
+class DerivedValue(Generic[T]):
+    """A node in a DataflowGraph: a value computed from a set of registers"""
+
+    def __init__(
+        self, addresses: tuple[int, ...], compute: Callable[[NodeInputs], T], read: Callable[[int], int | None]
+    ) -> None:
+        self._addresses = addresses
+        self._compute = compute
+        self._read = read
+        self._inputs: NodeInputs | None = None
+        self._value: T | None = None
+        self._is_stale = True
+
+    @property
+    def addresses(self) -> tuple[int, ...]:
+        return self._addresses
+
+    @property
+    def value(self) -> T:
+        """The current value, recomputing it if any of the input registers have changed since it was last computed"""
+        if self._is_stale:
+            inputs = tuple(self._read(address) for address in self._addresses)
+            if inputs != self._inputs:
+                self._value = self._compute(inputs)
+                self._inputs = inputs
+            self._is_stale = False
+        return self._value  # type: ignore[return-value]
+
+    def invalidate(self) -> None:
+        """Marks the inputs as possibly changed. They're read again the next time the value is fetched"""
+        self._is_stale = True
+
+
+class DataflowGraph:
+    """
+    The set of values derived from a controller's registers.
+
+    Nodes are identified by a key, so that entities which need the same derived value share a single node. Nodes are
+    computed lazily, at most once per poll, and only if one of their inputs has changed.
+    """
+
+    def __init__(self, read: Callable[[int], int | None]) -> None:
+        self._read = read
+        self._nodes: dict[Hashable, DerivedValue[Any]] = {}
+        # Address -> nodes which take it as an input
+        self._nodes_by_address: dict[int, list[DerivedValue[Any]]] = {}
+
+    def node(self, key: Hashable, addresses: Sequence[int], compute: Callable[[NodeInputs], T]) -> DerivedValue[T]:
+        """
+        Fetches the node with the given key, creating it if necessary.
+
+        The key must identify the computation as well as its inputs: if a node with this key already exists, it's
+        returned as-is.
+        """
+        node: DerivedValue[T] | None = self._nodes.get(key)
+        if node is None:
+            node = DerivedValue(tuple(addresses), compute, self._read)
+            self._nodes[key] = node
+            for address in node.addresses:
+                self._nodes_by_address.setdefault(address, []).append(node)
+        return node
+
+    def invalidate(self, changed_addresses: Iterable[int]) -> None:
+        """Called when the given registers have been read or written"""
+        nodes_by_address = self._nodes_by_address
+        for address in changed_addresses:
+            nodes = nodes_by_address.get(address)
+            if nodes is not None:
+                for node in nodes:
+                    node.invalidate()
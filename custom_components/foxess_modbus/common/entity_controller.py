@@ -5,9 +5,13 @@ from abc import ABC
 from abc import abstractmethod
 from enum import Enum
 from typing import Any
+from typing import Callable
 
 from homeassistant.core import HomeAssistant
 
+from .dataflow import DataflowGraph
+from .metrics import ClientMetrics
+from .metrics import PollMetrics
 from .types import RegisterPollType
 
 _LOGGER = logging.getLogger(__name__)
@@ -25,6 +29,14 @@ class ModbusControllerEntity(ABC):
     def register_poll_type(self) -> RegisterPollType:
         return RegisterPollType.PERIODICALLY
 
+    @property
+    def source_entity_ids(self) -> list[str]:
+        """
+        IDs of the other entities which this entity's value is computed from (if any). After a poll, this entity is
+        notified after those entities have updated
+        """
+        return []
+
     @abstractmethod
     def update_callback(self, changed_addresses: set[int]) -> None:
         """Notify listeners that the given addresses have changed"""
@@ -114,6 +126,26 @@ class EntityController(ABC):
     def inverter_details(self) -> dict[str, Any]:
         """Fetches the inverter details"""
 
+    @property
+    @abstractmethod
+    def poll_metrics(self) -> PollMetrics:
+        """Fetches metrics about this controller's polls"""
+
+    @property
+    @abstractmethod
+    def client_metrics(self) -> ClientMetrics:
+        """Fetches metrics about the requests made by this controller's client"""
+
+    @property
+    @abstractmethod
+    def generation(self) -> int:
+        """Incremented whenever the value returned by read might have changed, e.g. after each poll"""
+
+    @property
+    @abstractmethod
+    def dataflow(self) -> DataflowGraph:
+        """Fetches the graph of values derived from this controller's registers"""
+
     @abstractmethod
     def register_modbus_entity(self, listener: ModbusControllerEntity) -> None:
         """Register a modbus entity with the ModbusController"""
@@ -122,6 +154,14 @@ class EntityController(ABC):
     def remove_modbus_entity(self, listener: ModbusControllerEntity) -> None:
         """Removes a modbus entity from the ModbusController"""
 
+    @abstractmethod
+    def get_modbus_entity(self, entity_id: str) -> ModbusControllerEntity | None:
+        """Fetches the registered modbus entity with the given entity ID, or None if it isn't registered"""
+
+    @abstractmethod
+    def add_poll_complete_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Adds a listener which is called after each successful poll, returning a function which removes it"""
+
     @abstractmethod
     async def write_register(self, address: int, value: int) -> None:
         """Write a single value to a register"""
@@ -130,6 +170,10 @@ class EntityController(ABC):
     async def write_registers(self, start_address: int, values: list[int]) -> None:
         """Write multiple registers"""
 
+    @abstractmethod
+    async def write_batch(self, writes: list[tuple[int, int]]) -> None:
+        """Write a set of (address, value) pairs, coalescing them into as few writes as possible"""
+
     @abstractmethod
     def read(self, address: int | list[int], *, signed: bool) -> int | None:
         """Fetch the last-read value for the given address, or None if none is avaiable"""
@@ -0,0 +1,58 @@
+"""Fixed-bucket histograms, used to record timings"""
+
+import bisect
+from typing import Any
+from typing import Sequence
+
+
+class Histogram:
+    """
+    Histogram with a fixed set of bucket upper bounds.
+
+    Each sample is counted in the first bucket whose upper bound is >= the sample. Samples larger than all of the bounds
+    are counted in a final overflow bucket.
+    """
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        assert list(bounds) == sorted(bounds), "Bounds must be sorted"
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+        self._last = 0.0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._total / self._count if self._count > 0 else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    @property
+    def last(self) -> float:
+        return self._last
+
+    def record(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._total += value
+        self._max = max(self._max, value)
+        self._last = value
+
+    def as_dict(self) -> dict[str, Any]:
+        """Returns a JSON-serializable representation of this histogram"""
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self._bounds, self._counts, strict=False)}
+        buckets["inf"] = self._counts[-1]
+        return {
+            "count": self._count,
+            "mean": self.mean,
+            "max": self._max,
+            "last": self._last,
+            "buckets": buckets,
+        }
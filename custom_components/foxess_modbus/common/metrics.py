@@ -0,0 +1,65 @@
+"""Metrics recorded about polling and the Modbus connection"""
+
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from .histogram import Histogram
+
+# Bucket upper bounds (seconds) for individual requests
+_REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Bucket upper bounds (seconds) for an entire poll
+_POLL_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+@dataclass
+class ClientMetrics:
+    """Metrics about the requests made by a ModbusClient"""
+
+    # Time taken for each request to complete once it started running in the executor, including retries
+    request_latency: Histogram = field(default_factory=lambda: Histogram(_REQUEST_BUCKETS))
+    # Time each request spent waiting for an executor thread
+    executor_wait: Histogram = field(default_factory=lambda: Histogram(_REQUEST_BUCKETS))
+    num_requests: int = 0
+    # Number of times a request was sent, including retries
+    num_sends: int = 0
+    num_retries: int = 0
+    # Number of times we waited for a response and received nothing
+    num_timeouts: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "request_latency": self.request_latency.as_dict(),
+            "executor_wait": self.executor_wait.as_dict(),
+            "num_requests": self.num_requests,
+            "num_sends": self.num_sends,
+            "num_retries": self.num_retries,
+            "num_timeouts": self.num_timeouts,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+
+@dataclass
+class PollMetrics:
+    """Metrics about the polls made by a ModbusController"""
+
+    # Time taken to read each range of registers, including waiting for the client
+    range_latency: Histogram = field(default_factory=lambda: Histogram(_REQUEST_BUCKETS))
+    # Time taken by each poll, whether or not it succeeded
+    poll_duration: Histogram = field(default_factory=lambda: Histogram(_POLL_BUCKETS))
+    num_polls: int = 0
+    num_failed_polls: int = 0
+    # Number of polls which ran out of time and deferred some reads to the next poll
+    num_deferred_polls: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "range_latency": self.range_latency.as_dict(),
+            "poll_duration": self.poll_duration.as_dict(),
+            "num_polls": self.num_polls,
+            "num_failed_polls": self.num_failed_polls,
+            "num_deferred_polls": self.num_deferred_polls,
+        }
@@ -0,0 +1,50 @@
+"""Fixed-size moving average filter"""
+
+
+class MovingAverage:
+    """
+    Moving average over the last `size` values, held in a circular buffer with a running sum.
+
+    Adding a value is O(1) and doesn't allocate.
+    """
+
+    def __init__(self, size: int) -> None:
+        assert size > 0
+        self._values = [0.0] * size
+        self._index = 0
+        self._sum = 0.0
+        self._is_empty = True
+
+    @property
+    def is_empty(self) -> bool:
+        return self._is_empty
+
+    @property
+    def average(self) -> float:
+        assert not self._is_empty
+        return self._sum / len(self._values)
+
+    def clear(self) -> None:
+        self._is_empty = True
+
+    def fill(self, value: float) -> None:
+        """Replaces every value in the filter with the given value"""
+        values = self._values
+        for i in range(len(values)):
+            values[i] = value
+        self._index = 0
+        # Recalculating the sum here also discards any floating-point error accumulated by add
+        self._sum = value * len(values)
+        self._is_empty = False
+
+    def add(self, value: float) -> None:
+        """Adds a value, replacing the oldest. If the filter is empty, it's filled with this value"""
+        if self._is_empty:
+            self.fill(value)
+            return
+
+        index = self._index
+        self._sum += value - self._values[index]
+        self._values[index] = value
+        index += 1
+        self._index = index if index < len(self._values) else 0
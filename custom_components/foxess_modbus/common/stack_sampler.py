@@ -0,0 +1,87 @@
+"""A low-overhead sampling profiler, which only records stacks passing through this integration"""
+
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+from types import FrameType
+
+# Everything inside the integration's directory, including vendored pymodbus
+_PACKAGE_DIR = str(Path(__file__).parent.parent)
+
+
+class StackSampler:
+    """
+    Samples the stacks of all threads at a fixed interval, recording only those which are running code from this
+    integration.
+
+    Stacks are recorded in the collapsed format used by flamegraph.pl / speedscope, rooted at the outermost frame from
+    this integration.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._stacks: Counter[str] = Counter()
+        # Code object -> label used for its frames
+        self._labels: dict[CodeType, str] = {}
+        self._num_samples = 0
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def num_samples(self) -> int:
+        return self._num_samples
+
+    def start(self) -> None:
+        assert self._thread is None
+        self._thread = threading.Thread(target=self._run, name="foxess_modbus_stack_sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling, blocking until the sampling thread exits"""
+        assert self._thread is not None
+        self._stop_event.set()
+        self._thread.join()
+
+    def write_collapsed(self, path: str) -> None:
+        with Path(path).open("w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _run(self) -> None:
+        own_thread_id = threading.get_ident()
+        while not self._stop_event.wait(self._interval):
+            self._num_samples += 1
+            for thread_id, frame in sys._current_frames().items():  # noqa: SLF001
+                if thread_id == own_thread_id:
+                    continue
+                stack = self._collapse(frame)
+                if stack is not None:
+                    self._stacks[stack] += 1
+
+    def _collapse(self, frame: FrameType | None) -> str | None:
+        # Innermost frame first. Most stacks don't involve this integration at all, so find out whether this one does
+        # before doing any formatting
+        codes: list[CodeType] = []
+        outermost_own_frame = -1
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename.startswith(_PACKAGE_DIR):
+                outermost_own_frame = len(codes)
+            codes.append(code)
+            frame = frame.f_back
+
+        if outermost_own_frame == -1:
+            return None
+        return ";".join(self._label(code) for code in reversed(codes[: outermost_own_frame + 1]))
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(_PACKAGE_DIR):
+                filename = filename[len(_PACKAGE_DIR) + 1 :]
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
@@ -0,0 +1,166 @@
+"""
+Lightweight tracing of polls, Modbus requests and entity updates.
+
+Tracing is disabled unless an exporter is registered with TRACER, in which case spans are a few attribute lookups.
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+
+@dataclass
+class FinishedSpan:
+    name: str
+    start: float  # From time.monotonic()
+    end: float  # From time.monotonic()
+    thread_id: int
+    attributes: dict[str, Any]
+
+
+class SpanExporter(ABC):
+    """Receives spans as they finish"""
+
+    @abstractmethod
+    def export(self, span: FinishedSpan) -> None:
+        """Called for each finished span. May be called from any thread"""
+
+    def close(self) -> None:  # noqa: B027
+        """Called when the exporter is removed. May do blocking IO"""
+
+
+class Span:
+    """A span which is being recorded. Use as a context manager"""
+
+    __slots__ = ("_attributes", "_name", "_start", "_tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._start = 0.0
+        self._attributes = attributes
+
+    def set(self, **attributes: Any) -> None:
+        """Sets attributes on this span"""
+        self._attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc is not None:
+            self._attributes["error"] = repr(exc)
+        self._tracer.record(self._name, self._start, time.monotonic(), **self._attributes)
+
+
+class _NullSpan(Span):
+    """Span returned when tracing is disabled, which does nothing"""
+
+    def __init__(self) -> None:
+        pass
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Creates spans, and sends them to any registered exporters"""
+
+    def __init__(self) -> None:
+        self._exporters: tuple[SpanExporter, ...] = ()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return len(self._exporters) > 0
+
+    def add_exporter(self, exporter: SpanExporter) -> None:
+        with self._lock:
+            self._exporters = (*self._exporters, exporter)
+
+    def remove_exporter(self, exporter: SpanExporter) -> None:
+        with self._lock:
+            self._exporters = tuple(x for x in self._exporters if x is not exporter)
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        """Returns a span which records the time spent inside its context"""
+        if len(self._exporters) == 0:
+            return _NULL_SPAN
+        return Span(self, name, attributes)
+
+    def record(self, name: str, start: float, end: float, **attributes: Any) -> None:
+        """Records a span which has already been timed"""
+        exporters = self._exporters
+        if len(exporters) == 0:
+            return
+        span = FinishedSpan(name, start, end, threading.get_ident(), attributes)
+        for exporter in exporters:
+            exporter.export(span)
+
+
+class ChromeTraceExporter(SpanExporter):
+    """
+    Writes spans to a file in the Chrome trace event format, which can be opened in chrome://tracing or Perfetto.
+
+    Spans are buffered in memory, and written when the exporter is closed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._events: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def export(self, span: FinishedSpan) -> None:
+        event = {
+            "name": span.name,
+            "ph": "X",
+            "ts": span.start * 1_000_000,
+            "dur": (span.end - span.start) * 1_000_000,
+            "pid": self._pid,
+            "tid": span.thread_id,
+            "args": span.attributes,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def close(self) -> None:
+        with self._lock:
+            events = self._events
+            self._events = []
+        with Path(self._path).open("w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+
+TRACER = Tracer()
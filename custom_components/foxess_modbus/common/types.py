@@ -14,6 +14,7 @@ from typing import TypedDict
 if TYPE_CHECKING:
     from ..client.modbus_client import ModbusClient
     from ..modbus_controller import ModbusController
+    from ..site_aggregator import SiteAggregator
 
 
 class RegisterType(Enum):
@@ -104,6 +105,8 @@ class RegisterPollType(IntEnum):
 class HassDataEntry(TypedDict):
     controllers: list["ModbusController"]
     modbus_clients: list["ModbusClient"]
+    # Only present if there's more than one inverter
+    site_aggregator: NotRequired["SiteAggregator"]
     unload: NotRequired[Callable[[], None]]
 
 
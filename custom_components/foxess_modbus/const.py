@@ -39,8 +39,15 @@ MODBUS_TYPE = "modbus_type"  # TCP, UDP, SERIAL, RTU_OVER_TCP
 MODBUS_SERIAL_BAUD = "modbus_serial_baud"
 POLL_RATE = "poll_rate"
 MAX_READ = "max_read"
+# The ReadCostModel measured when calibrating max_read, if any
+READ_COST_MODEL = "read_cost_model"
 ADAPTER_ID = "adapter_id"
 ROUND_SENSOR_VALUES = "round_sensor_values"
+VERIFY_WRITES = "verify_writes"
+# Limits on how often sensors write their state: minimum interval (seconds), deadband (percent) and heartbeat (seconds)
+PUBLISH_MIN_INTERVAL = "publish_min_interval"
+PUBLISH_DEADBAND = "publish_deadband"
+PUBLISH_HEARTBEAT = "publish_heartbeat"
 # Used as a key in the inverter config to indicate that the adapter was migrated from config version 1
 ADAPTER_WAS_MIGRATED = "adapter_was_migrated"
 
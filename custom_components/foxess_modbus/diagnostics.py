@@ -0,0 +1,43 @@
+"""Diagnostics support for foxess_modbus"""
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .common.types import HassData
+from .const import DOMAIN
+from .const import FRIENDLY_NAME
+from .vendor import pymodbus
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry"""
+
+    hass_data: HassData = hass.data[DOMAIN]
+    controllers = hass_data[entry.entry_id]["controllers"]
+
+    return {
+        "pymodbus_import_times_ms": {name: duration * 1000 for name, duration in pymodbus.IMPORT_TIMES.items()},
+        "controllers": [
+            {
+                "friendly_name": controller.inverter_details[FRIENDLY_NAME],
+                "client": str(controller.client),
+                "slave": controller.slave,
+                "poll_rate": controller.poll_rate,
+                "max_read": controller.max_read,
+                "is_connected": controller.is_connected,
+                "poll": controller.poll_metrics.as_dict(),
+                "client_requests": controller.client_metrics.as_dict(),
+                "client_write_queue_delay": {
+                    "count": controller.client.write_queue_delay.count,
+                    "mean": controller.client.write_queue_delay.mean,
+                    "max": controller.client.write_queue_delay.max,
+                },
+                "write_latency": {
+                    str(address): histogram.as_dict() for address, histogram in controller.write_latency.items()
+                },
+            }
+            for controller in controllers
+        ],
+    }
@@ -5,7 +5,18 @@ from abc import abstractmethod
 
 
 class BaseValidator(ABC):
-    """Base validator"""
+    """
+    Base validator
+
+    Validators compare equal if they're the same type with the same parameters, so that they can be used to key shared
+    values
+    """
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and vars(other) == vars(self)
+
+    def __hash__(self) -> int:
+        return hash((type(self), tuple(sorted(vars(self).items()))))
 
     @abstractmethod
     def validate(self, data: float) -> bool:
@@ -1,6 +1,8 @@
 """Holds all entity descriptions for all entities across all inverters"""
 
+import functools
 import itertools
+from typing import Any
 from typing import Iterable
 
 from homeassistant.components.number import NumberDeviceClass
@@ -175,7 +177,8 @@ def _pv_entities() -> Iterable[EntityFactory]:
             models=models,
             device_class=SensorDeviceClass.ENERGY,
             native_unit_of_measurement="kWh",
-            integration_method="left",
+            integration_method="trapezoidal",
+            sample_in_controller=True,
             name=name,
             source_entity=source_entity,
             unit_time=UnitOfTime.HOURS,
@@ -1644,7 +1647,8 @@ def _inverter_entities() -> Iterable[EntityFactory]:
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement="kWh",
         icon="mdi:battery-arrow-up-outline",
-        integration_method="left",
+        integration_method="trapezoidal",
+        sample_in_controller=True,
         name="Battery Charge Total",
         source_entity="battery_charge",
         unit_time=UnitOfTime.HOURS,
@@ -1718,7 +1722,8 @@ def _inverter_entities() -> Iterable[EntityFactory]:
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement="kWh",
         icon="mdi:battery-arrow-down-outline",
-        integration_method="left",
+        integration_method="trapezoidal",
+        sample_in_controller=True,
         name="Battery Discharge Total",
         source_entity="battery_discharge",
         unit_time=UnitOfTime.HOURS,
@@ -1795,7 +1800,8 @@ def _inverter_entities() -> Iterable[EntityFactory]:
         name="Feed-in Total",
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement="kWh",
-        integration_method="left",
+        integration_method="trapezoidal",
+        sample_in_controller=True,
         source_entity="feed_in",
         unit_time=UnitOfTime.HOURS,
         icon="mdi:transmission-tower-import",
@@ -1871,7 +1877,8 @@ def _inverter_entities() -> Iterable[EntityFactory]:
         ],
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement="kWh",
-        integration_method="left",
+        integration_method="trapezoidal",
+        sample_in_controller=True,
         name="Grid Consumption Total",
         source_entity="grid_consumption",
         unit_time=UnitOfTime.HOURS,
@@ -2082,7 +2089,8 @@ def _inverter_entities() -> Iterable[EntityFactory]:
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement="kWh",
         icon="mdi:home-lightning-bolt-outline",
-        integration_method="left",
+        integration_method="trapezoidal",
+        sample_in_controller=True,
         name="Load Energy Total",
         source_entity="load_power",
         unit_time=UnitOfTime.HOURS,
@@ -2575,16 +2583,29 @@ def _configuration_entities() -> Iterable[EntityFactory]:
     )
 
 
-ENTITIES: list[EntityFactory] = list(
-    itertools.chain(
-        _version_entities(),
-        _pv_entities(),
-        _h1_current_voltage_power_entities(),
-        _h3_current_voltage_power_entities(),
-        _inverter_entities(),
-        _bms_entities(),
-        _configuration_entities(),
-        (description for x in CHARGE_PERIODS for description in x.entity_descriptions),
-        REMOTE_CONTROL_DESCRIPTION.entity_descriptions,
+@functools.cache
+def get_entities() -> list[EntityFactory]:
+    """
+    Returns all entity descriptions. These are built on first use rather than at import, as building them is slow.
+    This may block, so call it from an executor first.
+    """
+    return list(
+        itertools.chain(
+            _version_entities(),
+            _pv_entities(),
+            _h1_current_voltage_power_entities(),
+            _h3_current_voltage_power_entities(),
+            _inverter_entities(),
+            _bms_entities(),
+            _configuration_entities(),
+            (description for x in CHARGE_PERIODS for description in x.entity_descriptions),
+            REMOTE_CONTROL_DESCRIPTION.entity_descriptions,
+        )
     )
-)
+
+
+def __getattr__(name: str) -> Any:
+    # ENTITIES used to be a module-level list. Keep it working for anything which still imports it
+    if name == "ENTITIES":
+        return get_entities()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
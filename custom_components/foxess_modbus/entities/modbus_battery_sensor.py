@@ -8,6 +8,7 @@ from typing import Any
 
 from homeassistant.helpers.entity import Entity
 
+from ..common.dataflow import NodeInputs
 from ..common.entity_controller import EntityController
 from ..common.types import Inv
 from ..common.types import RegisterType
@@ -15,6 +16,7 @@ from .entity_factory import ENTITY_DESCRIPTION_KWARGS
 from .inverter_model_spec import ModbusAddressSpec
 from .modbus_sensor import ModbusSensor
 from .modbus_sensor import ModbusSensorDescription
+from .publish_policy import PublishPolicy
 
 
 @dataclass(kw_only=True, **ENTITY_DESCRIPTION_KWARGS)
@@ -41,12 +43,18 @@ class ModbusBatterySensorDescription(ModbusSensorDescription):  # type: ignore[m
                 self,
                 addresses,
                 bms_connect_address,
+                PublishPolicy.from_options(controller.inverter_details, self.round_to),
             )
             if addresses is not None
             else None
         )
 
 
+def _is_bms_connected(inputs: NodeInputs) -> bool:
+    # 0: Initial state, 1: OK, 2: NG
+    return inputs[0] == 1
+
+
 class ModbusBatterySensor(ModbusSensor):
     """A sensor which returns Unknown if the battery is not connected"""
 
@@ -57,30 +65,43 @@ class ModbusBatterySensor(ModbusSensor):
         # Array of registers which this value is split over, from lower-order bits to higher-order bits
         addresses: list[int],
         bms_connect_state_address: int | None,
+        publish_policy: PublishPolicy | None = None,
     ) -> None:
         super().__init__(
             controller=controller,
             entity_description=entity_description,
             addresses=addresses,
             round_to=None,
+            publish_policy=publish_policy,
         )
 
         self._interested_addresses = addresses.copy()
         if bms_connect_state_address is not None:
             self._interested_addresses.append(bms_connect_state_address)
 
-        self._bms_connect_state_address = bms_connect_state_address
+        # Shared between all of the battery sensors
+        self._bms_connected = (
+            controller.dataflow.node(
+                ("bms_connected", bms_connect_state_address), [bms_connect_state_address], _is_bms_connected
+            )
+            if bms_connect_state_address is not None
+            else None
+        )
 
     @property
     def native_value(self) -> Any:
-        if self._bms_connect_state_address is not None:
-            bms_connect_state = self._controller.read(self._bms_connect_state_address, signed=False)
-            # 0: Initial state, 1: OK, 2: NG
-            if bms_connect_state != 1:
-                return None
+        if self._bms_connected is not None and not self._bms_connected.value:
+            return None
 
         return super().native_value
 
+    @property
+    def raw_native_value(self) -> int | float | None:
+        if self._bms_connected is not None and not self._bms_connected.value:
+            return None
+
+        return super().raw_native_value
+
     @property
     def addresses(self) -> list[int]:
         return self._interested_addresses
@@ -76,6 +76,9 @@ class ModbusBinarySensor(ModbusEntityMixin, BinarySensorEntity):
 
     @property
     def is_on(self) -> bool | None:
+        return self._cached_value(self._calculate_is_on)
+
+    def _calculate_is_on(self) -> bool | None:
         """Return the value reported by the sensor."""
         value = self._controller.read(self._address, signed=False)
         if value is None:
@@ -8,7 +8,6 @@ from datetime import datetime
 from datetime import time
 from decimal import Decimal
 from typing import Any
-from typing import cast
 
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
 from homeassistant.components.binary_sensor import BinarySensorEntity
@@ -22,6 +21,8 @@ from homeassistant.helpers.restore_state import RestoredExtraData
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import StateType
 
+from ..common.dataflow import DerivedValue
+from ..common.dataflow import NodeInputs
 from ..common.entity_controller import EntityController
 from ..common.types import Inv
 from ..common.types import RegisterType
@@ -58,6 +59,41 @@ def _is_force_charge_enabled(
     return start_or_end_1 > 0 or start_or_end_2 > 0
 
 
+@dataclass(frozen=True)
+class _ChargePeriodValues:
+    """The values of a charge period's start and end registers"""
+
+    # Address -> value, or None if it's unavailable or invalid
+    values: dict[int, int | None]
+
+    @property
+    def is_force_charge_enabled(self) -> bool | None:
+        """Whether the charge period is enabled, or None if we can't tell"""
+        value_1, value_2 = self.values.values()
+        if value_1 is None or value_2 is None:
+            return None
+        return _is_force_charge_enabled(value_1, value_2)
+
+
+def _charge_period_node(
+    controller: EntityController, address_1: int, address_2: int, rules: list[BaseValidator]
+) -> DerivedValue[_ChargePeriodValues]:
+    """Fetches the node shared by all of the entities which look at the given charge period"""
+    addresses = sorted([address_1, address_2])
+
+    def compute(inputs: NodeInputs) -> _ChargePeriodValues:
+        values: dict[int, int | None] = {}
+        for address, value in zip(addresses, inputs, strict=True):
+            if value is not None and not all(rule.validate(value) for rule in rules):
+                _LOGGER.warning("Value %s for charge period address %s failed validation", value, address)
+                value = None
+            values[address] = value
+        return _ChargePeriodValues(values)
+
+    # Entities which validate the period differently can't share a node
+    return controller.dataflow.node(("charge_period", *addresses, tuple(rules)), addresses, compute)
+
+
 @dataclass(kw_only=True, **ENTITY_DESCRIPTION_KWARGS)
 class ModbusChargePeriodStartEndSensorDescription(SensorEntityDescription, EntityFactory):  # type: ignore[misc]
     """Entity description for ModbusChargePeriodStartEndSensor"""
@@ -119,6 +155,7 @@ class ModbusChargePeriodStartEndSensor(ModbusEntityMixin, RestoreEntity, SensorE
         self.entity_description = entity_description
         self._address = address
         self._other_address = other_address
+        self._period = _charge_period_node(controller, address, other_address, entity_description.validate)
         self.entity_id = self._get_entity_id(Platform.SENSOR)
         # The last value this sensor had when force-charge was enabled
         self._last_enabled_value: int | None = None
@@ -126,26 +163,17 @@ class ModbusChargePeriodStartEndSensor(ModbusEntityMixin, RestoreEntity, SensorE
     @property
     def native_value(self) -> StateType | date | datetime | Decimal:
         """Return the value reported by the sensor."""
-        value = self._controller.read(self._address, signed=False)
+        period = self._period.value
+        value = period.values[self._address]
 
         if value is None:
             return None
 
-        rules = cast(ModbusChargePeriodStartEndSensorDescription, self.entity_description).validate
-        if not self._validate(rules, value):
-            return None
-
-        other_value = self._controller.read(self._other_address, signed=False)
         # If the charge window is disabled (i.e. both start and end are 0),
-        # return the last-stored value rather than midnight. If other_value is unavailable,
+        # return the last-stored value rather than midnight. If the other value is unavailable,
         # assume the charge window is enabled, so we'll only fall back to _last_enabled_value
         # if we're certain that force-charging is disabled
-        if (
-            self._last_enabled_value is not None
-            and other_value is not None
-            and self._validate(rules, other_value)
-            and not _is_force_charge_enabled(value, other_value)
-        ):
+        if self._last_enabled_value is not None and period.is_force_charge_enabled is False:
             value = self._last_enabled_value
 
         parsed_value = parse_time_value(value)
@@ -169,17 +197,9 @@ class ModbusChargePeriodStartEndSensor(ModbusEntityMixin, RestoreEntity, SensorE
         # 0 to a non-zero value, that means that someone has enabled a force-charge window
         # with a start time of midnight, so we need to update ourselves.
         # Therefore, we need to be sensitive to other_address
-        value = self._controller.read(self._address, signed=False)
-        if value is not None:
-            other_value = self._controller.read(self._other_address, signed=False)
-            rules = cast(ModbusChargePeriodStartEndSensorDescription, self.entity_description).validate
-            if (
-                self._validate(rules, value)
-                and other_value is not None
-                and self._validate(rules, other_value)
-                and _is_force_charge_enabled(value, other_value)
-            ):
-                self._last_enabled_value = value
+        period = self._period.value
+        if period.is_force_charge_enabled:
+            self._last_enabled_value = period.values[self._address]
 
         # I'm not sure whether there are any cases where our exposed state will changed
         # if other_address changes, but this won't change often, so be safe.
@@ -259,32 +279,15 @@ class ModbusEnableForceChargeSensor(ModbusEntityMixin, BinarySensorEntity):
         self.entity_description = entity_description
         self._period_start_address = period_start_address
         self._period_end_address = period_end_address
+        self._period = _charge_period_node(
+            controller, period_start_address, period_end_address, entity_description.validate
+        )
         self.entity_id = self._get_entity_id(Platform.BINARY_SENSOR)
         self._attr_device_class = BinarySensorDeviceClass.POWER
 
     @property
     def is_on(self) -> bool | None:
-        start_time = self._controller.read(self._period_start_address, signed=False)
-        end_time = self._controller.read(self._period_end_address, signed=False)
-        rules = cast(ModbusEnableForceChargeSensorDescription, self.entity_description).validate
-
-        if (
-            start_time is None
-            or not self._validate(
-                rules,
-                start_time,
-                address_override=self._period_start_address,
-            )
-            or end_time is None
-            or not self._validate(
-                rules,
-                end_time,
-                address_override=self._period_end_address,
-            )
-        ):
-            return None
-
-        return _is_force_charge_enabled(start_time, end_time)
+        return self._period.value.is_force_charge_enabled
 
     @property
     def icon(self) -> str | None:
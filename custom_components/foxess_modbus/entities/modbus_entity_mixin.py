@@ -3,7 +3,9 @@
 import logging
 from typing import TYPE_CHECKING
 from typing import Any
+from typing import Callable
 from typing import Protocol
+from typing import TypeVar
 from typing import cast
 
 from homeassistant.const import Platform
@@ -15,6 +17,7 @@ from propcache import cached_property
 
 from ..common.entity_controller import EntityController
 from ..common.entity_controller import ModbusControllerEntity
+from ..common.tracing import TRACER
 from ..const import DOMAIN
 from ..const import ENTITY_ID_PREFIX
 from ..const import FRIENDLY_NAME
@@ -25,6 +28,8 @@ from .base_validator import BaseValidator
 
 _LOGGER = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 def get_entity_id(controller: EntityController, platform: Platform, key: str) -> str:
     """Gets the entity ID for the entity with the given platform and key"""
@@ -39,7 +44,7 @@ def get_entity_id(controller: EntityController, platform: Platform, key: str) ->
     if entity_id is None:
         # This can happen when first setting up, as the target entity hasn't been created yet.
         # In this case, assume that it's going to be correctly named
-        entity_id = _add_entity_id_prefix(key, controller.inverter_details)
+        entity_id = f"{platform}.{_add_entity_id_prefix(key, controller.inverter_details)}"
 
     return entity_id
 
@@ -90,6 +95,10 @@ class ModbusEntityMixin(
     This provides properties which are common to all FoxESS entities.
     """
 
+    # The controller generation at which _cached_value last computed its value
+    _cached_value_generation: int | None = None
+    _cached_value_result: Any = None
+
     @cached_property
     def unique_id(self) -> str:
         """Return a unique ID."""
@@ -142,11 +151,31 @@ class ModbusEntityMixin(
             self._address_updated()
 
     def is_connected_changed_callback(self) -> None:
-        self.schedule_update_ha_state()
+        self._write_state()
 
     def _address_updated(self) -> None:
         """Called when the controller reads an updated to any of the addresses in self.addresses"""
-        self.schedule_update_ha_state()
+        self._write_state()
+
+    def _write_state(self) -> None:
+        """
+        Writes our state to HA, tracing the cost of doing so. The controller calls us from the event loop, so we can
+        write the state straight away rather than scheduling it.
+        """
+        with TRACER.span("write_state", entity_id=self.entity_id):
+            self.async_write_ha_state()
+
+    def _cached_value(self, compute: Callable[[], T]) -> T:
+        """
+        Returns the result of compute, only calling it again once the controller's registers have changed. HA fetches
+        an entity's value several times per state write.
+        """
+        generation = self._controller.generation
+        if self._cached_value_generation != generation:
+            self._cached_value_result = compute()
+            self._cached_value_generation = generation
+        result: T = self._cached_value_result
+        return result
 
     def _get_entity_id(self, platform: Platform) -> str:
         """Gets the entity ID"""
@@ -2,13 +2,13 @@
 
 from dataclasses import dataclass
 from typing import Any
-from typing import cast
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor import SensorEntityDescription
 from homeassistant.const import Platform
 from homeassistant.helpers.entity import Entity
 
+from ..common.dataflow import NodeInputs
 from ..common.entity_controller import EntityController
 from ..common.types import Inv
 from ..common.types import RegisterType
@@ -17,6 +17,9 @@ from .entity_factory import EntityFactory
 from .inverter_model_spec import ModbusAddressesSpec
 from .modbus_entity_mixin import ModbusEntityMixin
 
+# Number of distinct sets of register values which each FaultSet remembers the decoding of
+_MAX_CACHED_DECODES = 64
+
 
 @dataclass
 class FaultSet:
@@ -31,6 +34,67 @@ class FaultSet:
             for assert_mask in assert_masks:
                 assert any(fault for fault_list in self.faults for fault in fault_list if fault == assert_mask)
 
+        # Compile the faults into bitmasks. Register i's bits occupy bits [16 * i, 16 * (i + 1)) of the combined mask
+        # Register index -> bits which correspond to a fault
+        self._fault_bits: list[int] = []
+        # Bit in the combined mask -> fault
+        self._fault_names: dict[int, str] = {}
+        fault_masks: dict[str, int] = {}
+        for i, fault_list in enumerate(self.faults):
+            assert len(fault_list) <= 16
+            register_bits = 0
+            for index, fault_code in enumerate(fault_list):
+                if fault_code is not None:
+                    register_bits |= 1 << index
+                    self._fault_names[i * 16 + index] = fault_code
+                    fault_masks[fault_code] = fault_masks.get(fault_code, 0) | (1 << (i * 16 + index))
+            self._fault_bits.append(register_bits)
+
+        # (faults, faults which they mask) as combined masks
+        self._compiled_masks: list[tuple[int, int]] = [
+            (fault_masks[fault], sum(fault_masks[mask] for mask in set(masks))) for fault, masks in self.masks.items()
+        ]
+
+        # Register values -> decoded faults
+        self._decode_cache: dict[NodeInputs, str] = {}
+
+    def decode(self, values: NodeInputs) -> str | None:
+        """Decodes the values of the fault registers (one per element of faults) into a description of the faults"""
+        if None in values:
+            return None
+
+        result = self._decode_cache.get(values)
+        if result is None:
+            result = self._decode(values)
+            if len(self._decode_cache) >= _MAX_CACHED_DECODES:
+                self._decode_cache.clear()
+            self._decode_cache[values] = result
+        return result
+
+    def _decode(self, values: NodeInputs) -> str:
+        active = 0
+        for i, value in enumerate(values):
+            assert value is not None
+            active |= (value & self._fault_bits[i]) << (i * 16)
+
+        to_remove = 0
+        for fault_mask, masked in self._compiled_masks:
+            if active & fault_mask:
+                to_remove |= masked
+        active &= ~to_remove
+
+        if active == 0:
+            return "None"
+
+        # In order of register, then bit
+        faults = []
+        while active:
+            lowest_bit = active & -active
+            faults.append(self._fault_names[lowest_bit.bit_length() - 1])
+            active ^= lowest_bit
+
+        return "; ".join(faults)
+
 
 STANDARD_FAULTS = FaultSet(
     faults=[
@@ -278,36 +342,14 @@ class ModbusFaultSensor(ModbusEntityMixin, SensorEntity):
         self._controller = controller
         self.entity_description = entity_description
         self._addresses = addresses
+        self._faults = controller.dataflow.node(
+            ("faults", entity_description.key, tuple(addresses)), addresses, entity_description.fault_set.decode
+        )
         self.entity_id = self._get_entity_id(Platform.SENSOR)
 
     @property
     def native_value(self) -> str | None:
-        entity_description = cast(ModbusFaultSensorDescription, self.entity_description)
-        fault_set = entity_description.fault_set
-
-        faults = []
-        for i, address in enumerate(self._addresses):
-            value = self._controller.read(address, signed=False)
-            if value is None:
-                return None
-            if value != 0:
-                for index, fault_code in enumerate(fault_set.faults[i]):
-                    if fault_code is not None and (value & (1 << index)) > 0:
-                        faults.append(fault_code)
-
-        if len(faults) == 0:
-            return "None"
-
-        to_remove: set[str] = set()
-        for fault in faults:
-            masks = fault_set.masks.get(fault, [])
-            for mask in masks:
-                if mask in faults:
-                    to_remove.add(mask)
-        for fault_to_remove in to_remove:
-            faults.remove(fault_to_remove)
-
-        return "; ".join(faults)
+        return self._faults.value
 
     @property
     def addresses(self) -> list[int]:
@@ -1,15 +1,21 @@
 """Sensor"""
 
 import logging
+import time
 from dataclasses import dataclass
 from datetime import timedelta
 from typing import Any
 from typing import cast
 
+from homeassistant.components.integration.const import METHOD_LEFT
+from homeassistant.components.integration.const import METHOD_RIGHT
 from homeassistant.components.integration.sensor import DEFAULT_ROUND
+from homeassistant.components.integration.sensor import UNIT_TIME
 from homeassistant.components.integration.sensor import IntegrationSensor
+from homeassistant.components.sensor import RestoreSensor
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor import SensorEntityDescription
+from homeassistant.components.sensor import SensorStateClass
 from homeassistant.const import Platform
 from homeassistant.const import UnitOfTime
 from homeassistant.helpers.entity import Entity
@@ -22,11 +28,17 @@ from .entity_factory import EntityFactory
 from .inverter_model_spec import EntitySpec
 from .modbus_entity_mixin import ModbusEntityMixin
 from .modbus_entity_mixin import get_entity_id
+from .modbus_sensor import ModbusSensor
 
 _LOGGER = logging.getLogger(__name__)
 
 MAX_SUB_INTERVAL = timedelta(minutes=1)  # Default used by integration sensor config
 
+# When sampling in the controller: don't integrate across gaps between samples longer than this, e.g. because polls
+# failed. Writes of the state are limited to one per interval
+_MAX_SAMPLE_GAP = timedelta(minutes=5)
+_PUBLISH_INTERVAL = timedelta(minutes=1)
+
 
 @dataclass(kw_only=True, **ENTITY_DESCRIPTION_KWARGS)
 class ModbusIntegrationSensorDescription(SensorEntityDescription, EntityFactory):  # type: ignore[misc]
@@ -37,6 +49,9 @@ class ModbusIntegrationSensorDescription(SensorEntityDescription, EntityFactory)
     round_digits: int | None = None
     source_entity: str
     unit_time: UnitOfTime
+    # If set, the source is sampled each time the controller polls (using its value before rounding), rather than each
+    # time its state changes
+    sample_in_controller: bool = False
 
     @property
     def entity_type(self) -> type[Entity]:
@@ -53,6 +68,16 @@ class ModbusIntegrationSensorDescription(SensorEntityDescription, EntityFactory)
 
         source_entity = get_entity_id(controller, Platform.SENSOR, self.source_entity)
 
+        if self.sample_in_controller:
+            return ModbusPollIntegrationSensor(
+                controller=controller,
+                entity_description=self,
+                integration_method=self.integration_method,
+                round_digits=self.round_digits,
+                source_entity=source_entity,
+                unit_time=self.unit_time,
+            )
+
         # this piggybacks on the existing factory to create IntegrationSensors
         return ModbusIntegrationSensor(
             controller=controller,
@@ -73,6 +98,7 @@ class ModbusIntegrationSensorDescription(SensorEntityDescription, EntityFactory)
             "key": self.key,
             "name": self.name,
             "method": self.integration_method,
+            "sample_in_controller": self.sample_in_controller,
             "source": self.source_entity,
             "unit_time": self.unit_time,
         }
@@ -117,3 +143,100 @@ class ModbusIntegrationSensor(ModbusEntityMixin, IntegrationSensor):
     @property
     def addresses(self) -> list[int]:
         return []
+
+
+class ModbusPollIntegrationSensor(ModbusEntityMixin, RestoreSensor):
+    """
+    Integrates the value of a source sensor, sampling it each time the controller polls.
+
+    Unlike IntegrationSensor, this sees the source's value before it's rounded, and only writes its own state
+    periodically.
+    """
+
+    _attr_state_class = SensorStateClass.TOTAL
+
+    def __init__(
+        self,
+        controller: EntityController,
+        entity_description: ModbusIntegrationSensorDescription,
+        integration_method: str,
+        round_digits: int | None,
+        source_entity: str,
+        unit_time: UnitOfTime,
+    ) -> None:
+        """Initialize the sensor."""
+
+        self._controller = controller
+        self.entity_description = entity_description
+        self._integration_method = integration_method
+        self._round_digits = round_digits if round_digits is not None else DEFAULT_ROUND
+        self._source_entity = source_entity
+        self._unit_time_secs = UNIT_TIME[unit_time]
+        self._total = 0.0
+        # (monotonic time, value) of the previous sample, or None if the next sample can't be integrated from it
+        self._last_sample: tuple[float, float] | None = None
+        self._last_published_at: float | None = None
+        self.entity_id = self._get_entity_id(Platform.SENSOR)
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the total, before we start receiving samples."""
+        last_sensor_data = await self.async_get_last_sensor_data()
+        if last_sensor_data is not None and last_sensor_data.native_value is not None:
+            try:
+                self._total = float(str(last_sensor_data.native_value))
+                self._attr_native_value = round(self._total, self._round_digits)
+            except ValueError:
+                _LOGGER.warning("Unable to restore %s from '%s'", self.entity_id, last_sensor_data.native_value)
+
+        await super().async_added_to_hass()
+        # Sample once per poll. Entity updates also happen after writes, which would give uneven samples
+        self.async_on_remove(self._controller.add_poll_complete_listener(self._sample))
+
+    @property
+    def source_entity_ids(self) -> list[str]:
+        return [self._source_entity]
+
+    def update_callback(self, _changed_addresses: set[int]) -> None:
+        # We sample in _sample, after each poll
+        pass
+
+    def _sample(self) -> None:
+        source = self._controller.get_modbus_entity(self._source_entity)
+        if isinstance(source, ModbusSensor):
+            value = source.raw_native_value
+        elif isinstance(source, SensorEntity):
+            value = source.native_value
+        else:
+            value = None
+
+        now = time.monotonic()
+        if not isinstance(value, int | float) or isinstance(value, bool):
+            self._last_sample = None
+            return
+
+        if self._last_sample is not None:
+            last_time, last_value = self._last_sample
+            elapsed = now - last_time
+            if elapsed <= _MAX_SAMPLE_GAP.total_seconds():
+                if self._integration_method == METHOD_LEFT:
+                    area = last_value * elapsed
+                elif self._integration_method == METHOD_RIGHT:
+                    area = value * elapsed
+                else:
+                    area = (last_value + value) / 2 * elapsed
+                self._total += area / self._unit_time_secs
+        self._last_sample = (now, value)
+
+        self._attr_native_value = round(self._total, self._round_digits)
+        if self._last_published_at is None or now - self._last_published_at >= _PUBLISH_INTERVAL.total_seconds():
+            self._last_published_at = now
+            self._write_state()
+
+    def is_connected_changed_callback(self) -> None:
+        # Don't integrate across the time that we were disconnected
+        self._last_sample = None
+        super().is_connected_changed_callback()
+
+    @property
+    def addresses(self) -> list[int]:
+        return []
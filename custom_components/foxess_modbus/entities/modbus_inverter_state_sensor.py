@@ -92,6 +92,9 @@ class ModbusInverterStateSensor(ModbusEntityMixin, SensorEntity):
 
     @property
     def native_value(self) -> str | None:
+        return self._cached_value(self._calculate_native_value)
+
+    def _calculate_native_value(self) -> str | None:
         entity_description = cast(ModbusInverterStateSensorDescription, self.entity_description)
         value = self._controller.read(self._address, signed=False)
         if value is None or value >= len(entity_description.states):
@@ -157,6 +160,9 @@ class ModbusG2InverterStateSensor(ModbusEntityMixin, SensorEntity):
 
     @property
     def native_value(self) -> str | None:
+        return self._cached_value(self._calculate_native_value)
+
+    def _calculate_native_value(self) -> str | None:
         # Bit 0: Standby, 2: Operation, 6: Fault
         status1 = self._controller.read(self._addresses[0], signed=False)
         # Bit 0: On-Grid/Off-grid (0/1)
@@ -8,10 +8,7 @@ from typing import Callable
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor import SensorEntityDescription
 from homeassistant.const import Platform
-from homeassistant.core import Event
-from homeassistant.core import EventStateChangedData
 from homeassistant.helpers.entity import Entity
-from homeassistant.helpers.event import async_track_state_change_event
 
 from ..common.entity_controller import EntityController
 from ..common.types import Inv
@@ -87,38 +84,35 @@ class ModbusLambdaSensor(ModbusEntityMixin, SensorEntity):
     async def async_added_to_hass(self) -> None:
         """Add update callback after being added to hass."""
         await super().async_added_to_hass()
-
-        self.async_on_remove(async_track_state_change_event(self.hass, self._source_entity_ids, self._handle_event))
-
         self._update_value()
 
-    def _handle_event(self, _event: Event[EventStateChangedData]) -> None:
+    @property
+    def source_entity_ids(self) -> list[str]:
+        return self._source_entity_ids
+
+    def update_callback(self, _changed_addresses: set[int]) -> None:
+        # The controller notifies us once per poll, after all of our sources have updated
         self._update_value()
 
     def _update_value(self) -> None:
         inputs = []
         new_value = None
         success = True
-        # If all source sensors are unknown/unavailable, return unknown.
+        # If all source sensors are unknown, return unknown.
         # However we might be operating on a number of inputs and the user might have disabled some
         # (e.g. we sum PV1-PV4 and the user disabled PV4), so if any input is disabled (provided we have
         # at least one enabled input), we'll keep going.
-        # However, if any input isn't a float, or is unknown/unavailable, we'll abort.
-        for source in self._source_entity_ids:
-            state = self.hass.states.get(source)
-            if state is None:
+        # However, if any input isn't a number, or is unknown, we'll abort.
+        for source_entity_id in self._source_entity_ids:
+            source = self._controller.get_modbus_entity(source_entity_id)
+            if source is None:
                 # Disabled
                 continue
-            str_value = state.state
-            if str_value is None or str_value == "unknown" or str_value == "unavailable":
-                success = False
-                break
-            try:
-                float_value = float(str_value)
-                inputs.append(float_value)
-            except ValueError:
+            value = source.native_value if isinstance(source, SensorEntity) else None
+            if not isinstance(value, int | float) or isinstance(value, bool):
                 success = False
                 break
+            inputs.append(float(value))
 
         if success and len(inputs) > 0:
             new_value = self._method(inputs)
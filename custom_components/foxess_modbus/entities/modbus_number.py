@@ -80,6 +80,9 @@ class ModbusNumber(ModbusEntityMixin, NumberEntity):
 
     @property
     def native_value(self) -> int | float | None:
+        return self._cached_value(self._calculate_native_value)
+
+    def _calculate_native_value(self) -> int | float | None:
         """Return the value reported by the sensor."""
         entity_description = cast(ModbusNumberDescription, self.entity_description)
         value: float | int | None = self._controller.read(self._address, signed=False)
@@ -77,6 +77,9 @@ class ModbusSelect(ModbusEntityMixin, SelectEntity):
 
     @property
     def current_option(self) -> str | None:
+        return self._cached_value(self._calculate_current_option)
+
+    def _calculate_current_option(self) -> str | None:
         entity_description = cast(ModbusSelectDescription, self.entity_description)
         value = self._controller.read(self._address, signed=False)
         if value is None:
@@ -1,7 +1,6 @@
 """Sensor"""
 
 import logging
-from collections import deque
 from dataclasses import dataclass
 from dataclasses import field
 from datetime import date
@@ -18,6 +17,7 @@ from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.typing import StateType
 
 from ..common.entity_controller import EntityController
+from ..common.moving_average import MovingAverage
 from ..common.types import Inv
 from ..common.types import RegisterType
 from ..const import ROUND_SENSOR_VALUES
@@ -26,9 +26,14 @@ from .entity_factory import ENTITY_DESCRIPTION_KWARGS
 from .entity_factory import EntityFactory
 from .inverter_model_spec import ModbusAddressesSpec
 from .modbus_entity_mixin import ModbusEntityMixin
+from .publish_policy import PublishPolicy
+from .publish_policy import PublishThrottle
 
 _LOGGER = logging.getLogger(__name__)
 
+# Number of samples averaged when rounding sensor values
+_MOVING_AVERAGE_SIZE = 6
+
 
 @dataclass(kw_only=True, **ENTITY_DESCRIPTION_KWARGS)
 class ModbusSensorDescription(SensorEntityDescription, EntityFactory):  # type: ignore[misc]
@@ -52,8 +57,11 @@ class ModbusSensorDescription(SensorEntityDescription, EntityFactory):  # type:
         register_type: RegisterType,
     ) -> Entity | None:
         addresses = self._addresses_for_inverter_model(self.addresses, inverter_model, register_type)
+        if addresses is None:
+            return None
         round_to = self.round_to if controller.inverter_details.get(ROUND_SENSOR_VALUES, False) else None
-        return ModbusSensor(controller, self, addresses, round_to) if addresses is not None else None
+        publish_policy = PublishPolicy.from_options(controller.inverter_details, self.round_to)
+        return ModbusSensor(controller, self, addresses, round_to, publish_policy)
 
     def serialize(self, inverter_model: Inv, register_type: RegisterType) -> dict[str, Any] | None:
         addresses = self._addresses_for_inverter_model(self.addresses, inverter_model, register_type)
@@ -81,6 +89,7 @@ class ModbusSensor(ModbusEntityMixin, SensorEntity):
         # (usually high address, low address)
         addresses: list[int],
         round_to: float | None,
+        publish_policy: PublishPolicy | None = None,
     ) -> None:
         """Initialize the sensor."""
 
@@ -88,7 +97,9 @@ class ModbusSensor(ModbusEntityMixin, SensorEntity):
         self.entity_description = entity_description
         self._addresses = addresses
         self._round_to = round_to
-        self._moving_average_filter: deque[float] | None = deque(maxlen=6) if round_to is not None else None
+        self._moving_average_filter = MovingAverage(_MOVING_AVERAGE_SIZE) if round_to is not None else None
+        self._raw_native_value: int | float | None = None
+        self._publish_throttle = PublishThrottle(publish_policy) if publish_policy is not None else None
         self.entity_id = self._get_entity_id(Platform.SENSOR)
 
     def _calculate_native_value(self) -> int | float | None:
@@ -133,42 +144,49 @@ class ModbusSensor(ModbusEntityMixin, SensorEntity):
 
         if self._round_to is not None:
             assert self._moving_average_filter is not None
-            assert self._moving_average_filter.maxlen is not None
 
             if value is None or not isinstance(value, float):
                 self._moving_average_filter.clear()
             else:
-                self._moving_average_filter.append(value)
-                # If it's empty, fill it
-                while len(self._moving_average_filter) < self._moving_average_filter.maxlen:
-                    self._moving_average_filter.append(value)
-                average_value = sum(self._moving_average_filter) / len(self._moving_average_filter)
+                # If it's empty, this fills it
+                self._moving_average_filter.add(value)
+                average_value = self._moving_average_filter.average
 
                 if self._attr_native_value is None or not isinstance(self._attr_native_value, float):
                     value = nearest_multiple(value, self._round_to)
                 else:
                     if abs(self._attr_native_value - average_value) >= self._round_to:
                         value = nearest_multiple(value, self._round_to)
-                        for _ in range(self._moving_average_filter.maxlen):
-                            self._moving_average_filter.append(value)
+                        self._moving_average_filter.fill(value)
                     else:
                         value = self._attr_native_value
 
         return value
 
     def update_callback(self, changed_addresses: set[int]) -> None:
-        # If we're using rounding and a filter, we need to respond to every update, even if the register hasn't changed
-        if self._round_to is None:
+        # If we're using rounding and a filter, or limiting how often we publish, we need to respond to every update,
+        # even if the register hasn't changed
+        if self._round_to is None and self._publish_throttle is None:
             super().update_callback(changed_addresses)
         else:
             self._address_updated()
 
     def _address_updated(self) -> None:
-        new_value = self._round_native_value(self._calculate_native_value())
-        if new_value != self._attr_native_value:
+        self._raw_native_value = self._calculate_native_value()
+        new_value = self._round_native_value(self._raw_native_value)
+        if self._publish_throttle is not None:
+            should_publish = self._publish_throttle.should_publish(new_value, self._attr_native_value)
+        else:
+            should_publish = new_value != self._attr_native_value
+        if should_publish:
             self._attr_native_value = new_value
             super()._address_updated()
 
+    @property
+    def raw_native_value(self) -> int | float | None:
+        """The most recently read value, before any rounding or filtering"""
+        return self._raw_native_value
+
     @property
     def addresses(self) -> list[int]:
         return self._addresses
@@ -67,6 +67,9 @@ class ModbusVersionSensor(ModbusEntityMixin, SensorEntity):
 
     @property
     def native_value(self) -> str | None:
+        return self._cached_value(self._calculate_native_value)
+
+    def _calculate_native_value(self) -> str | None:
         entity_description = cast(ModbusVersionSensorDescription, self.entity_description)
         value = self._controller.read(self._address, signed=False)
         if value is None:
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntityDescription
+from homeassistant.components.sensor import SensorStateClass
+from homeassistant.const import EntityCategory
+from homeassistant.const import Platform
+from homeassistant.const import UnitOfInformation
+from homeassistant.const import UnitOfTime
+
+from ..common.entity_controller import EntityController
+from .entity_factory import ENTITY_DESCRIPTION_KWARGS
+from .modbus_entity_mixin import ModbusEntityMixin
+
+
+@dataclass(kw_only=True, **ENTITY_DESCRIPTION_KWARGS)
+class PollMetricsSensorDescription(SensorEntityDescription):  # type: ignore[misc]
+    """Description for PollMetricsSensor"""
+
+    value_fn: Callable[[EntityController], float | int]
+
+
+POLL_METRICS_SENSORS = [
+    PollMetricsSensorDescription(
+        key="poll_duration",
+        name="Poll Duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda c: c.poll_metrics.poll_duration.last * 1000,
+    ),
+    PollMetricsSensorDescription(
+        key="poll_read_latency",
+        name="Poll Read Latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda c: c.poll_metrics.range_latency.mean * 1000,
+    ),
+    PollMetricsSensorDescription(
+        key="poll_failures",
+        name="Poll Failures",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.poll_metrics.num_failed_polls,
+    ),
+    PollMetricsSensorDescription(
+        key="modbus_executor_wait",
+        name="Modbus Executor Wait",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda c: c.client_metrics.executor_wait.mean * 1000,
+    ),
+    PollMetricsSensorDescription(
+        key="modbus_retries",
+        name="Modbus Retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.client_metrics.num_retries,
+    ),
+    PollMetricsSensorDescription(
+        key="modbus_timeouts",
+        name="Modbus Timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.client_metrics.num_timeouts,
+    ),
+    PollMetricsSensorDescription(
+        key="modbus_bytes_sent",
+        name="Modbus Bytes Sent",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.client_metrics.bytes_sent,
+    ),
+    PollMetricsSensorDescription(
+        key="modbus_bytes_received",
+        name="Modbus Bytes Received",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.client_metrics.bytes_received,
+    ),
+]
+
+
+class PollMetricsSensor(ModbusEntityMixin, SensorEntity):
+    """Diagnostic sensor exposing one of the controller's poll metrics"""
+
+    def __init__(
+        self,
+        controller: EntityController,
+        entity_description: PollMetricsSensorDescription,
+    ) -> None:
+        self.entity_description = entity_description
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        # These update on every poll, so don't fill up the recorder unless they're asked for
+        self._attr_entity_registry_enabled_default = False
+        self._controller = controller
+        self.entity_id = self._get_entity_id(Platform.SENSOR)
+
+    @property
+    def native_value(self) -> float | int:
+        return self.entity_description.value_fn(self._controller)  # type: ignore[attr-defined, no-any-return]
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def addresses(self) -> list[int]:
+        return []
+
+    def update_callback(self, _changed_addresses: set[int]) -> None:
+        # The metrics change on every poll, regardless of which addresses were read
+        self.schedule_update_ha_state()
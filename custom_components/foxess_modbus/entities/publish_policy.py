@@ -0,0 +1,90 @@
+"""Limits how often entities write their state to Home Assistant"""
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from ..const import PUBLISH_DEADBAND
+from ..const import PUBLISH_HEARTBEAT
+from ..const import PUBLISH_MIN_INTERVAL
+
+
+@dataclass(frozen=True)
+class PublishPolicy:
+    """When an entity should write a new value to its state"""
+
+    # Don't write changes more often than this (seconds)
+    min_interval: float | None = None
+    # Ignore changes smaller than this (in the entity's units)
+    absolute_deadband: float | None = None
+    # Ignore changes smaller than this fraction of the current state
+    relative_deadband: float | None = None
+    # Write the current value at least this often, even if it's within the deadband (seconds)
+    heartbeat: float | None = None
+
+    @staticmethod
+    def from_options(inverter_details: dict[str, Any], absolute_deadband: float | None) -> "PublishPolicy | None":
+        """
+        Creates the policy configured by the user for an inverter, or None if they haven't configured one.
+
+        :param absolute_deadband: The resolution of the entity's values. Only used if a deadband is configured.
+        """
+        min_interval = inverter_details.get(PUBLISH_MIN_INTERVAL)
+        relative_deadband = inverter_details.get(PUBLISH_DEADBAND)
+        heartbeat = inverter_details.get(PUBLISH_HEARTBEAT)
+        if min_interval is None and relative_deadband is None and heartbeat is None:
+            return None
+
+        return PublishPolicy(
+            min_interval=min_interval,
+            absolute_deadband=absolute_deadband if relative_deadband is not None else None,
+            relative_deadband=relative_deadband / 100 if relative_deadband is not None else None,
+            heartbeat=heartbeat,
+        )
+
+
+class PublishThrottle:
+    """Applies a PublishPolicy to the values computed by an entity"""
+
+    def __init__(self, policy: PublishPolicy) -> None:
+        self._policy = policy
+        self._last_published_at: float | None = None
+
+    def should_publish(self, value: Any, published_value: Any) -> bool:
+        """
+        Decides whether value should replace published_value, which is the entity's current state.
+
+        This should be called after every poll, as suppressed changes are only written when it's next called.
+        """
+
+        now = time.monotonic()
+        if self._last_published_at is not None and not self._should_publish(value, published_value, now):
+            return False
+
+        self._last_published_at = now
+        return True
+
+    def _should_publish(self, value: Any, published_value: Any, now: float) -> bool:
+        policy = self._policy
+        assert self._last_published_at is not None
+        elapsed = now - self._last_published_at
+
+        if policy.heartbeat is not None and elapsed >= policy.heartbeat:
+            return True
+        if value == published_value:
+            return False
+        # Always publish changes to and from unknown straight away
+        if not _is_number(value) or not _is_number(published_value):
+            return True
+        if policy.min_interval is not None and elapsed < policy.min_interval:
+            return False
+
+        threshold = max(
+            policy.absolute_deadband or 0.0,
+            (policy.relative_deadband or 0.0) * abs(published_value),
+        )
+        return bool(abs(value - published_value) >= threshold)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, int | float) and not isinstance(value, bool)
@@ -0,0 +1,93 @@
+"""Sensors which total values across all of the inverters in a config entry"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import cast
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntityDescription
+from homeassistant.components.sensor import SensorStateClass
+from homeassistant.const import UnitOfPower
+from homeassistant.helpers.entity import DeviceInfo
+
+from ..const import DOMAIN
+from .entity_factory import ENTITY_DESCRIPTION_KWARGS
+
+if TYPE_CHECKING:
+    from ..site_aggregator import SiteAggregator
+
+
+@dataclass(kw_only=True, **ENTITY_DESCRIPTION_KWARGS)
+class SiteTotalSensorDescription(SensorEntityDescription):  # type: ignore[misc]
+    """Description for SiteTotalSensor"""
+
+    # Key of the sensor on each inverter to sum
+    source: str
+
+
+def _power_total(key: str, name: str, icon: str | None = None) -> SiteTotalSensorDescription:
+    return SiteTotalSensorDescription(
+        key=key,
+        name=name,
+        source=key,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        suggested_display_precision=2,
+        icon=icon,
+    )
+
+
+SITE_TOTAL_SENSORS = [
+    _power_total("pv_power_now", "PV Power", "mdi:solar-power-variant-outline"),
+    _power_total("load_power", "Load Power"),
+    _power_total("battery_charge", "Battery Charge", "mdi:battery-arrow-up-outline"),
+    _power_total("battery_discharge", "Battery Discharge", "mdi:battery-arrow-down-outline"),
+    _power_total("feed_in", "Feed-in"),
+    _power_total("grid_consumption", "Grid Consumption"),
+]
+
+
+class SiteTotalSensor(SensorEntity):
+    """Total of one sensor across all of the inverters in a config entry. Updated by the SiteAggregator"""
+
+    _attr_should_poll = False
+    # This changes on every update, so there's no point recording it
+    _unrecorded_attributes = frozenset({"sampled_at"})
+
+    def __init__(self, aggregator: "SiteAggregator", entity_description: SiteTotalSensorDescription) -> None:
+        self._aggregator = aggregator
+        self.entity_description = entity_description
+        self._attr_unique_id = f"foxess_modbus_site_{aggregator.entry_id}_{entity_description.key}"
+        self._attr_name = f"Site {entity_description.name}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"site_{aggregator.entry_id}")},
+            name="FoxESS - Modbus Site",
+            manufacturer="FoxESS",
+        )
+
+    @property
+    def available(self) -> bool:
+        entity_description = cast(SiteTotalSensorDescription, self.entity_description)
+        return self._aggregator.is_available(entity_description.source)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        sampled_at = self._aggregator.sampled_at
+        return {"sampled_at": sampled_at.isoformat()} if sampled_at is not None else None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._aggregator.add_entity(self)
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._aggregator.remove_entity(self)
+        await super().async_will_remove_from_hass()
+
+    def totals_updated(self) -> None:
+        """Called by the aggregator when it publishes a new set of totals"""
+        entity_description = cast(SiteTotalSensorDescription, self.entity_description)
+        self._attr_native_value = self._aggregator.total(entity_description.source)
+        self.schedule_update_ha_state()
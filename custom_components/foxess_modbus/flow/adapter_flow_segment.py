@@ -1,4 +1,9 @@
+import asyncio
+import dataclasses
+import ipaddress
+import logging
 import re
+import time
 from typing import Any
 from typing import Awaitable
 from typing import Callable
@@ -10,6 +15,7 @@ from homeassistant.helpers.selector import selector
 
 from ..client.modbus_client import ModbusClient
 from ..client.modbus_client import ModbusClientFailedError
+from ..client.modbus_client import async_load_protocol
 from ..common.exceptions import AutoconnectFailedError
 from ..common.exceptions import UnsupportedInverterError
 from ..common.types import ConnectionType
@@ -27,9 +33,40 @@ from .flow_handler_mixin import FlowHandlerMixin
 from .flow_handler_mixin import ValidationFailedError
 from .inverter_data import InverterData
 
+_LOGGER = logging.getLogger(__name__)
+
 _DEFAULT_PORT = 502
 _DEFAULT_SLAVE = 247
 
+# How many connections to probe at the same time when scanning for inverters
+_DISCOVERY_CONCURRENCY = 8
+# How long to spend probing each slave ID on each connection
+_DISCOVERY_TIMEOUT_SECS = 3
+_MAX_DISCOVERY_CONNECTIONS = 256
+
+
+def _client_params(protocol: str, host: str) -> dict[str, Any]:
+    if protocol in [TCP, UDP, RTU_OVER_TCP]:
+        return {"host": host.split(":")[0], "port": int(host.split(":")[1])}
+    if protocol == SERIAL:
+        return {"port": host, "baudrate": 9600}
+    raise AssertionError()
+
+
+def _parse_number_list(value: str, min_value: int, max_value: int) -> list[int]:
+    """Parses a list of numbers and ranges, e.g. '1-5, 247'"""
+    result: list[int] = []
+    for part in re.split(r"[,\s]+", value.strip()):
+        if not part:
+            continue
+        match = re.fullmatch(r"(\d+)(?:-(\d+))?", part)
+        if match is None or not (min_value <= int(match[1]) <= int(match[2] or match[1]) <= max_value):
+            raise ValidationFailedError({"base": "invalid_discovery_list"}, error_placeholders={"value": part})
+        result.extend(range(int(match[1]), int(match[2] or match[1]) + 1))
+    if len(result) == 0:
+        raise ValidationFailedError({"base": "invalid_discovery_list"}, error_placeholders={"value": value})
+    return list(dict.fromkeys(result))
+
 
 class AdapterFlowSegment:
     def __init__(
@@ -38,18 +75,30 @@ class AdapterFlowSegment:
         inverter_data: InverterData,
         other_inverters: list[InverterData],
         on_complete: Callable[[], Awaitable[ConfigFlowResult]],
+        *,
+        allow_discovery: bool = False,
     ) -> None:
         self._flow = flow
         self._on_complete = on_complete
+        self._allow_discovery = allow_discovery
 
         self.inverter_data = inverter_data
         self._other_inverters = other_inverters
 
+        # If the user scanned for inverters and chose more than one, inverter_data holds the first and this the rest
+        self.additional_inverters: list[InverterData] = []
+        self._discovered_inverters: list[InverterData] = []
+
         self._adapter_type_to_step = {
             InverterAdapterType.DIRECT: self.async_step_tcp_adapter,
             InverterAdapterType.SERIAL: self.async_step_serial_adapter,
             InverterAdapterType.NETWORK: self.async_step_tcp_adapter,
         }
+        self._adapter_type_to_step_id = {
+            InverterAdapterType.DIRECT: "tcp_adapter",
+            InverterAdapterType.SERIAL: "serial_adapter",
+            InverterAdapterType.NETWORK: "tcp_adapter",
+        }
 
     async def async_step_select_adapter_type(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Let the user select their adapter type"""
@@ -63,7 +112,7 @@ class AdapterFlowSegment:
             assert len(adapters) > 0
             if len(adapters) == 1:
                 self.inverter_data.adapter = adapters[0]
-                return await self._adapter_type_to_step[adapter_type]()
+                return await self._async_step_connection_details()
 
             return await self.async_step_select_adapter_model()
 
@@ -92,8 +141,7 @@ class AdapterFlowSegment:
 
         async def body(user_input: dict[str, Any]) -> ConfigFlowResult:
             self.inverter_data.adapter = ADAPTERS[user_input["adapter_model"]]
-            assert self.inverter_data.adapter_type is not None
-            return await self._adapter_type_to_step[self.inverter_data.adapter_type]()
+            return await self._async_step_connection_details()
 
         adapters = [x for x in ADAPTERS.values() if x.adapter_type == self.inverter_data.adapter_type]
 
@@ -122,6 +170,18 @@ class AdapterFlowSegment:
             suggested_values=suggested_values,
         )
 
+    async def _async_step_connection_details(self) -> ConfigFlowResult:
+        """Move on to letting the user enter their connection details, or scan for inverters if that's allowed"""
+
+        assert self.inverter_data.adapter_type is not None
+        if not self._allow_discovery:
+            return await self._adapter_type_to_step[self.inverter_data.adapter_type]()
+
+        return self._flow.async_show_menu(
+            step_id="select_connection_method",
+            menu_options=[self._adapter_type_to_step_id[self.inverter_data.adapter_type], "discover"],
+        )
+
     async def async_step_tcp_adapter(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Let the user enter connection details for their TCP/UDP/RTU_OVER_TCP adapter"""
 
@@ -129,11 +189,7 @@ class AdapterFlowSegment:
 
         async def body(user_input: dict[str, Any]) -> ConfigFlowResult:
             assert adapter is not None
-            assert adapter.network_protocols is not None
-            protocol = user_input.get(
-                "protocol",
-                user_input.get("protocol_with_recommendation", adapter.network_protocols[0]),
-            )
+            protocol = self._get_protocol(adapter, user_input)
             host = user_input.get("adapter_host", user_input.get("lan_connection_host"))
             self._validate_hostname(host)
             assert host is not None
@@ -149,22 +205,7 @@ class AdapterFlowSegment:
         schema_parts: dict[Any, Any] = {}
         description_placeholders = {"setup_link": adapter.setup_link}
 
-        if len(adapter.network_protocols) > 1:
-            # Prompt for TCP vs UDP if that's relevant
-            # If we provide a recommendation, show that
-            if adapter.recommended_protocol is not None:
-                key = "protocol_with_recommendation"
-                description_placeholders["recommended_protocol"] = adapter.recommended_protocol
-            else:
-                key = "protocol"
-            schema_parts[vol.Required(key)] = selector(
-                {
-                    "select": {
-                        "options": adapter.network_protocols,
-                        "translation_key": "network_protocols",
-                    }
-                }
-            )
+        self._add_protocol_selector(adapter, schema_parts, description_placeholders)
 
         if adapter.connection_type == ConnectionType.AUX:
             schema_parts[vol.Required("adapter_host")] = cv.string
@@ -250,6 +291,213 @@ class AdapterFlowSegment:
             description_placeholders=description_placeholders,
         )
 
+    async def async_step_discover(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Let the user enter lists of addresses and slave IDs to scan for inverters"""
+
+        adapter = self.inverter_data.adapter
+
+        async def body(user_input: dict[str, Any]) -> ConfigFlowResult:
+            assert adapter is not None
+            slaves = _parse_number_list(user_input["modbus_slaves"], 1, 247)
+            if adapter.adapter_type == InverterAdapterType.SERIAL:
+                protocol = SERIAL
+                hosts = [x for x in re.split(r"[,\s]+", user_input["serial_devices"]) if x]
+            else:
+                protocol = self._get_protocol(adapter, user_input)
+                ports = _parse_number_list(user_input.get("adapter_ports", str(_DEFAULT_PORT)), 1, 65535)
+                hosts = [
+                    f"{host}:{port}" for host in self._parse_hosts(user_input["discovery_hosts"]) for port in ports
+                ]
+
+            if len(hosts) > _MAX_DISCOVERY_CONNECTIONS:
+                raise ValidationFailedError(
+                    {"base": "too_many_discovery_connections"},
+                    error_placeholders={"max_connections": str(_MAX_DISCOVERY_CONNECTIONS)},
+                )
+
+            self._discovered_inverters = await self._discover(protocol, hosts, slaves, adapter)
+            if len(self._discovered_inverters) == 0:
+                raise ValidationFailedError({"base": "no_inverters_found"})
+            return await self.async_step_discover_results()
+
+        assert adapter is not None
+
+        schema_parts: dict[Any, Any] = {}
+        description_placeholders = {"setup_link": adapter.setup_link}
+
+        if adapter.adapter_type == InverterAdapterType.SERIAL:
+            schema_parts[vol.Required("serial_devices", default=adapter.default_host)] = cv.string
+        else:
+            self._add_protocol_selector(adapter, schema_parts, description_placeholders)
+            schema_parts[vol.Required("discovery_hosts")] = cv.string
+            # If it's a direct connection we know what the port is
+            if adapter.connection_type == ConnectionType.AUX:
+                schema_parts[vol.Required("adapter_ports", default=str(_DEFAULT_PORT))] = cv.string
+        schema_parts[vol.Required("modbus_slaves", default=str(_DEFAULT_SLAVE))] = cv.string
+
+        return await self._flow.with_default_form(
+            body,
+            user_input,
+            "discover",
+            vol.Schema(schema_parts),
+            description_placeholders=description_placeholders,
+        )
+
+    async def async_step_discover_results(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Let the user choose which of the inverters found by async_step_discover to add"""
+
+        async def body(user_input: dict[str, Any]) -> ConfigFlowResult:
+            selected = [self._discovered_inverters[int(x)] for x in user_input["inverters"]]
+            if len(selected) == 0:
+                raise ValidationFailedError({"base": "no_inverters_selected"})
+
+            # inverter_data is shared with our owner, so update it rather than replacing it
+            first, *self.additional_inverters = selected
+            self.inverter_data.inverter_base_model = first.inverter_base_model
+            self.inverter_data.inverter_model = first.inverter_model
+            self.inverter_data.inverter_protocol = first.inverter_protocol
+            self.inverter_data.modbus_slave = first.modbus_slave
+            self.inverter_data.host = first.host
+            return await self._on_complete()
+
+        options = {str(i): x.connection_label for i, x in enumerate(self._discovered_inverters)}
+        schema = vol.Schema({vol.Required("inverters", default=list(options)): cv.multi_select(options)})
+
+        return await self._flow.with_default_form(
+            body,
+            user_input,
+            "discover_results",
+            schema,
+            description_placeholders={"num_found": str(len(self._discovered_inverters))},
+        )
+
+    async def _discover(
+        self,
+        protocol: str,
+        hosts: list[str],
+        slaves: list[int],
+        adapter: InverterAdapter,
+    ) -> list[InverterData]:
+        """
+        Probes each of the given slaves on each of the given hosts, returning the inverters which were found.
+
+        Hosts are probed concurrently. Slaves on the same host share a connection (and, for serial, a bus), so are
+        probed in turn.
+        """
+
+        await async_load_protocol(self._flow.hass, protocol)
+        semaphore = asyncio.Semaphore(_DISCOVERY_CONCURRENCY)
+        adapter_config = adapter.config.inverter_config(protocol)
+
+        async def probe_host(host: str) -> list[InverterData]:
+            found: list[InverterData] = []
+            async with semaphore:
+                client = ModbusClient(self._flow.hass, protocol, adapter, _client_params(protocol, host))
+                try:
+                    for slave in slaves:
+                        if self._is_duplicate(protocol, host, slave):
+                            continue
+                        try:
+                            base_model, full_model = await ModbusController.autodetect(
+                                client,
+                                slave,
+                                adapter_config,
+                                deadline=time.monotonic() + _DISCOVERY_TIMEOUT_SECS,
+                                log_failure=False,
+                                # Keep the connection open for the next slave, rather than reconnecting each time
+                                close_client=False,
+                            )
+                        except AutoconnectFailedError as ex:
+                            # If we couldn't connect at all, there's no point trying other slaves
+                            if isinstance(ex.__cause__, ConnectionException):
+                                break
+                            continue
+                        found.append(
+                            dataclasses.replace(
+                                self.inverter_data,
+                                inverter_base_model=base_model,
+                                inverter_model=full_model,
+                                inverter_protocol=protocol,
+                                modbus_slave=slave,
+                                host=host,
+                            )
+                        )
+                finally:
+                    await client.close()
+            return found
+
+        started_at = time.monotonic()
+        results = await asyncio.gather(*(probe_host(host) for host in hosts))
+        found = [inverter for result in results for inverter in result]
+        _LOGGER.info(
+            "Discovery: probed %s slave(s) on %s connection(s) in %.1fs, found %s inverter(s)",
+            len(slaves),
+            len(hosts),
+            time.monotonic() - started_at,
+            len(found),
+        )
+        return found
+
+    def _parse_hosts(self, value: str) -> list[str]:
+        """Parses a list of hosts, IP address ranges (e.g. 192.168.1.10-20) and networks (e.g. 192.168.1.0/24)"""
+        hosts: list[str] = []
+        for part in re.split(r"[,\s]+", value.strip()):
+            if not part:
+                continue
+            if "/" in part:
+                try:
+                    hosts.extend(str(x) for x in ipaddress.IPv4Network(part, strict=False).hosts())
+                except ValueError as ex:
+                    raise ValidationFailedError(
+                        {"base": "invalid_hostname"}, error_placeholders={"hostname": part}
+                    ) from ex
+            elif match := re.fullmatch(r"(\d+\.\d+\.\d+\.)(\d+)-(\d+)", part):
+                if not int(match[2]) <= int(match[3]) <= 255:
+                    raise ValidationFailedError({"base": "invalid_hostname"}, error_placeholders={"hostname": part})
+                hosts.extend(f"{match[1]}{i}" for i in range(int(match[2]), int(match[3]) + 1))
+            else:
+                self._validate_hostname(part)
+                hosts.append(part)
+        if len(hosts) == 0:
+            raise ValidationFailedError({"base": "invalid_hostname"}, error_placeholders={"hostname": value})
+        return hosts
+
+    def _add_protocol_selector(
+        self, adapter: InverterAdapter, schema_parts: dict[Any, Any], description_placeholders: dict[str, str]
+    ) -> None:
+        assert adapter.network_protocols is not None
+        if len(adapter.network_protocols) > 1:
+            # Prompt for TCP vs UDP if that's relevant
+            # If we provide a recommendation, show that
+            if adapter.recommended_protocol is not None:
+                key = "protocol_with_recommendation"
+                description_placeholders["recommended_protocol"] = adapter.recommended_protocol
+            else:
+                key = "protocol"
+            schema_parts[vol.Required(key)] = selector(
+                {
+                    "select": {
+                        "options": adapter.network_protocols,
+                        "translation_key": "network_protocols",
+                    }
+                }
+            )
+
+    def _get_protocol(self, adapter: InverterAdapter, user_input: dict[str, Any]) -> str:
+        assert adapter.network_protocols is not None
+        protocol: str = user_input.get(
+            "protocol",
+            user_input.get("protocol_with_recommendation", adapter.network_protocols[0]),
+        )
+        return protocol
+
+    def _is_duplicate(self, protocol: str, host: str, slave: int) -> bool:
+        return any(
+            x
+            for x in self._other_inverters
+            if x.inverter_protocol == protocol and x.host == host and x.modbus_slave == slave
+        )
+
     async def _autodetect_modbus_and_save_to_inverter_data(
         self,
         protocol: str,
@@ -262,20 +510,12 @@ class AdapterFlowSegment:
         self._inverter_data
         """
 
-        if any(
-            x
-            for x in self._other_inverters
-            if x.inverter_protocol == protocol and x.host == host and x.modbus_slave == slave
-        ):
+        if self._is_duplicate(protocol, host, slave):
             raise ValidationFailedError({"base": "duplicate_connection_details"})
 
         try:
-            if protocol in [TCP, UDP, RTU_OVER_TCP]:
-                params = {"host": host.split(":")[0], "port": int(host.split(":")[1])}
-            elif protocol == SERIAL:
-                params = {"port": host, "baudrate": 9600}
-            else:
-                raise AssertionError()
+            params = _client_params(protocol, host)
+            await async_load_protocol(self._flow.hass, protocol)
             client = ModbusClient(self._flow.hass, protocol, adapter, params)
             base_model, full_model = await ModbusController.autodetect(
                 client, slave, adapter.config.inverter_config(protocol)
@@ -44,6 +44,8 @@ class FlowHandler(FlowHandlerMixin, config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize."""
         self._inverter_data = InverterData()
         self._all_inverters: list[InverterData] = []
+        # Other inverters found when the user scanned for inverters, which still need to be named
+        self._pending_inverters: list[InverterData] = []
 
         self._adapter_segment: AdapterFlowSegment | None = None
 
@@ -57,12 +59,14 @@ class FlowHandler(FlowHandlerMixin, config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_select_adapter_type(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         async def adapter_segment_complete() -> ConfigFlowResult:
+            assert self._adapter_segment is not None
+            self._pending_inverters = self._adapter_segment.additional_inverters
             self._adapter_segment = None
             return await self.async_step_friendly_name()
 
         if self._adapter_segment is None:
             self._adapter_segment = AdapterFlowSegment(
-                self, self._inverter_data, self._all_inverters, adapter_segment_complete
+                self, self._inverter_data, self._all_inverters, adapter_segment_complete, allow_discovery=True
             )
         return await self._adapter_segment.async_step_select_adapter_type(user_input)
 
@@ -78,6 +82,14 @@ class FlowHandler(FlowHandlerMixin, config_entries.ConfigFlow, domain=DOMAIN):
         assert self._adapter_segment is not None
         return await self._adapter_segment.async_step_serial_adapter(user_input)
 
+    async def async_step_discover(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        assert self._adapter_segment is not None
+        return await self._adapter_segment.async_step_discover(user_input)
+
+    async def async_step_discover_results(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        assert self._adapter_segment is not None
+        return await self._adapter_segment.async_step_discover_results(user_input)
+
     async def async_step_friendly_name(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Let the user enter a friendly name for their inverter"""
 
@@ -146,6 +158,10 @@ class FlowHandler(FlowHandlerMixin, config_entries.ConfigFlow, domain=DOMAIN):
                 self._inverter_data.unique_id_prefix = friendly_name
                 self._inverter_data.friendly_name = friendly_name
                 self._all_inverters.append(self._inverter_data)
+                # If they chose several inverters when scanning, name each of them in turn
+                if self._pending_inverters:
+                    self._inverter_data = self._pending_inverters.pop(0)
+                    return await self.async_step_friendly_name()
                 self._inverter_data = InverterData()
                 return await self.async_step_add_another_inverter()
 
@@ -161,6 +177,7 @@ class FlowHandler(FlowHandlerMixin, config_entries.ConfigFlow, domain=DOMAIN):
             step_id="friendly_name",
             data_schema=schema_with_input,
             errors=errors,
+            description_placeholders={"inverter": self._inverter_data.connection_label},
         )
 
     async def async_step_add_another_inverter(self, _user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
@@ -18,3 +18,8 @@ class InverterData:
     entity_id_prefix: str | None = None
     unique_id_prefix: str | None = None
     friendly_name: str | None = None
+
+    @property
+    def connection_label(self) -> str:
+        """Describes the inverter and how we connect to it, e.g. 'H1-5.0-E - 192.168.0.10:502 (247)'"""
+        return f"{self.inverter_model} - {self.host} ({self.modbus_slave})"
@@ -6,19 +6,33 @@ from homeassistant import config_entries
 from homeassistant.config_entries import ConfigFlowResult
 from homeassistant.helpers.selector import selector
 
+from ..common.types import HassData
 from ..const import ADAPTER_ID
 from ..const import CONFIG_ENTRY_TITLE
+from ..const import DOMAIN
+from ..const import HOST
 from ..const import INVERTER_VERSION
 from ..const import INVERTERS
 from ..const import MAX_READ
+from ..const import MODBUS_SLAVE
 from ..const import MODBUS_TYPE
 from ..const import POLL_RATE
+from ..const import PUBLISH_DEADBAND
+from ..const import PUBLISH_HEARTBEAT
+from ..const import PUBLISH_MIN_INTERVAL
+from ..const import READ_COST_MODEL
 from ..const import ROUND_SENSOR_VALUES
+from ..const import VERIFY_WRITES
 from ..inverter_adapters import ADAPTERS
 from ..inverter_profiles import Version
 from ..inverter_profiles import inverter_connection_type_profile_from_config
+from ..max_read_calibration import CalibrationFailedError
+from ..max_read_calibration import CalibrationResult
+from ..max_read_calibration import calibrate_max_read
+from ..modbus_controller import ModbusController
 from .adapter_flow_segment import AdapterFlowSegment
 from .flow_handler_mixin import FlowHandlerMixin
+from .flow_handler_mixin import ValidationFailedError
 
 
 class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
@@ -29,6 +43,7 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
         self._selected_inverter_id: str | None = None
 
         self._adapter_segment: AdapterFlowSegment | None = None
+        self._calibration_result: CalibrationResult | None = None
 
     async def async_step_init(self, _user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Start the config flow"""
@@ -78,6 +93,7 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
         if len(versions) > 1:
             options.append("version_settings")
         options.append("inverter_advanced_options")
+        options.append("calibrate_max_read")
 
         return self.async_show_menu(step_id="inverter_options_category", menu_options=options)
 
@@ -86,8 +102,12 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
             assert self._adapter_segment is not None
             assert self._selected_inverter_id is not None
 
-            _, options, _ = self._config_for_inverter(self._selected_inverter_id)
-            options.update(self._inverter_data_to_dict(self._adapter_segment.inverter_data))
+            _, options, combined_config_options = self._config_for_inverter(self._selected_inverter_id)
+            inverter_config = self._inverter_data_to_dict(self._adapter_segment.inverter_data)
+            # The read cost model was measured through the old adapter, so doesn't apply to a different one
+            if any(inverter_config[key] != combined_config_options.get(key) for key in (ADAPTER_ID, HOST)):
+                options.pop(READ_COST_MODEL, None)
+            options.update(inverter_config)
             self._adapter_segment = None
 
             return self._save_selected_inverter_options(options)
@@ -202,11 +222,25 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
             else:
                 options.pop(ROUND_SENSOR_VALUES, None)
 
+            if user_input.get("verify_writes", False):
+                options[VERIFY_WRITES] = True
+            else:
+                options.pop(VERIFY_WRITES, None)
+
             max_read = user_input.get("max_read")
             if max_read is not None:
                 options[MAX_READ] = max_read
             else:
+                # The read cost model was calibrated along with max_read, so reset both
                 options.pop(MAX_READ, None)
+                options.pop(READ_COST_MODEL, None)
+
+            for key in (PUBLISH_MIN_INTERVAL, PUBLISH_DEADBAND, PUBLISH_HEARTBEAT):
+                value = user_input.get(key)
+                if value is not None:
+                    options[key] = value
+                else:
+                    options.pop(key, None)
 
             return self._save_selected_inverter_options(options)
 
@@ -215,6 +249,9 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
         schema_parts[vol.Required("round_sensor_values", default=options.get(ROUND_SENSOR_VALUES, False))] = selector(
             {"boolean": {}}
         )
+        schema_parts[vol.Required("verify_writes", default=options.get(VERIFY_WRITES, False))] = selector(
+            {"boolean": {}}
+        )
         schema_parts[
             vol.Optional(
                 "poll_rate",
@@ -224,6 +261,13 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
         schema_parts[vol.Optional("max_read", description={"suggested_value": options.get(MAX_READ)})] = vol.Any(
             None, vol.All(int, vol.Range(min=1))
         )
+        for key in (PUBLISH_MIN_INTERVAL, PUBLISH_HEARTBEAT):
+            schema_parts[vol.Optional(key, description={"suggested_value": options.get(key)})] = vol.Any(
+                None, vol.All(int, vol.Range(min=1))
+            )
+        schema_parts[vol.Optional(PUBLISH_DEADBAND, description={"suggested_value": options.get(PUBLISH_DEADBAND)})] = (
+            vol.Any(None, vol.All(vol.Coerce(float), vol.Range(min=0, max=100)))
+        )
 
         schema = vol.Schema(schema_parts)
 
@@ -243,6 +287,79 @@ class OptionsHandler(FlowHandlerMixin, config_entries.OptionsFlow):
             description_placeholders=description_placeholders,
         )
 
+    async def async_step_calibrate_max_read(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Let the user calibrate max_read for the selected inverter"""
+
+        assert self._selected_inverter_id is not None
+
+        _, _, combined_config_options = self._config_for_inverter(self._selected_inverter_id)
+
+        async def body(_user_input: dict[str, Any]) -> ConfigFlowResult:
+            controller = self._find_controller(combined_config_options)
+            if controller is None or not controller.is_connected:
+                raise ValidationFailedError({"base": "inverter_not_connected"})
+            try:
+                self._calibration_result = await calibrate_max_read(controller)
+            except CalibrationFailedError as ex:
+                raise ValidationFailedError({"base": "calibration_failed"}, {"error_details": str(ex)}) from ex
+            return await self.async_step_calibrate_max_read_result()
+
+        description_placeholders = {
+            "inverter": self._create_label_for_inverter(combined_config_options),
+        }
+        return await self.with_default_form(
+            body,
+            user_input,
+            "calibrate_max_read",
+            vol.Schema({}),
+            description_placeholders=description_placeholders,
+        )
+
+    async def async_step_calibrate_max_read_result(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Show the user the result of calibrating max_read, and let them apply it"""
+
+        assert self._selected_inverter_id is not None
+        assert self._calibration_result is not None
+        result = self._calibration_result
+
+        _, options, _ = self._config_for_inverter(self._selected_inverter_id)
+
+        async def body(user_input: dict[str, Any]) -> ConfigFlowResult:
+            if user_input.get("apply", False):
+                result.apply_to_options(options)
+            return self._save_selected_inverter_options(options)
+
+        schema = vol.Schema({vol.Required("apply", default=True): selector({"boolean": {}})})
+
+        description_placeholders = {
+            "max_read": f"{result.max_read}",
+            "round_trip_time": f"{result.cost_model.round_trip_time * 1000:.1f}",
+            "per_register_cost": f"{result.cost_model.per_register_cost * 1000:.2f}",
+            "stop_reason": result.stop_reason,
+        }
+        return await self.with_default_form(
+            body,
+            user_input,
+            "calibrate_max_read_result",
+            schema,
+            description_placeholders=description_placeholders,
+        )
+
+    def _find_controller(self, combined_config_options: dict[str, Any]) -> ModbusController | None:
+        hass_data: HassData = self.hass.data.get(DOMAIN, {})
+        entry_data = hass_data.get(self._config.entry_id)
+        if entry_data is None:
+            return None
+        return next(
+            (
+                controller
+                for controller in entry_data["controllers"]
+                if controller.inverter_details[HOST] == combined_config_options[HOST]
+                and controller.inverter_details[MODBUS_SLAVE] == combined_config_options[MODBUS_SLAVE]
+            ),
+            None,
+        )
+
     def _save_selected_inverter_options(self, inverter_options: dict[str, Any]) -> ConfigFlowResult:
         # We must not mutate any part of self._config.options, otherwise HA thinks we haven't changed the options
         options = copy.deepcopy(dict(self._config.options))
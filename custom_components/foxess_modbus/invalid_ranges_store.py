@@ -0,0 +1,59 @@
+"""Persists the ranges of registers which we've found that inverters can't read"""
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN
+
+_STORAGE_VERSION = 1
+_STORAGE_KEY = f"{DOMAIN}.invalid_registers"
+# Batch up saves, as several inverters might discover invalid registers at startup
+_SAVE_DELAY_SECS = 10
+
+# Key -> list of [start address, count]
+_StoreData = dict[str, list[list[int]]]
+
+_DATA_KEY: HassKey["InvalidRangesStore"] = HassKey(f"{DOMAIN}_invalid_ranges_store")
+
+
+class InvalidRangesStore:
+    """
+    Stores the invalid register ranges detected for each type of inverter, so that we don't need to rediscover them
+    (which takes many round trips) every time we start up
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store = Store[_StoreData](hass, _STORAGE_VERSION, _STORAGE_KEY)
+        self._data: _StoreData = {}
+
+    async def async_load(self) -> None:
+        self._data = await self._store.async_load() or {}
+
+    def get(self, key: str) -> list[tuple[int, int]]:
+        """Gets the stored invalid ranges for the given key, as a list of (start address, count)"""
+        return [(start, count) for start, count in self._data.get(key, [])]
+
+    def set(self, key: str, ranges: list[tuple[int, int]]) -> None:
+        """Sets the invalid ranges for the given key, as a list of (start address, count)"""
+        value = [[start, count] for start, count in ranges]
+        if self._data.get(key, []) == value:
+            return
+
+        if len(value) > 0:
+            self._data[key] = value
+        else:
+            self._data.pop(key, None)
+        self._store.async_delay_save(lambda: self._data, _SAVE_DELAY_SECS)
+
+
+async def async_get_invalid_ranges_store(hass: HomeAssistant) -> InvalidRangesStore:
+    """Gets the InvalidRangesStore, loading it if necessary"""
+    store = hass.data.get(_DATA_KEY)
+    if store is None:
+        store = InvalidRangesStore(hass)
+        await store.async_load()
+        # Something else might have loaded it while we were
+        store = hass.data.setdefault(_DATA_KEY, store)
+    result: InvalidRangesStore = store
+    return result
@@ -1,5 +1,6 @@
 """Defines the different inverter models and connection types"""
 
+import bisect
 import functools
 import logging
 import re
@@ -19,7 +20,7 @@ from .const import INVERTER_BASE
 from .const import INVERTER_CONN
 from .const import INVERTER_VERSION
 from .entities.charge_period_descriptions import CHARGE_PERIODS
-from .entities.entity_descriptions import ENTITIES
+from .entities.entity_descriptions import get_entities
 from .entities.modbus_charge_period_config import ModbusChargePeriodInfo
 from .entities.modbus_remote_control_config import ModbusRemoteControlAddressConfig
 from .entities.remote_control_description import REMOTE_CONTROL_DESCRIPTION
@@ -61,6 +62,29 @@ class Version:
         return f"Version({self.major}, {self.minor})"
 
 
+class _AddressRanges:
+    """Set of inclusive address ranges, merged and sorted so that lookups are O(log n)"""
+
+    def __init__(self, ranges: list[tuple[int, int]]) -> None:
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        for start, end in sorted(ranges):
+            if len(self._ends) > 0 and start <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def overlaps(self, start_address: int, end_address: int) -> bool:
+        """Determines whether the given inclusive address range overlaps any of these ranges"""
+        # The only range which can overlap is the last one which starts at or before end_address
+        i = bisect.bisect_right(self._starts, end_address) - 1
+        return i >= 0 and self._ends[i] >= start_address
+
+    def __contains__(self, address: int) -> bool:
+        return self.overlaps(address, address)
+
+
 class SpecialRegisterConfig:
     def __init__(
         self,
@@ -76,6 +100,17 @@ class SpecialRegisterConfig:
             individual_read_register_ranges = []
         self.individual_read_register_ranges = individual_read_register_ranges
 
+        # These are checked for most addresses when planning reads
+        self._invalid_ranges = _AddressRanges(invalid_register_ranges)
+        self._individual_read_ranges = _AddressRanges(individual_read_register_ranges)
+
+    def overlaps_invalid_range(self, start_address: int, end_address: int) -> bool:
+        """Determines whether the given inclusive address range overlaps any invalid address ranges"""
+        return self._invalid_ranges.overlaps(start_address, end_address)
+
+    def is_individual_read(self, address: int) -> bool:
+        return address in self._individual_read_ranges
+
 
 H1_AC1_REGISTERS = SpecialRegisterConfig(invalid_register_ranges=[(11096, 39999)])
 # See https://github.com/nathanmarlor/foxess_modbus/discussions/503
@@ -166,12 +201,10 @@ class InverterModelConnectionTypeProfile:
 
     def overlaps_invalid_range(self, start_address: int, end_address: int) -> bool:
         """Determines whether the given inclusive address range overlaps any invalid address ranges"""
-        return any(
-            r[0] <= end_address and start_address <= r[1] for r in self.special_registers.invalid_register_ranges
-        )
+        return self.special_registers.overlaps_invalid_range(start_address, end_address)
 
     def is_individual_read(self, address: int) -> bool:
-        return any(r[0] <= address <= r[1] for r in self.special_registers.individual_read_register_ranges)
+        return self.special_registers.is_individual_read(address)
 
     def create_entities(
         self,
@@ -182,7 +215,7 @@ class InverterModelConnectionTypeProfile:
 
         result = []
 
-        for entity_factory in ENTITIES:
+        for entity_factory in get_entities():
             if entity_factory.entity_type == entity_type:
                 entity = entity_factory.create_entity_if_supported(
                     controller, self._get_inv(controller), self.register_type
@@ -0,0 +1,173 @@
+"""Calibrates the max_read setting for an adapter, by timing reads of increasing size"""
+
+import logging
+import statistics
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+
+from .client.modbus_client import ModbusClientFailedError
+from .const import MAX_READ
+from .const import READ_COST_MODEL
+from .vendor.pymodbus import ConnectionException
+
+if TYPE_CHECKING:
+    from .modbus_controller import ModbusController
+
+_LOGGER = logging.getLogger(__name__)
+
+# Read sizes to try, in order. 125 is the maximum allowed by the Modbus spec
+_CANDIDATE_SIZES = (1, 2, 4, 8, 12, 16, 20, 25, 32, 40, 50, 64, 80, 100, 125)
+# Each size must succeed this many times in a row to count as reliable
+_READS_PER_SIZE = 5
+
+
+@dataclass(frozen=True)
+class ReadCostModel:
+    """Model of how long a read takes: round_trip_time + num_registers * per_register_cost"""
+
+    round_trip_time: float  # Seconds
+    per_register_cost: float  # Seconds
+
+    def is_worth_reading_gap(self, gap: int) -> bool:
+        """Whether it's cheaper to read gap unneeded registers than to do a separate read"""
+        return gap * self.per_register_cost <= self.round_trip_time
+
+    def to_dict(self) -> dict[str, float]:
+        return {"round_trip_time": self.round_trip_time, "per_register_cost": self.per_register_cost}
+
+    @staticmethod
+    def from_dict(data: dict[str, float] | None) -> "ReadCostModel | None":
+        if data is None:
+            return None
+        return ReadCostModel(data["round_trip_time"], data["per_register_cost"])
+
+
+@dataclass(frozen=True)
+class CalibrationResult:
+    max_read: int
+    cost_model: ReadCostModel
+    # Read size -> median time taken
+    timings: dict[int, float]
+    # Why we stopped trying larger sizes
+    stop_reason: str
+
+    def apply_to_options(self, inverter_options: dict[str, Any]) -> None:
+        """Saves the result into the given inverter options"""
+        inverter_options[MAX_READ] = self.max_read
+        inverter_options[READ_COST_MODEL] = self.cost_model.to_dict()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "max_read": self.max_read,
+            "round_trip_time_ms": self.cost_model.round_trip_time * 1000,
+            "per_register_cost_ms": self.cost_model.per_register_cost * 1000,
+            "timings_ms": {size: timing * 1000 for size, timing in self.timings.items()},
+            "stop_reason": self.stop_reason,
+        }
+
+
+class CalibrationFailedError(Exception):
+    """Raised if we weren't able to calibrate at all"""
+
+
+async def calibrate_max_read(controller: "ModbusController") -> CalibrationResult:
+    """
+    Finds the largest read size which the adapter handles reliably, and fits a cost model to the time taken by reads.
+
+    Reads are only made against runs of registers which polls have already read, so they're known to be valid.
+    """
+
+    client = controller.client
+    timings: dict[int, float] = {}
+    stop_reason = "Reached the maximum read size"
+    # Whether we stopped because we couldn't test larger sizes, rather than because they failed
+    ran_out_of_ranges = False
+
+    for size in _CANDIDATE_SIZES:
+        read_ranges = controller.find_valid_read_ranges(size)
+        if len(read_ranges) == 0:
+            # Reads this large would have to span registers which might not be valid, so we can't test them
+            stop_reason = f"No range of {size} registers known to be valid"
+            ran_out_of_ranges = True
+            break
+
+        samples: list[float] | None = None
+        try:
+            for start_address, _ in read_ranges:
+                try:
+                    samples = await _time_reads(controller, start_address, size)
+                    break
+                except ModbusClientFailedError as ex:
+                    if not ex.is_illegal_address:
+                        raise
+                    # The inverter doesn't support one of these registers (maybe its firmware has changed). That
+                    # doesn't tell us anything about the adapter, so try somewhere else
+                    _LOGGER.info(
+                        "Calibration of %s: reads of %s registers at %s returned IllegalAddress",
+                        client,
+                        size,
+                        start_address,
+                    )
+        except (ModbusClientFailedError, ConnectionException, ValueError) as ex:
+            _LOGGER.info("Calibration of %s: reads of %s registers failed: %s", client, size, ex)
+            stop_reason = f"Reads of {size} registers failed: {ex}"
+            break
+
+        if samples is None:
+            stop_reason = f"Reads of {size} registers returned IllegalAddress at every range known to be valid"
+            ran_out_of_ranges = True
+            break
+
+        timings[size] = statistics.median(samples)
+        _LOGGER.debug("Calibration of %s: reads of %s registers took %.1fms", client, size, timings[size] * 1000)
+
+    if len(timings) == 0:
+        raise CalibrationFailedError(stop_reason)
+
+    max_read = max(timings)
+    if ran_out_of_ranges and max_read < controller.max_read:
+        # Polls are already reading this much successfully, we just couldn't find anywhere to test larger sizes
+        _LOGGER.info(
+            "Calibration of %s: no ranges to test reads larger than %s registers, keeping max_read %s",
+            client,
+            max_read,
+            controller.max_read,
+        )
+        max_read = controller.max_read
+
+    return CalibrationResult(
+        max_read=max_read,
+        cost_model=_fit_cost_model(timings),
+        timings=timings,
+        stop_reason=stop_reason,
+    )
+
+
+async def _time_reads(controller: "ModbusController", start_address: int, size: int) -> list[float]:
+    """Reads size registers starting at start_address several times, returning the time taken by each read"""
+
+    client = controller.client
+    samples: list[float] = []
+    for _ in range(_READS_PER_SIZE):
+        values = await client.read_registers(
+            start_address, size, controller.register_type, controller.slave, num_retries=0
+        )
+        if len(values) != size:
+            raise ValueError(f"Expected {size} registers, got {len(values)}")
+        # This excludes the time spent waiting for other requests (e.g. polls) to finish. Nothing else can have
+        # completed a request between our request completing and us getting here
+        samples.append(client.metrics.request_latency.last)
+    return samples
+
+
+def _fit_cost_model(timings: dict[int, float]) -> ReadCostModel:
+    """Least-squares fit of time = round_trip_time + size * per_register_cost"""
+
+    if len(timings) == 1:
+        ((_, timing),) = timings.items()
+        return ReadCostModel(round_trip_time=timing, per_register_cost=0.0)
+
+    fit = statistics.linear_regression(list(timings.keys()), list(timings.values()))
+    # Noise can produce slightly negative values, which don't make sense
+    return ReadCostModel(round_trip_time=max(fit.intercept, 0.0), per_register_cost=max(fit.slope, 0.0))
@@ -1,5 +1,6 @@
 """Modbus controller"""
 
+import bisect
 import logging
 import re
 import threading
@@ -10,41 +11,58 @@ from datetime import datetime
 from datetime import timedelta
 from enum import Enum
 from typing import Any
+from typing import Callable
 from typing import Iterable
 from typing import Iterator
 
 from homeassistant.components.logbook import async_log_entry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import issue_registry
+from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.issue_registry import IssueSeverity
 
 from .client.modbus_client import ModbusClient
+from .client.modbus_client import ModbusClientDeadlineExceededError
 from .client.modbus_client import ModbusClientFailedError
+from .client.priority_lock import RequestPriority
+from .common.dataflow import DataflowGraph
 from .common.entity_controller import EntityController
 from .common.entity_controller import EntityRemoteControlManager
 from .common.entity_controller import ModbusControllerEntity
 from .common.exceptions import AutoconnectFailedError
 from .common.exceptions import UnsupportedInverterError
+from .common.histogram import Histogram
+from .common.metrics import ClientMetrics
+from .common.metrics import PollMetrics
+from .common.tracing import TRACER
 from .common.types import RegisterPollType
 from .common.types import RegisterType
 from .common.unload_controller import UnloadController
 from .const import DOMAIN
 from .const import ENTITY_ID_PREFIX
 from .const import FRIENDLY_NAME
+from .const import INVERTER_CONN
 from .const import INVERTER_MODEL
+from .const import INVERTER_VERSION
 from .const import MAX_READ
+from .const import VERIFY_WRITES
+from .invalid_ranges_store import InvalidRangesStore
 from .inverter_profiles import INVERTER_PROFILES
 from .inverter_profiles import InverterModelConnectionTypeProfile
+from .max_read_calibration import ReadCostModel
 from .remote_control_manager import RemoteControlManager
 from .vendor.pymodbus import ConnectionException
-from .vendor.pymodbus import ExceptionResponse
-from .vendor.pymodbus import ModbusExceptions
 
 _LOGGER = logging.getLogger(__name__)
 
 # How many failed polls before we mark sensors as Unavailable
 _NUM_FAILED_POLLS_FOR_DISCONNECTION = 5
+# Once we're disconnected, we probe with a single read with this many retries, rather than doing a full poll
+_NUM_PROBE_RETRIES = 0
+
+# Fraction of the poll interval which a single poll is allowed to take
+_POLL_DEADLINE_FRACTION = 0.8
 
 _MODEL_START_ADDRESS = 30000
 _MODEL_LENGTH = 15
@@ -54,6 +72,19 @@ _UINT16_MAX = 65535
 
 _INVERTER_WRITE_DELAY_SECS = 5
 
+# If write verification is enabled, how long we wait to see a written value reflected in a poll before deciding that the
+# write silently failed. This is at least this many polls, and at least this many seconds
+_WRITE_VERIFY_TIMEOUT_POLLS = 3
+_WRITE_VERIFY_MIN_TIMEOUT_SECS = 30
+# Bucket upper bounds (seconds) for the time taken for a written value to be visible in a poll
+_WRITE_LATENCY_BUCKETS = (1, 2, 5, 10, 20, 30, 60)
+
+# The maximum number of registers which can be written in a single Modbus request
+_MAX_WRITE_REGISTERS = 123
+
+# How often to check whether registers which we've found to be invalid have become valid (e.g. after a firmware update)
+_INVALID_RANGES_REPROBE_INTERVAL = timedelta(hours=24)
+
 
 @dataclass
 class RegisterValue:
@@ -61,6 +92,18 @@ class RegisterValue:
     read_value: int | None = None
     written_value: int | None = None
     written_at: float | None = None  # From time.monotonic()
+    # Whether we're waiting to see written_value come back in a poll
+    awaiting_verification: bool = False
+
+
+@dataclass(frozen=True)
+class ControllerWarmState:
+    """State handed from a ModbusController to its replacement when the integration is reloaded"""
+
+    is_connected: bool
+    # Address -> last value read
+    read_values: dict[int, int | None]
+    invalid_ranges: list[tuple[int, int]]
 
 
 class ConnectionState(Enum):
@@ -70,34 +113,109 @@ class ConnectionState(Enum):
 
 
 class InvalidRegisterRanges:
-    @dataclass
-    class Range:
-        start: int
-        count: int
+    """
+    Set of register addresses, stored as sorted, non-overlapping, non-adjacent ranges.
+
+    Lookups and insertions use binary search, so are O(log n) in the number of ranges.
+    """
 
     def __init__(self) -> None:
-        self._ranges: list[InvalidRegisterRanges.Range] = []
+        # _starts[i] is the first address in range i, _ends[i] is one past the last address
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        # Incremented whenever the set changes, so that callers can cache things derived from it
+        self._version = 0
 
     @property
     def is_empty(self) -> bool:
-        return len(self._ranges) == 0
+        return len(self._starts) == 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def ranges(self) -> list[tuple[int, int]]:
+        """Returns the invalid ranges, as a list of (start, count)"""
+        return [(start, end - start) for start, end in zip(self._starts, self._ends, strict=True)]
 
     def add(self, register: int) -> None:
-        # Does it fall in any other ranges, or sit at the end of any range?
-        for x in self._ranges:
-            if register >= x.start and register < (x.start + x.count):
+        self.add_range(register, 1)
+
+    def add_all(self, registers: Iterable[int]) -> None:
+        """Adds many registers at once, coalescing runs of consecutive registers into single ranges"""
+        run_start: int | None = None
+        run_end = 0
+        for register in sorted(set(registers)):
+            if run_start is not None and register == run_end:
+                run_end += 1
+                continue
+            if run_start is not None:
+                self.add_range(run_start, run_end - run_start)
+            run_start, run_end = register, register + 1
+        if run_start is not None:
+            self.add_range(run_start, run_end - run_start)
+
+    def add_range(self, start: int, count: int) -> None:
+        if count <= 0:
+            return
+        end = start + count
+        # Ranges [lo, hi) are the ones which overlap or are adjacent to the new range, and will be merged with it
+        lo = bisect.bisect_left(self._ends, start)
+        hi = bisect.bisect_right(self._starts, end)
+        if lo < hi:
+            if self._starts[lo] <= start and self._ends[hi - 1] >= end and hi - lo == 1:
                 # Already covered
                 return
-            if register == (x.start + x.count):
-                x.count += 1
-                return
-        self._ranges.append(self.Range(register, 1))
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+        self._version += 1
+
+    def remove_range(self, start: int, count: int) -> None:
+        if count <= 0:
+            return
+        end = start + count
+        # Ranges [lo, hi) are the ones which overlap the range being removed
+        lo = bisect.bisect_right(self._ends, start)
+        hi = bisect.bisect_left(self._starts, end)
+        if lo >= hi:
+            return
+        # Keep any parts of the outermost ranges which lie outside of the range being removed
+        starts: list[int] = []
+        ends: list[int] = []
+        if self._starts[lo] < start:
+            starts.append(self._starts[lo])
+            ends.append(start)
+        if self._ends[hi - 1] > end:
+            starts.append(end)
+            ends.append(self._ends[hi - 1])
+        self._starts[lo:hi] = starts
+        self._ends[lo:hi] = ends
+        self._version += 1
+
+    def overlaps(self, start_address: int, end_address: int) -> bool:
+        """Determines whether the given inclusive address range overlaps any of the ranges"""
+        # The last range starting at or before end_address is the only one which can overlap
+        i = bisect.bisect_right(self._starts, end_address) - 1
+        return i >= 0 and self._ends[i] > start_address
 
     def __contains__(self, item: int) -> bool:
-        return any(item >= x.start and item < x.start + x.count for x in self._ranges)
+        return self.overlaps(item, item)
 
     def __str__(self) -> str:
-        return ", ".join(f"[{x.start, x.count}]" for x in self._ranges)
+        return ", ".join(f"[{start, count}]" for start, count in self.ranges)
+
+
+def _to_register_value(value: int) -> int:
+    value = int(value)  # Ensure that we've been given an int
+    if not (_INT16_MIN <= value <= _UINT16_MAX):
+        raise ValueError(f"Value {value} must be between {_INT16_MIN} and {_UINT16_MAX}")
+    # pymodbus doesn't like negative values
+    if value < 0:
+        value = _UINT16_MAX + value + 1
+    return value
 
 
 @contextmanager
@@ -122,24 +240,75 @@ class ModbusController(EntityController, UnloadController):
         slave: int,
         poll_rate: int,
         max_read: int,
+        read_cost_model: ReadCostModel | None = None,
+        invalid_ranges_store: InvalidRangesStore | None = None,
+        warm_state: ControllerWarmState | None = None,
     ) -> None:
-        """Init"""
+        """
+        Init
+
+        :param warm_state: State from the controller which this one replaces, if the integration was reloaded without
+            the connection details changing. This lets us carry on from where it left off, rather than reconnecting.
+        """
         self._hass = hass
         self._update_listeners: set[ModbusControllerEntity] = set()
+        # Entity ID -> registered entity, used by entities which compute their value from other entities
+        self._entities_by_id: dict[str, ModbusControllerEntity] = {}
+        # The order to notify listeners in after a poll, so that each comes after the entities it's computed from.
+        # None if the set of listeners has changed since this was last worked out
+        self._notify_order: list[ModbusControllerEntity] | None = None
+        self._poll_complete_listeners: list[Callable[[], None]] = []
         self._data: dict[int, RegisterValue] = {}
+        self._dataflow = DataflowGraph(lambda address: self.read(address, signed=False))
+        self._generation = 0
         self._client = client
         self._connection_type_profile = connection_type_profile
         self._inverter_details = inverter_details
         self._slave = slave
         self._poll_rate = poll_rate
         self._max_read = max_read
+        # If max_read has been calibrated, the measured cost of reads. Used to decide whether to read across gaps
+        self._read_cost_model = read_cost_model
+        # (max_read, is_initial_connection) -> read ranges. Cleared when the set of registers to read, or the set of
+        # invalid registers, changes
+        self._read_ranges_cache: dict[tuple[int, bool], list[tuple[int, int]]] = {}
+        self._read_ranges_cache_invalid_ranges_version = -1
         self._refresh_lock = threading.Lock()
         self._num_failed_poll_attempts = 0
         # To start, we're neither connected nor disconnected
         self._connection_state = ConnectionState.INITIAL
         self._current_connection_error: str | None = None
-        # Any ranges of registers which we've detected that we can't read
+        # Any ranges of registers which we've detected that we can't read. These are remembered across restarts for
+        # each inverter model and version
         self._detected_invalid_ranges = InvalidRegisterRanges()
+        self._invalid_ranges_store = invalid_ranges_store
+        self._invalid_ranges_store_key = (
+            f"{inverter_details[INVERTER_MODEL]}_{inverter_details[INVERTER_CONN]}_"
+            f"{inverter_details.get(INVERTER_VERSION) or 'latest'}"
+        )
+        if invalid_ranges_store is not None:
+            for start, count in invalid_ranges_store.get(self._invalid_ranges_store_key):
+                self._detected_invalid_ranges.add_range(start, count)
+        # Address -> value read by the controller we replaced. Used to populate _data as entities register
+        self._warm_read_values: dict[int, int | None] = {}
+        if warm_state is not None:
+            for start, count in warm_state.invalid_ranges:
+                self._detected_invalid_ranges.add_range(start, count)
+            self._warm_read_values = dict(warm_state.read_values)
+            if warm_state.is_connected:
+                # Don't re-read the registers which are only read on connection, as the connection hasn't dropped
+                self._connection_state = ConnectionState.CONNECTED
+        # If the previous poll ran out of time, the index of the first read range which it didn't read
+        self._read_range_offset = 0
+        # Whether the previous poll ran out of time before reading all of the registers read on initial connection
+        self._deferred_initial_connection_reads = False
+        # If enabled, check that writes show up in subsequent polls
+        self._verify_writes: bool = inverter_details.get(VERIFY_WRITES, False)
+        # Address -> time taken for a write to be visible in a poll
+        self._write_latency: dict[int, Histogram] = {}
+        # Address -> (written value, read value) for writes which we've decided silently failed
+        self._failed_writes: dict[int, tuple[int, int | None]] = {}
+        self._poll_metrics = PollMetrics()
 
         self._inverter_capacity = connection_type_profile.inverter_model_profile.inverter_capacity(
             self.inverter_details[INVERTER_MODEL]
@@ -161,6 +330,11 @@ class ModbusController(EntityController, UnloadController):
             domain=DOMAIN,
             issue_id=f"invalid_ranges_{self.inverter_details[ENTITY_ID_PREFIX]}",
         )
+        issue_registry.async_delete_issue(
+            self._hass,
+            domain=DOMAIN,
+            issue_id=f"write_failed_{self.inverter_details[ENTITY_ID_PREFIX]}",
+        )
 
         self._unload_listeners.append(
             async_track_time_interval(
@@ -169,11 +343,26 @@ class ModbusController(EntityController, UnloadController):
                 timedelta(seconds=self._poll_rate),
             )
         )
+        self._unload_listeners.append(
+            async_track_time_interval(
+                self._hass,
+                self._reprobe_invalid_ranges,
+                _INVALID_RANGES_REPROBE_INTERVAL,
+            )
+        )
 
     @property
     def hass(self) -> HomeAssistant:
         return self._hass
 
+    def warm_state(self) -> ControllerWarmState:
+        """Captures the state to hand to a replacement controller. Call this before entities are removed"""
+        return ControllerWarmState(
+            is_connected=self._connection_state == ConnectionState.CONNECTED,
+            read_values={address: value.read_value for address, value in self._data.items()},
+            invalid_ranges=self._detected_invalid_ranges.ranges,
+        )
+
     @property
     def is_connected(self) -> bool:
         # Only tell things we're not connected if we're actually disconnected
@@ -195,6 +384,39 @@ class ModbusController(EntityController, UnloadController):
     def inverter_details(self) -> dict[str, Any]:
         return self._inverter_details
 
+    @property
+    def write_latency(self) -> dict[int, Histogram]:
+        """If write verification is enabled, per-register time taken for written values to be visible in a poll"""
+        return self._write_latency
+
+    @property
+    def poll_metrics(self) -> PollMetrics:
+        return self._poll_metrics
+
+    @property
+    def client_metrics(self) -> ClientMetrics:
+        return self._client.metrics
+
+    @property
+    def client(self) -> ModbusClient:
+        return self._client
+
+    @property
+    def slave(self) -> int:
+        return self._slave
+
+    @property
+    def poll_rate(self) -> int:
+        return self._poll_rate
+
+    @property
+    def max_read(self) -> int:
+        return self._max_read
+
+    @property
+    def register_type(self) -> RegisterType:
+        return self._connection_type_profile.register_type
+
     def read(self, address: int | list[int], *, signed: bool) -> int | None:
         # There can be a delay between writing a register, and actually reading that value back (presumably the delay
         # is on the inverter somewhere). If we've recently written a value, use that value, rather than the latest-read
@@ -252,13 +474,7 @@ class ModbusController(EntityController, UnloadController):
         )
         try:
             for i, value in enumerate(values):
-                value = int(value)  # Ensure that we've been given an int
-                if not (_INT16_MIN <= value <= _UINT16_MAX):
-                    raise ValueError(f"Value {value} must be between {_INT16_MIN} and {_UINT16_MAX}")
-                # pymodbus doesn't like negative values
-                if value < 0:
-                    value = _UINT16_MAX + value + 1
-                values[i] = value
+                values[i] = _to_register_value(value)
 
             await self._client.write_registers(start_address, values, self._slave)
 
@@ -270,6 +486,10 @@ class ModbusController(EntityController, UnloadController):
                 if register_value is not None:
                     register_value.written_value = value
                     register_value.written_at = time.monotonic()
+                    # We only see the results of writes to registers which we poll periodically
+                    register_value.awaiting_verification = (
+                        self._verify_writes and register_value.poll_type == RegisterPollType.PERIODICALLY
+                    )
                     changed_addresses.add(address)
             if len(changed_addresses) > 0:
                 self._notify_update(changed_addresses)
@@ -278,6 +498,47 @@ class ModbusController(EntityController, UnloadController):
             _LOGGER.exception("Failed to write registers")
             raise ex
 
+    async def write_batch(self, writes: list[tuple[int, int]]) -> None:
+        """
+        Write a set of (address, value) pairs, coalescing contiguous addresses into multi-register writes, and skipping
+        groups of writes which wouldn't change any register's current value. Registers which the inverter doesn't
+        allow to be written as part of a multi-register write must be written with write_register instead.
+
+        Groups of registers are written in the order in which they first appear in writes.
+        """
+
+        # Later writes to the same address win
+        values_by_address = {address: _to_register_value(value) for address, value in writes}
+        first_seen: dict[int, int] = {}
+        for i, (address, _) in enumerate(writes):
+            first_seen.setdefault(address, i)
+
+        # List of [(address, value)], where each group is contiguous
+        groups: list[list[tuple[int, int]]] = []
+        for address, value in sorted(values_by_address.items()):
+            if len(groups) > 0 and groups[-1][-1][0] == address - 1 and len(groups[-1]) < _MAX_WRITE_REGISTERS:
+                groups[-1].append((address, value))
+            else:
+                groups.append([(address, value)])
+
+        groups.sort(key=lambda group: min(first_seen[address] for address, _ in group))
+
+        for group in groups:
+            # Only skip a group if none of it would change. We never trim registers off a group, as each group might be
+            # a set of registers which need to be written together (e.g. the start and end of a charge period), and our
+            # idea of the current values might be stale
+            if all(self.read(address, signed=False) == value for address, value in group):
+                _LOGGER.debug(
+                    "Skipping write to %s %s: registers %s already have values %s",
+                    self._client,
+                    self._slave,
+                    [x[0] for x in group],
+                    [x[1] for x in group],
+                )
+                continue
+
+            await self.write_registers(group[0][0], [x[1] for x in group])
+
     async def _refresh(self, _time: datetime) -> None:
         """Refresh modbus data"""
         # Make sure that we don't do two refreshes at the same time, if one is too slow
@@ -292,14 +553,26 @@ class ModbusController(EntityController, UnloadController):
                 )
                 return
 
+            # Bound the total time spent on this poll, so that a degraded link doesn't block the bus. Any ranges which
+            # we don't get to are read at the start of the next poll
+            poll_started_at = time.monotonic()
+            deadline = poll_started_at + self._poll_rate * _POLL_DEADLINE_FRACTION
+
             exception: Exception | None = None
             try:
-                read_values = await self._read_all_registers()
+                # If we've been disconnected for a while, don't tie up the client (which might be shared with other
+                # inverters) doing a full poll with retries on every register range. Check that the inverter is
+                # responding first.
+                if self._connection_state == ConnectionState.DISCONNECTED:
+                    await self._probe(deadline)
 
-                # If we made it to here, then all reads succeeded. Write them to _data and notify the sensors.
-                # This avoids recording reads if poll failed partway through (ensuring that we don't record potentially
-                # inconsistent data)
+                read_values = await self._read_all_registers(deadline)
+
+                # If we made it to here, then all reads succeeded (although some might have been deferred to the next
+                # poll). Write them to _data and notify the sensors. This avoids recording reads if poll failed partway
+                # through (ensuring that we don't record potentially inconsistent data)
                 changed_addresses = set()
+                now = time.monotonic()
                 for start_address, reads in read_values:
                     for i, value in enumerate(reads):
                         address = start_address + i
@@ -308,6 +581,8 @@ class ModbusController(EntityController, UnloadController):
                         if register_value is not None:
                             register_value.read_value = value
                             changed_addresses.add(address)
+                            if register_value.awaiting_verification:
+                                self._verify_write(address, register_value, now)
 
                 _LOGGER.debug(
                     "Refresh of %s %s complete - notifying sensors: %s",
@@ -332,6 +607,14 @@ class ModbusController(EntityController, UnloadController):
                     self._slave,
                     ex.response,
                 )
+            except ModbusClientDeadlineExceededError as ex:
+                exception = ex
+                _LOGGER.debug(
+                    "Ran out of time when polling %s %s: %s",
+                    self._client,
+                    self._slave,
+                    ex,
+                )
             except Exception as ex:
                 exception = ex
                 _LOGGER.warning(
@@ -342,6 +625,20 @@ class ModbusController(EntityController, UnloadController):
                     exc_info=True,
                 )
 
+            poll_finished_at = time.monotonic()
+            self._poll_metrics.num_polls += 1
+            self._poll_metrics.poll_duration.record(poll_finished_at - poll_started_at)
+            if exception is not None:
+                self._poll_metrics.num_failed_polls += 1
+            TRACER.record(
+                "poll",
+                poll_started_at,
+                poll_finished_at,
+                client=self._client,
+                slave=self._slave,
+                error=repr(exception) if exception is not None else None,
+            )
+
             # Do this after recording new values in _data. That way the sensors show the new values when they
             # become available after a disconnection
             if exception is None:
@@ -391,25 +688,139 @@ class ModbusController(EntityController, UnloadController):
                     )
                     await self._notify_is_connected_changed(is_connected=False)
 
+            if exception is None:
+                self._notify_poll_complete()
+
             if not self._detected_invalid_ranges.is_empty:
-                # This will update the issue if anything has changed, otherwise it's cheap
-                issue_registry.async_create_issue(
-                    self._hass,
-                    domain=DOMAIN,
-                    issue_id=f"invalid_ranges_{self.inverter_details[ENTITY_ID_PREFIX]}",
-                    is_fixable=False,
-                    is_persistent=False,
-                    severity=IssueSeverity.ERROR,
-                    learn_more_url="https://github.com/nathanmarlor/foxess_modbus/wiki/Invalid-Registers",
-                    translation_key="invalid_ranges",
-                    translation_placeholders={
-                        "friendly_name": self.inverter_details[FRIENDLY_NAME],
-                        "ranges": str(self._detected_invalid_ranges),
-                    },
-                )
+                self._invalid_ranges_changed()
 
         if self._remote_control_manager is not None:
-            await self._remote_control_manager.poll_complete_callback()
+            with TRACER.span("remote_control", client=self._client, slave=self._slave):
+                await self._remote_control_manager.poll_complete_callback()
+
+    def _invalid_ranges_changed(self) -> None:
+        """Called when we might have updated _detected_invalid_ranges"""
+
+        # Both of these are cheap if nothing has changed
+        if self._invalid_ranges_store is not None:
+            self._invalid_ranges_store.set(self._invalid_ranges_store_key, self._detected_invalid_ranges.ranges)
+
+        issue_id = f"invalid_ranges_{self.inverter_details[ENTITY_ID_PREFIX]}"
+        if self._detected_invalid_ranges.is_empty:
+            issue_registry.async_delete_issue(self._hass, domain=DOMAIN, issue_id=issue_id)
+        else:
+            issue_registry.async_create_issue(
+                self._hass,
+                domain=DOMAIN,
+                issue_id=issue_id,
+                is_fixable=False,
+                is_persistent=False,
+                severity=IssueSeverity.ERROR,
+                learn_more_url="https://github.com/nathanmarlor/foxess_modbus/wiki/Invalid-Registers",
+                translation_key="invalid_ranges",
+                translation_placeholders={
+                    "friendly_name": self.inverter_details[FRIENDLY_NAME],
+                    "ranges": str(self._detected_invalid_ranges),
+                },
+            )
+
+    async def _reprobe_invalid_ranges(self, _time: datetime) -> None:
+        """
+        Checks whether any registers which we've found to be invalid are now readable, e.g. because of a firmware
+        update. These reads are lower priority than polls.
+        """
+
+        if self._detected_invalid_ranges.is_empty or self._connection_state != ConnectionState.CONNECTED:
+            return
+
+        now_valid: list[tuple[int, int]] = []
+        for start, count in self._detected_invalid_ranges.ranges:
+            for chunk_start in range(start, start + count, self._max_read):
+                chunk_count = min(self._max_read, start + count - chunk_start)
+                try:
+                    await self._client.read_registers(
+                        chunk_start,
+                        chunk_count,
+                        self._connection_type_profile.register_type,
+                        self._slave,
+                        num_retries=0,
+                        priority=RequestPriority.BACKGROUND,
+                    )
+                    now_valid.append((chunk_start, chunk_count))
+                except ModbusClientFailedError as ex:
+                    if not ex.is_illegal_address:
+                        # Try again next time
+                        _LOGGER.debug(
+                            "Failed to re-probe invalid registers on %s %s: %s", self._client, self._slave, ex
+                        )
+                        return
+                except ConnectionException as ex:
+                    _LOGGER.debug("Failed to re-probe invalid registers on %s %s: %s", self._client, self._slave, ex)
+                    return
+
+        if len(now_valid) > 0:
+            _LOGGER.info("%s %s: previously invalid registers %s are now valid", self._client, self._slave, now_valid)
+            for start, count in now_valid:
+                self._detected_invalid_ranges.remove_range(start, count)
+            self._invalid_ranges_changed()
+
+    def _verify_write(self, address: int, register_value: RegisterValue, now: float) -> None:
+        """Checks whether a previous write to the given register is reflected in the value we've just read"""
+
+        assert register_value.written_at is not None
+        elapsed = now - register_value.written_at
+
+        if register_value.read_value == register_value.written_value:
+            register_value.awaiting_verification = False
+            self._write_latency.setdefault(address, Histogram(_WRITE_LATENCY_BUCKETS)).record(elapsed)
+            _LOGGER.debug(
+                "%s %s: write of %s to register %s visible after %.1fs",
+                self._client,
+                self._slave,
+                register_value.written_value,
+                address,
+                elapsed,
+            )
+            if self._failed_writes.pop(address, None) is not None:
+                self._update_write_failed_issue()
+        elif elapsed >= max(_WRITE_VERIFY_MIN_TIMEOUT_SECS, self._poll_rate * _WRITE_VERIFY_TIMEOUT_POLLS):
+            # The inverter accepted the write, but it hasn't taken effect. Give up waiting
+            register_value.awaiting_verification = False
+            assert register_value.written_value is not None
+            _LOGGER.warning(
+                "%s %s: wrote %s to register %s, but it still reads as %s after %.1fs",
+                self._client,
+                self._slave,
+                register_value.written_value,
+                address,
+                register_value.read_value,
+                elapsed,
+            )
+            self._failed_writes[address] = (register_value.written_value, register_value.read_value)
+            self._update_write_failed_issue()
+
+    def _update_write_failed_issue(self) -> None:
+        issue_id = f"write_failed_{self.inverter_details[ENTITY_ID_PREFIX]}"
+        if len(self._failed_writes) == 0:
+            issue_registry.async_delete_issue(self._hass, domain=DOMAIN, issue_id=issue_id)
+            return
+
+        issue_registry.async_create_issue(
+            self._hass,
+            domain=DOMAIN,
+            issue_id=issue_id,
+            is_fixable=False,
+            is_persistent=False,
+            severity=IssueSeverity.WARNING,
+            translation_key="write_failed",
+            translation_placeholders={
+                "friendly_name": self.inverter_details[FRIENDLY_NAME],
+                "registers": ", ".join(
+                    f"{address} (wrote {written}, read {read})"
+                    for address, (written, read) in sorted(self._failed_writes.items())
+                ),
+            },
+        )
 
     def _log_message(self, message: str) -> None:
         friendly_name = self.inverter_details[FRIENDLY_NAME]
@@ -419,7 +830,29 @@ class ModbusController(EntityController, UnloadController):
             name = "FoxESS - Modbus"
         async_log_entry(self._hass, name=name, message=message, domain=DOMAIN)
 
-    def _create_read_ranges(self, max_read: int, is_initial_connection: bool) -> Iterable[tuple[int, int]]:
+    def _create_read_ranges(self, max_read: int, is_initial_connection: bool) -> list[tuple[int, int]]:
+        """
+        Returns a set of read ranges to cover the addresses of all registers on this inverter,
+        respecting the maxumum number of registers to read at a time.
+
+        The result is cached until the registers to read or the detected invalid ranges change, and must not be
+        modified.
+
+        :returns: List of tuples of (start_address, num_registers_to_read)
+        """
+
+        if self._read_ranges_cache_invalid_ranges_version != self._detected_invalid_ranges.version:
+            self._read_ranges_cache.clear()
+            self._read_ranges_cache_invalid_ranges_version = self._detected_invalid_ranges.version
+
+        key = (max_read, is_initial_connection)
+        read_ranges = self._read_ranges_cache.get(key)
+        if read_ranges is None:
+            read_ranges = list(self._plan_read_ranges(max_read, is_initial_connection))
+            self._read_ranges_cache[key] = read_ranges
+        return read_ranges
+
+    def _plan_read_ranges(self, max_read: int, is_initial_connection: bool) -> Iterable[tuple[int, int]]:
         """
         Generates a set of read ranges to cover the addresses of all registers on this inverter,
         respecting the maxumum number of registers to read at a time
@@ -442,7 +875,6 @@ class ModbusController(EntityController, UnloadController):
 
         start_address: int | None = None
         read_size = 0
-        # TODO: Do we want to cache the result of this?
         for address, register_value in sorted(self._data.items()):
             if register_value.poll_type == RegisterPollType.ON_CONNECTION and not is_initial_connection:
                 continue
@@ -463,9 +895,16 @@ class ModbusController(EntityController, UnloadController):
             # If we're just increasing the previous read size by 1, then don't test whether we're extending
             # the read over an invalid range (as we assume that registers we're reading to read won't be
             # inside invalid ranges, tested in __init__). This also assumes that read_size != max_read here.
-            elif address == start_address + 1 or (
+            # Otherwise we'd be reading across a gap of registers which we don't need: make sure that none of them are
+            # known to be invalid, or that we've detected to be invalid
+            elif address == start_address + read_size or (
                 address <= start_address + max_read - 1
+                and (
+                    self._read_cost_model is None
+                    or self._read_cost_model.is_worth_reading_gap(address - start_address - read_size)
+                )
                 and not self._connection_type_profile.overlaps_invalid_range(start_address, address - 1)
+                and not self._detected_invalid_ranges.overlaps(start_address + read_size, address - 1)
             ):
                 # There's a previous read which we can extend
                 read_size = address - start_address + 1
@@ -482,104 +921,341 @@ class ModbusController(EntityController, UnloadController):
         if start_address is not None:
             yield (start_address, read_size)
 
-    # List of (start address, [read values starting at that address])
-    async def _read_all_registers(self) -> list[tuple[int, Iterable[int | None]]]:
-        def _is_illegal_address(ex: ModbusClientFailedError) -> bool:
-            return (
-                isinstance(ex.response, ExceptionResponse)
-                and ex.response.exception_code == ModbusExceptions.IllegalAddress
+    def find_valid_read_ranges(self, num_registers: int) -> list[tuple[int, int]]:
+        """
+        Finds ranges of num_registers consecutive registers which are known to be valid: either registers which we
+        poll and have successfully read, or the gaps between them which the current read ranges read across.
+
+        :returns: List of tuples of (start_address, num_registers), starting with the longest run of valid registers
+        """
+        valid_addresses = {
+            address
+            for address, register_value in self._data.items()
+            if register_value.read_value is not None and address not in self._detected_invalid_ranges
+        }
+        # Each read range is read in one go, so if all of the registers which we poll in it were read successfully,
+        # so was any gap between them
+        for start_address, num_reads in self._create_read_ranges(self._max_read, is_initial_connection=False):
+            addresses = range(start_address, start_address + num_reads)
+            if not self._detected_invalid_ranges.overlaps(addresses[0], addresses[-1]) and all(
+                address in valid_addresses for address in addresses if address in self._data
+            ):
+                valid_addresses.update(addresses)
+
+        # List of (start_address, count) of runs of consecutive valid registers
+        runs: list[tuple[int, int]] = []
+        for address in sorted(valid_addresses):
+            if self._connection_type_profile.is_individual_read(address):
+                continue
+            if len(runs) > 0 and runs[-1][0] + runs[-1][1] == address:
+                runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+            else:
+                runs.append((address, 1))
+
+        runs.sort(key=lambda run: run[1], reverse=True)
+        return [(start_address, num_registers) for start_address, count in runs if count >= num_registers]
+
+    async def _probe(self, deadline: float) -> None:
+        """
+        Do a single cheap read, to determine whether the inverter is responding.
+
+        Throws if the inverter did not respond.
+        """
+
+        read_range = next(iter(self._create_read_ranges(1, is_initial_connection=False)), None)
+        if read_range is None:
+            return
+
+        start_address, num_reads = read_range
+        _LOGGER.debug(
+            "Probing %s %s: (%s, %s)",
+            self._client,
+            self._slave,
+            start_address,
+            num_reads,
+        )
+        try:
+            await self._client.read_registers(
+                start_address,
+                num_reads,
+                self._connection_type_profile.register_type,
+                self._slave,
+                num_retries=_NUM_PROBE_RETRIES,
+                deadline=deadline,
             )
+        except ModbusClientFailedError as ex:
+            # The inverter is there, it just doesn't like this register. That's good enough for us
+            if not ex.is_illegal_address:
+                raise
 
+    # List of (start address, [read values starting at that address])
+    async def _read_all_registers(self, deadline: float) -> list[tuple[int, Iterable[int | None]]]:
         read_values: list[tuple[int, Iterable[int | None]]] = []
 
-        read_ranges = self._create_read_ranges(
-            self._max_read, is_initial_connection=self._connection_state != ConnectionState.CONNECTED
+        is_initial_connection = (
+            self._connection_state != ConnectionState.CONNECTED or self._deferred_initial_connection_reads
+        )
+        with TRACER.span("create_read_ranges"):
+            read_ranges = self._create_read_ranges(self._max_read, is_initial_connection=is_initial_connection)
+        if len(read_ranges) == 0:
+            return read_values
+
+        # If the previous poll ran out of time, start with the ranges which it didn't get to
+        offset = self._read_range_offset % len(read_ranges)
+        self._read_range_offset = 0
+        self._deferred_initial_connection_reads = False
+
+        with TRACER.span(
+            "read_all_registers", num_ranges=len(read_ranges), is_initial_connection=is_initial_connection
+        ):
+            for i, (start_address, num_reads) in enumerate(read_ranges[offset:] + read_ranges[:offset]):
+                try:
+                    await self._read_range(start_address, num_reads, deadline, read_values)
+                except ModbusClientDeadlineExceededError:
+                    # If we didn't manage to read anything at all, count that as a failed poll. Start from the same
+                    # place next time
+                    if i == 0:
+                        self._read_range_offset = offset
+                        self._deferred_initial_connection_reads = is_initial_connection
+                        raise
+                    _LOGGER.debug(
+                        "Poll deadline reached on %s %s: deferring %s of %s read ranges to the next poll",
+                        self._client,
+                        self._slave,
+                        len(read_ranges) - i,
+                        len(read_ranges),
+                    )
+                    self._read_range_offset = (offset + i) % len(read_ranges)
+                    self._deferred_initial_connection_reads = is_initial_connection
+                    self._poll_metrics.num_deferred_polls += 1
+                    break
+
+        return read_values
+
+    async def _read_range(
+        self,
+        start_address: int,
+        num_reads: int,
+        deadline: float,
+        read_values: list[tuple[int, Iterable[int | None]]],
+    ) -> None:
+        """Reads the given range, adding the results to read_values"""
+
+        _LOGGER.debug(
+            "Reading addresses on %s %s: (%s, %s)",
+            self._client,
+            self._slave,
+            start_address,
+            num_reads,
         )
-        for start_address, num_reads in read_ranges:
+        try:
+            await self._read_range_once(start_address, num_reads, deadline, read_values)
+        except ModbusClientFailedError as ex:
+            if not ex.is_illegal_address:
+                raise
+
+            _LOGGER.debug(
+                "IllegalAddress when polling %s %s: %s. Bisecting to find the invalid registers...",
+                self._client,
+                self._slave,
+                ex.response,
+            )
+
+            # Right, at least one of this range failed. Split it in half, and keep splitting any halves which fail,
+            # until we've narrowed it down to the invalid registers. This takes O(k log n) reads for k invalid
+            # registers, rather than n reads if we tried each register individually
+            valid_ranges: list[tuple[int, int]] = []
+            await self._split_failed_range(start_address, num_reads, deadline, read_values, valid_ranges)
+
+            # We've added the invalid registers to _detected_invalid_ranges. That invalidates the cached read ranges,
+            # and the planner won't read across them again, so the next poll reads the valid parts of this range
+            # without bisecting
             _LOGGER.debug(
-                "Reading addresses on %s %s: (%s, %s)",
+                "%s %s: valid ranges in (%s, %s) are %s",
                 self._client,
                 self._slave,
                 start_address,
                 num_reads,
+                valid_ranges,
             )
-            try:
-                reads = await self._client.read_registers(
-                    start_address,
-                    num_reads,
-                    self._connection_type_profile.register_type,
-                    self._slave,
-                )
-                read_values.append((start_address, reads))
 
-            except ModbusClientFailedError as ex:
-                if not _is_illegal_address(ex):
-                    raise
+    async def _bisect_range(
+        self,
+        start_address: int,
+        num_reads: int,
+        deadline: float,
+        read_values: list[tuple[int, Iterable[int | None]]],
+        valid_ranges: list[tuple[int, int]],
+    ) -> None:
+        """
+        Reads part of a range which returned IllegalAddress, recursively splitting it to find the invalid registers.
 
-                _LOGGER.debug(
-                    "IllegalAddress when polling %s %s: %s. Trying each register individually...",
-                    self._client,
-                    self._slave,
-                    ex.response,
-                )
+        Adds the results to read_values, and the ranges which could be read to valid_ranges.
+        """
 
-                # Right, at least one of this range failed. Find out what it wasn't happy with, and read the others
-                for i in range(num_reads):
-                    address = start_address + i
+        if num_reads == 0:
+            return
 
-                    _LOGGER.debug(
-                        "Reading single address on %s %s: (%s)",
-                        self._client,
-                        self._slave,
-                        address,
-                    )
-                    try:
-                        read = await self._client.read_registers(
-                            address, 1, self._connection_type_profile.register_type, self._slave
-                        )
-                        assert len(read) == 1
-                        read_values.append((address, read))
-                    except ModbusClientFailedError as ex:
-                        if not _is_illegal_address(ex):
-                            raise
-
-                        _LOGGER.warning(
-                            "%s %s: register %s is invalid",
-                            self._client,
-                            self._slave,
-                            address,
-                        )
-                        self._detected_invalid_ranges.add(address)
-                        # Record None at this address, so the sensor gets an 'Unavailable' value
-                        read_values.append((address, [None]))
+        try:
+            await self._read_range_once(start_address, num_reads, deadline, read_values)
+            valid_ranges.append((start_address, num_reads))
+            return
+        except ModbusClientFailedError as ex:
+            if not ex.is_illegal_address:
+                raise
 
-        return read_values
+        await self._split_failed_range(start_address, num_reads, deadline, read_values, valid_ranges)
+
+    async def _split_failed_range(
+        self,
+        start_address: int,
+        num_reads: int,
+        deadline: float,
+        read_values: list[tuple[int, Iterable[int | None]]],
+        valid_ranges: list[tuple[int, int]],
+    ) -> None:
+        """
+        Handles a range which has just returned IllegalAddress. If it's a single register, that register is invalid.
+        Otherwise, bisect each half.
+        """
+
+        if num_reads > 1:
+            mid = num_reads // 2
+            await self._bisect_range(start_address, mid, deadline, read_values, valid_ranges)
+            await self._bisect_range(start_address + mid, num_reads - mid, deadline, read_values, valid_ranges)
+            return
+
+        _LOGGER.warning(
+            "%s %s: register %s is invalid",
+            self._client,
+            self._slave,
+            start_address,
+        )
+        self._detected_invalid_ranges.add(start_address)
+        # Record None at this address, so the sensor gets an 'Unavailable' value
+        read_values.append((start_address, [None]))
+
+    async def _read_range_once(
+        self,
+        start_address: int,
+        num_reads: int,
+        deadline: float,
+        read_values: list[tuple[int, Iterable[int | None]]],
+    ) -> None:
+        started_at = time.monotonic()
+        reads = await self._client.read_registers(
+            start_address,
+            num_reads,
+            self._connection_type_profile.register_type,
+            self._slave,
+            deadline=deadline,
+        )
+        self._poll_metrics.range_latency.record(time.monotonic() - started_at)
+        read_values.append((start_address, reads))
 
     def register_modbus_entity(self, listener: ModbusControllerEntity) -> None:
         self._update_listeners.add(listener)
+        if isinstance(listener, Entity) and listener.entity_id is not None:
+            self._entities_by_id[listener.entity_id] = listener
+        self._notify_order = None
         for address in listener.addresses:
             assert not self._connection_type_profile.overlaps_invalid_range(address, address), (
                 f"Entity {listener} address {address} overlaps an invalid range in "
                 f"{self._connection_type_profile.special_registers.invalid_register_ranges}"
             )
             if address not in self._data:
-                self._data[address] = RegisterValue(poll_type=listener.register_poll_type)
+                self._data[address] = RegisterValue(
+                    poll_type=listener.register_poll_type, read_value=self._warm_read_values.pop(address, None)
+                )
+                self._read_ranges_cache.clear()
+                self._dataflow.invalidate([address])
+                self._generation += 1
+                # If we skipped the reads done on connection because we took over from another controller, make sure
+                # we still read anything which it didn't
+                if (
+                    listener.register_poll_type == RegisterPollType.ON_CONNECTION
+                    and self._connection_state == ConnectionState.CONNECTED
+                    and self._data[address].read_value is None
+                ):
+                    self._deferred_initial_connection_reads = True
             else:
                 # We could handle this (removing gets harder), but it shouldn't happen in practice anyway
                 assert self._data[address].poll_type == listener.register_poll_type
 
     def remove_modbus_entity(self, listener: ModbusControllerEntity) -> None:
         self._update_listeners.discard(listener)
+        if isinstance(listener, Entity) and self._entities_by_id.get(listener.entity_id) is listener:
+            del self._entities_by_id[listener.entity_id]
+        self._notify_order = None
         # If this was the only entity listening on this address, remove it from self._data
         other_addresses = {address for entity in self._update_listeners for address in entity.addresses}
         for address in listener.addresses:
             if address not in other_addresses and address in self._data:
                 del self._data[address]
+                self._read_ranges_cache.clear()
+                self._dataflow.invalidate([address])
+                self._generation += 1
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def dataflow(self) -> DataflowGraph:
+        return self._dataflow
+
+    def get_modbus_entity(self, entity_id: str) -> ModbusControllerEntity | None:
+        return self._entities_by_id.get(entity_id)
+
+    def _get_notify_order(self) -> list[ModbusControllerEntity]:
+        """Orders the listeners so that each comes after any entities which its value is computed from"""
+        if self._notify_order is None:
+            order: list[ModbusControllerEntity] = []
+            # Listener -> whether we've finished visiting it (False if we're still visiting its sources)
+            visited: dict[ModbusControllerEntity, bool] = {}
+
+            def visit(listener: ModbusControllerEntity) -> None:
+                if listener in visited:
+                    if not visited[listener]:
+                        _LOGGER.warning("Entity %s is computed from itself", listener)
+                    return
+                visited[listener] = False
+                for entity_id in listener.source_entity_ids:
+                    source = self._entities_by_id.get(entity_id)
+                    if source is not None and source in self._update_listeners:
+                        visit(source)
+                visited[listener] = True
+                order.append(listener)
+
+            for listener in self._update_listeners:
+                visit(listener)
+            self._notify_order = order
+        return self._notify_order
 
     def _notify_update(self, changed_addresses: set[int]) -> None:
         """Notify listeners"""
-        for listener in self._update_listeners:
-            listener.update_callback(changed_addresses)
+        with TRACER.span(
+            "notify_update", num_addresses=len(changed_addresses), num_listeners=len(self._update_listeners)
+        ):
+            self._generation += 1
+            self._dataflow.invalidate(changed_addresses)
+            for listener in self._get_notify_order():
+                listener.update_callback(changed_addresses)
+
+    def add_poll_complete_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """
+        Adds a listener which is called after each successful poll, once every entity has been updated. Unlike entity
+        updates, this isn't called after writes.
+
+        :returns: A function which removes the listener
+        """
+        self._poll_complete_listeners.append(listener)
+        return lambda: self._poll_complete_listeners.remove(listener)
+
+    def _notify_poll_complete(self) -> None:
+        """Notify poll complete listeners"""
+        for listener in self._poll_complete_listeners:
+            listener()
 
     async def _notify_is_connected_changed(self, is_connected: bool) -> None:
         """Notify listeners that the availability states of the inverter changed"""
@@ -590,10 +1266,23 @@ class ModbusController(EntityController, UnloadController):
             await self._remote_control_manager.became_connected_callback()
 
     @staticmethod
-    async def autodetect(client: ModbusClient, slave: int, adapter_config: dict[str, Any]) -> tuple[str, str]:
+    async def autodetect(
+        client: ModbusClient,
+        slave: int,
+        adapter_config: dict[str, Any],
+        *,
+        deadline: float | None = None,
+        log_failure: bool = True,
+        close_client: bool = True,
+    ) -> tuple[str, str]:
         """
         Attempts to auto-detect the inverter type at the other end of the given connection
 
+        :param deadline: Time (from time.monotonic()) by which autodetection must complete, or None for no deadline
+        :param log_failure: Whether to log if autodetection fails. Turn this off when probing addresses which might not
+            have an inverter
+        :param close_client: Whether to close the client when done. Turn this off to probe several slaves on the same
+            connection, and close it afterwards
         :returns: Tuple of (inverter type name e.g. "H1", inverter full name e.g. "H1-3.7-E")
         """
         # Annoyingly pymodbus logs the important stuff to its logger, and doesn't add that info to the exceptions it
@@ -620,6 +1309,7 @@ class ModbusController(EntityController, UnloadController):
                         min(adapter_config[MAX_READ], _MODEL_LENGTH - len(register_values)),
                         RegisterType.HOLDING,
                         slave,
+                        deadline=deadline,
                     )
                 )
                 start_address += adapter_config[MAX_READ]
@@ -654,11 +1344,15 @@ class ModbusController(EntityController, UnloadController):
             _LOGGER.error("Did not recognise inverter model '%s' (%s)", full_model, register_values)
             raise UnsupportedInverterError(full_model)
         except Exception as ex:
-            _LOGGER.exception("Autodetect: failed to connect to (%s)", client)
+            if log_failure:
+                _LOGGER.exception("Autodetect: failed to connect to (%s)", client)
+            else:
+                _LOGGER.debug("Autodetect: failed to connect to (%s) slave %s: %s", client, slave, ex)
             raise AutoconnectFailedError(spy_handler.records) from ex
         finally:
             pymodbus_logger.removeHandler(spy_handler)
-            await client.close()
+            if close_client:
+                await client.close()
 
 
 class _SpyHandler(logging.Handler):
@@ -270,6 +270,9 @@ class RemoteControlManager(EntityRemoteControlManager, ModbusControllerEntity):
         await self._write_active_power(export_power)
 
     async def _enable_remote_control(self, fallback_work_mode: WorkMode) -> None:
+        # List of (address, value). The controller skips any writes which wouldn't change anything
+        writes: list[tuple[int, int]] = []
+
         # We set a fallback work mode so that the inverter still does "roughly" the right thing if we disconnect
         # (This might not be available, e.g. on H1 LAN)
         if (
@@ -277,10 +280,9 @@ class RemoteControlManager(EntityRemoteControlManager, ModbusControllerEntity):
             and self._addresses.work_mode is not None
             and self._addresses.work_mode_map is not None
         ):
-            fallback_work_mode_value = self._addresses.work_mode_map[fallback_work_mode]
-            current_work_mode = self._read(self._addresses.work_mode, signed=False)
-            if current_work_mode != fallback_work_mode_value:
-                await self._controller.write_register(self._addresses.work_mode, fallback_work_mode_value)
+            writes.append((self._addresses.work_mode, self._addresses.work_mode_map[fallback_work_mode]))
+
+        await self._controller.write_batch(writes)
 
         if not self._remote_control_enabled:
             self._remote_control_enabled = True
@@ -300,16 +302,17 @@ class RemoteControlManager(EntityRemoteControlManager, ModbusControllerEntity):
             self._remote_control_enabled = False
             await self._controller.write_register(self._addresses.remote_enable, 0)
 
+        writes: list[tuple[int, int]] = []
+
         # This might not be available, e.g. on H1 LAN
         if (
             work_mode is not None
             and self._addresses.work_mode is not None
             and self._addresses.work_mode_map is not None
         ):
-            current_work_mode = self._read(self._addresses.work_mode, signed=False)
-            work_mode_value = self._addresses.work_mode_map[work_mode]
-            if current_work_mode != work_mode_value:
-                await self._controller.write_register(self._addresses.work_mode, work_mode_value)
+            writes.append((self._addresses.work_mode, self._addresses.work_mode_map[work_mode]))
+
+        await self._controller.write_batch(writes)
 
     def _read(self, address: list[int] | int | None, signed: bool) -> int | None:
         if address is None:
@@ -10,6 +10,8 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .common.types import HassData
 from .const import DOMAIN
 from .entities.connection_status_sensor import ConnectionStatusSensor
+from .entities.poll_metrics_sensor import POLL_METRICS_SENSORS
+from .entities.poll_metrics_sensor import PollMetricsSensor
 from .inverter_profiles import create_entities
 
 _LOGGER = logging.getLogger(__package__)
@@ -23,4 +25,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_d
 
     for controller in controllers:
         async_add_devices([ConnectionStatusSensor(controller)])
+        async_add_devices([PollMetricsSensor(controller, description) for description in POLL_METRICS_SENSORS])
         async_add_devices(create_entities(SensorEntity, controller))
+
+    site_aggregator = hass_data[entry.entry_id].get("site_aggregator")
+    if site_aggregator is not None:
+        async_add_devices(site_aggregator.create_entities())
@@ -0,0 +1,96 @@
+"""Defines the service to calibrate max_read"""
+
+import copy
+import logging
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.core import ServiceCall
+from homeassistant.core import ServiceResponse
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+
+from ..common.types import HassData
+from ..const import DOMAIN
+from ..const import HOST
+from ..const import INVERTERS
+from ..const import MODBUS_SLAVE
+from ..max_read_calibration import CalibrationFailedError
+from ..max_read_calibration import calibrate_max_read
+from ..modbus_controller import ModbusController
+from .utils import get_controller_from_friendly_name_or_device_id
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+_CALIBRATE_SCHEMA = vol.Schema(
+    {
+        # Let the value to this be omitted, instead of forcing them to specify ''
+        vol.Required("inverter", description="Inverter"): vol.Any(cv.string, None),
+        vol.Optional("apply", default=False, description="Apply"): cv.boolean,
+    }
+)
+
+
+def register(hass: HomeAssistant, controllers: list[ModbusController]) -> None:
+    """Register the service with hass"""
+
+    async def _callback(service_data: ServiceCall) -> ServiceResponse:
+        return await hass.async_create_task(_calibrate_service(controllers, service_data, hass))
+
+    hass.services.async_register(
+        DOMAIN,
+        "calibrate_max_read",
+        _callback,
+        _CALIBRATE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def _calibrate_service(
+    controllers: list[ModbusController],
+    service_data: ServiceCall,
+    hass: HomeAssistant,
+) -> ServiceResponse:
+    """Calibrate service"""
+    controller = get_controller_from_friendly_name_or_device_id(service_data.data.get("inverter"), controllers, hass)
+
+    try:
+        result = await calibrate_max_read(controller)
+    except CalibrationFailedError as ex:
+        raise HomeAssistantError(f"Unable to calibrate max read: {ex}") from ex
+
+    _LOGGER.info("Calibrated max read for %s: %s", controller.client, result.as_dict())
+
+    if service_data.data["apply"]:
+        entry, inverter_id = _find_config_entry_and_inverter_id(hass, controller)
+        # We must not mutate entry.options. This will cause the entry to be reloaded
+        options = copy.deepcopy(dict(entry.options))
+        result.apply_to_options(options.setdefault(INVERTERS, {}).setdefault(inverter_id, {}))
+        hass.config_entries.async_update_entry(entry, options=options)
+
+    if service_data.return_response:
+        return result.as_dict()
+
+    return None
+
+
+def _find_config_entry_and_inverter_id(hass: HomeAssistant, controller: ModbusController) -> tuple[ConfigEntry, str]:
+    hass_data: HassData = hass.data[DOMAIN]
+    for entry_id, entry_data in hass_data.items():
+        if controller not in entry_data["controllers"]:
+            continue
+
+        entry = hass.config_entries.async_get_entry(entry_id)
+        assert entry is not None
+        for inverter_id, inverter in entry.data[INVERTERS].items():
+            combined: dict[str, Any] = {**inverter, **entry.options.get(INVERTERS, {}).get(inverter_id, {})}
+            if (
+                combined[HOST] == controller.inverter_details[HOST]
+                and combined[MODBUS_SLAVE] == controller.inverter_details[MODBUS_SLAVE]
+            ):
+                return entry, inverter_id
+
+    raise HomeAssistantError(f"Unable to find the configuration for {controller.client}")
@@ -0,0 +1,125 @@
+"""Defines the service to profile the integration"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import re
+from pathlib import Path
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant
+from homeassistant.core import ServiceCall
+from homeassistant.core import ServiceResponse
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from ..common.stack_sampler import StackSampler
+from ..const import DOMAIN
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+_MAX_DURATION_SECS = 600
+_SAMPLE_INTERVAL_SECS = 0.01
+# cProfile records everything running on the event loop. Only report functions from this integration (including the
+# vendored pymodbus)
+_CPROFILE_FILTER = re.escape(str(Path(__file__).parent.parent))
+
+_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required("duration", description="Duration"): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=_MAX_DURATION_SECS)
+        ),
+        vol.Optional("mode", default="sample", description="Mode"): vol.In(["sample", "cprofile"]),
+    }
+)
+
+_profile_lock = asyncio.Lock()
+
+
+def register(hass: HomeAssistant) -> None:
+    """Register the service with hass"""
+
+    async def _callback(service_data: ServiceCall) -> ServiceResponse:
+        return await hass.async_create_task(_profile_service(service_data, hass))
+
+    hass.services.async_register(
+        DOMAIN,
+        "profile",
+        _callback,
+        _PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def _profile_service(service_data: ServiceCall, hass: HomeAssistant) -> ServiceResponse:
+    """Profile service"""
+
+    if _profile_lock.locked():
+        raise HomeAssistantError("A profile is already being recorded")
+
+    duration = service_data.data["duration"]
+    mode = service_data.data["mode"]
+    timestamp = dt_util.now().strftime("%Y%m%d_%H%M%S")
+
+    async with _profile_lock:
+        if mode == "sample":
+            path = hass.config.path(f"foxess_modbus_profile_{timestamp}.collapsed")
+            await _sample(hass, duration, path)
+        else:
+            path = hass.config.path(f"foxess_modbus_profile_{timestamp}.txt")
+            await _cprofile(hass, duration, path)
+
+    _LOGGER.info("Profile written to %s", path)
+
+    if service_data.return_response:
+        return {"path": path}
+
+    return None
+
+
+async def _sample(hass: HomeAssistant, duration: int, path: str) -> None:
+    """Samples the stacks of all threads, recording those which are running this integration's code"""
+
+    _LOGGER.info("Sampling for %ss to %s", duration, path)
+    sampler = StackSampler(_SAMPLE_INTERVAL_SECS)
+    sampler.start()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        await hass.async_add_executor_job(sampler.stop)
+    await hass.async_add_executor_job(sampler.write_collapsed, path)
+
+
+async def _cprofile(hass: HomeAssistant, duration: int, path: str) -> None:
+    """
+    Runs cProfile on the event loop thread. This covers the controller, entities and remote control, but not pymodbus
+    calls running in the executor.
+
+    The profiler sees all of Home Assistant, so we write a report of just this integration's functions, rather than the
+    raw stats.
+    """
+
+    _LOGGER.info("Profiling for %ss to %s", duration, path)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as ex:
+        # Raised if another profiler is already active
+        raise HomeAssistantError(f"Unable to start profiler: {ex}") from ex
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.disable()
+    await hass.async_add_executor_job(_write_cprofile_report, profiler, path)
+
+
+def _write_cprofile_report(profiler: cProfile.Profile, path: str) -> None:
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(_CPROFILE_FILTER)
+    with Path(path).open("w", encoding="utf-8") as f:
+        f.write(report.getvalue())
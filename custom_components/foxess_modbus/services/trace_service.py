@@ -0,0 +1,68 @@
+"""Defines the service to record a trace of polling activity"""
+
+import asyncio
+import logging
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant
+from homeassistant.core import ServiceCall
+from homeassistant.core import ServiceResponse
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from ..common.tracing import TRACER
+from ..common.tracing import ChromeTraceExporter
+from ..const import DOMAIN
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+_MAX_DURATION_SECS = 600
+
+_TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Required("duration", description="Duration"): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=_MAX_DURATION_SECS)
+        ),
+    }
+)
+
+
+def register(hass: HomeAssistant) -> None:
+    """Register the service with hass"""
+
+    async def _callback(service_data: ServiceCall) -> ServiceResponse:
+        return await hass.async_create_task(_trace_service(service_data, hass))
+
+    hass.services.async_register(
+        DOMAIN,
+        "trace",
+        _callback,
+        _TRACE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def _trace_service(service_data: ServiceCall, hass: HomeAssistant) -> ServiceResponse:
+    """Trace service"""
+
+    if TRACER.enabled:
+        raise HomeAssistantError("A trace is already being recorded")
+
+    duration = service_data.data["duration"]
+    path = hass.config.path(f"foxess_modbus_trace_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+    exporter = ChromeTraceExporter(path)
+    _LOGGER.info("Recording trace for %ss to %s", duration, path)
+    TRACER.add_exporter(exporter)
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        TRACER.remove_exporter(exporter)
+        await hass.async_add_executor_job(exporter.close)
+    _LOGGER.info("Trace written to %s", path)
+
+    if service_data.return_response:
+        return {"path": path}
+
+    return None
@@ -253,20 +253,9 @@ async def _set_charge_periods(controller: ModbusController, charge_periods: list
             )
         )
 
-    # We expect all of the writes to have a contiguous set of addresses
-    write_values: list[int] = [None] * len(writes)  # type: ignore
-    write_start_address = min(write[0] for write in writes)
-
-    for address, value in writes:
-        i = address - write_start_address
-        assert i < len(write_values)
-        assert write_values[i] is None
-        write_values[i] = value
-
-    assert not any(x for x in write_values if x is None)
-
     try:
-        await controller.write_registers(write_start_address, write_values)
+        # The controller coalesces these into as few writes as possible (normally a single write)
+        await controller.write_batch(writes)
     except ModbusIOException as ex:
         _LOGGER.warning(ex, exc_info=True)
         raise HomeAssistantError() from ex
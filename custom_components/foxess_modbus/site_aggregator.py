@@ -0,0 +1,152 @@
+"""Computes totals across all of the inverters in a config entry"""
+
+import functools
+import logging
+from datetime import datetime
+from typing import Callable
+from typing import Iterator
+
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.const import Platform
+from homeassistant.util import dt as dt_util
+
+from .common.entity_controller import ModbusControllerEntity
+from .entities.modbus_entity_mixin import get_entity_id
+from .entities.modbus_sensor import ModbusSensor
+from .entities.site_total_sensor import SITE_TOTAL_SENSORS
+from .entities.site_total_sensor import SiteTotalSensor
+from .modbus_controller import ModbusController
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _ControllerListener(ModbusControllerEntity):
+    """Registered with each controller, so that the aggregator hears when its availability changes"""
+
+    def __init__(self, aggregator: "SiteAggregator") -> None:
+        self._aggregator = aggregator
+
+    @property
+    def addresses(self) -> list[int]:
+        return []
+
+    def update_callback(self, _changed_addresses: set[int]) -> None:
+        # This is also called after writes. We only publish totals after polls
+        pass
+
+    def is_connected_changed_callback(self) -> None:
+        self._aggregator.is_connected_changed()
+
+
+class SiteAggregator:
+    """
+    Sums values across the controllers for a config entry, and publishes them through SiteTotalSensors.
+
+    Values are taken from each controller's sensors (before any rounding), rather than from HA's state. All of the
+    totals are published together, once every connected controller has completed a poll since the last publish (or if
+    one controller polls twice before the others catch up), so that they share a timestamp. Writes don't cause a
+    publish.
+    """
+
+    def __init__(self, entry_id: str, controllers: list[ModbusController]) -> None:
+        self._entry_id = entry_id
+        self._controllers = controllers
+        self._entities: list[SiteTotalSensor] = []
+        self._listener = _ControllerListener(self)
+        # Functions which remove our poll complete listeners from the controllers, while we're listening to them
+        self._remove_poll_complete_listeners: list[Callable[[], None]] = []
+        # Controllers which have polled since we last published
+        self._updated_controllers: set[ModbusController] = set()
+        # (controller index, key) -> entity ID of the controller's sensor with that key, once it's been found
+        self._source_entity_ids: dict[tuple[int, str], str] = {}
+        self._sampled_at: datetime | None = None
+
+    @property
+    def entry_id(self) -> str:
+        return self._entry_id
+
+    @property
+    def sampled_at(self) -> datetime | None:
+        """When the totals were last published"""
+        return self._sampled_at
+
+    def create_entities(self) -> list[SiteTotalSensor]:
+        return [SiteTotalSensor(self, description) for description in SITE_TOTAL_SENSORS]
+
+    def add_entity(self, entity: SiteTotalSensor) -> None:
+        """Called when a SiteTotalSensor is added to hass. We only listen to the controllers while there are any"""
+        self._entities.append(entity)
+        if len(self._remove_poll_complete_listeners) == 0:
+            for controller in self._controllers:
+                controller.register_modbus_entity(self._listener)
+                self._remove_poll_complete_listeners.append(
+                    controller.add_poll_complete_listener(functools.partial(self.controller_updated, controller))
+                )
+
+    def remove_entity(self, entity: SiteTotalSensor) -> None:
+        self._entities.remove(entity)
+        if len(self._entities) == 0:
+            for controller, remove_poll_complete_listener in zip(
+                self._controllers, self._remove_poll_complete_listeners, strict=True
+            ):
+                controller.remove_modbus_entity(self._listener)
+                remove_poll_complete_listener()
+            self._remove_poll_complete_listeners.clear()
+
+    def controller_updated(self, controller: ModbusController) -> None:
+        """Called when a controller has completed a poll"""
+        # If this controller has already polled since we last published, the others are lagging: don't wait for them
+        is_repeat = controller in self._updated_controllers
+        self._updated_controllers.add(controller)
+        if is_repeat or all(c in self._updated_controllers or not c.is_connected for c in self._controllers):
+            self._publish()
+
+    def is_connected_changed(self) -> None:
+        for entity in self._entities:
+            entity.schedule_update_ha_state()
+
+    def is_available(self, key: str) -> bool:
+        """Whether any of the controllers' sensors with the given key are available"""
+        return any(source.available for source in self._get_sources(key))
+
+    def total(self, key: str) -> float | None:
+        """
+        Sums the values of each controller's sensor with the given key.
+
+        Controllers without that sensor (because their inverter doesn't support it, or it's disabled), or where it's
+        unavailable (e.g. because the inverter is offline), are skipped. If any other sensor doesn't have a value, the
+        total is unknown.
+        """
+        values: list[float] = []
+        for source in self._get_sources(key):
+            if not source.available:
+                continue
+            value = source.raw_native_value if isinstance(source, ModbusSensor) else source.native_value
+            if not isinstance(value, int | float) or isinstance(value, bool):
+                return None
+            values.append(float(value))
+
+        return sum(values) if len(values) > 0 else None
+
+    def _get_sources(self, key: str) -> Iterator[SensorEntity]:
+        for i, controller in enumerate(self._controllers):
+            source = self._get_source(i, controller, key)
+            if source is not None:
+                yield source
+
+    def _get_source(self, index: int, controller: ModbusController, key: str) -> SensorEntity | None:
+        entity_id = self._source_entity_ids.get((index, key))
+        if entity_id is None:
+            # We don't cache misses: the entity might not have been registered yet, or might be enabled later
+            entity_id = get_entity_id(controller, Platform.SENSOR, key)
+        source = controller.get_modbus_entity(entity_id)
+        if not isinstance(source, SensorEntity):
+            return None
+        self._source_entity_ids[(index, key)] = entity_id
+        return source
+
+    def _publish(self) -> None:
+        self._updated_controllers.clear()
+        self._sampled_at = dt_util.utcnow()
+        for entity in self._entities:
+            entity.totals_updated()
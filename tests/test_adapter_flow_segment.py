@@ -0,0 +1,101 @@
+from typing import Any
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.foxess_modbus.common.types import RegisterType
+from custom_components.foxess_modbus.const import TCP
+from custom_components.foxess_modbus.flow.adapter_flow_segment import AdapterFlowSegment
+from custom_components.foxess_modbus.flow.inverter_data import InverterData
+from custom_components.foxess_modbus.inverter_adapters import ADAPTERS
+from custom_components.foxess_modbus.vendor.pymodbus import ConnectionException
+from custom_components.foxess_modbus.vendor.pymodbus import ModbusIOException
+
+_MODEL = "H1-5.0-E"
+
+
+class _FakeClient:
+    """Client for a host with inverters on some slave IDs. Counts how many times it connects and is closed"""
+
+    def __init__(self, slaves: set[int], *, reachable: bool = True) -> None:
+        self.slaves = slaves
+        self.reachable = reachable
+        self.is_connected = False
+        self.num_connects = 0
+        self.num_closes = 0
+        self.probed_slaves: list[int] = []
+
+    async def read_registers(
+        self, start_address: int, num_registers: int, register_type: RegisterType, slave: int, **_kwargs: Any
+    ) -> list[int]:
+        assert register_type == RegisterType.HOLDING
+        if start_address == 30000:
+            self.probed_slaves.append(slave)
+        if not self.reachable:
+            raise ConnectionException("Unable to connect")
+        if not self.is_connected:
+            self.is_connected = True
+            self.num_connects += 1
+        if slave not in self.slaves:
+            raise ModbusIOException("No response")
+        model = [ord(x) for x in _MODEL] + [0] * 15
+        return model[start_address - 30000 : start_address - 30000 + num_registers]
+
+    async def close(self) -> None:
+        self.is_connected = False
+        self.num_closes += 1
+
+
+async def _with_default_form(
+    body: Any, user_input: dict[str, Any] | None, step_id: str, *_args: Any, **_kwargs: Any
+) -> Any:
+    if user_input is None:
+        return {"step_id": step_id}
+    return await body(user_input)
+
+
+async def test_discovery_probes_each_host_over_one_connection(hass: HomeAssistant) -> None:
+    adapter = ADAPTERS["elfin_ew11"]
+    clients = {
+        "192.168.1.10": _FakeClient({1, 3}),
+        "192.168.1.11": _FakeClient({2}),
+        "192.168.1.12": _FakeClient(set(), reachable=False),
+    }
+
+    def create_client(_hass: HomeAssistant, _protocol: str, _adapter: Any, params: dict[str, Any]) -> _FakeClient:
+        return clients[params["host"]]
+
+    flow = MagicMock()
+    flow.hass = hass
+    flow.with_default_form = AsyncMock(side_effect=_with_default_form)
+    on_complete = AsyncMock(return_value={"type": "complete"})
+    segment = AdapterFlowSegment(flow, InverterData(adapter=adapter), [], on_complete, allow_discovery=True)
+
+    with (
+        patch("custom_components.foxess_modbus.flow.adapter_flow_segment.ModbusClient", side_effect=create_client),
+        patch("custom_components.foxess_modbus.flow.adapter_flow_segment.async_load_protocol", AsyncMock()),
+    ):
+        result = await segment.async_step_discover(
+            {"discovery_hosts": "192.168.1.10-12", "modbus_slaves": "1-3", "protocol": TCP}
+        )
+    assert result == {"step_id": "discover_results"}
+
+    # Each host is connected to (at most) once and closed once, however many slaves are probed
+    for client in clients.values():
+        assert client.num_connects <= 1
+        assert client.num_closes == 1
+    assert clients["192.168.1.10"].probed_slaves == [1, 2, 3]
+    assert clients["192.168.1.11"].probed_slaves == [1, 2, 3]
+    # If we can't connect, we don't try the other slaves
+    assert clients["192.168.1.12"].probed_slaves == [1]
+
+    result = await segment.async_step_discover_results({"inverters": ["0", "1", "2"]})
+    assert result == {"type": "complete"}
+    found = [segment.inverter_data, *segment.additional_inverters]
+    assert [(x.host, x.modbus_slave, x.inverter_model) for x in found] == [
+        ("192.168.1.10:502", 1, _MODEL),
+        ("192.168.1.10:502", 3, _MODEL),
+        ("192.168.1.11:502", 2, _MODEL),
+    ]
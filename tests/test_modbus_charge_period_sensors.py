@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock
+
+from custom_components.foxess_modbus.common.dataflow import DataflowGraph
+from custom_components.foxess_modbus.entities.modbus_charge_period_sensors import _charge_period_node
+from custom_components.foxess_modbus.entities.validation import Range
+from custom_components.foxess_modbus.entities.validation import Time
+
+# 02:00 - 99:00. The end isn't a valid time
+_REGISTERS = {41001: 2 << 8, 41002: 99 << 8}
+
+
+def _create_controller() -> MagicMock:
+    controller = MagicMock()
+    controller.dataflow = DataflowGraph(_REGISTERS.get)
+    return controller
+
+
+def test_node_is_shared_by_entities_with_the_same_rules() -> None:
+    controller = _create_controller()
+
+    start = _charge_period_node(controller, 41001, 41002, [Time()])
+    end = _charge_period_node(controller, 41002, 41001, [Time()])
+    assert start is end
+    assert _charge_period_node(controller, 41001, 41002, [Range(0, 10)]) is _charge_period_node(
+        controller, 41001, 41002, [Range(0, 10)]
+    )
+
+
+def test_node_is_not_shared_by_entities_with_different_rules() -> None:
+    controller = _create_controller()
+
+    validated = _charge_period_node(controller, 41001, 41002, [Time()])
+    unvalidated = _charge_period_node(controller, 41001, 41002, [])
+    other_range = _charge_period_node(controller, 41001, 41002, [Range(0, 10)])
+    assert validated is not unvalidated
+    assert other_range is not _charge_period_node(controller, 41001, 41002, [Range(0, 20)])
+
+    assert validated.value.values == {41001: 2 << 8, 41002: None}
+    assert unvalidated.value.values == _REGISTERS
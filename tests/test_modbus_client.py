@@ -0,0 +1,99 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.foxess_modbus.client.modbus_client import ModbusClient
+from custom_components.foxess_modbus.client.modbus_client import ModbusClientDeadlineExceededError
+from custom_components.foxess_modbus.client.modbus_client import ModbusClientFailedError
+from custom_components.foxess_modbus.common.types import RegisterType
+from custom_components.foxess_modbus.const import TCP
+from custom_components.foxess_modbus.inverter_adapters import ADAPTERS
+from custom_components.foxess_modbus.vendor.pymodbus import ModbusIOException
+
+_DEFAULT_TIMEOUT = 3.0
+
+
+class _FakeClock:
+    """Stands in for time.monotonic, so that requests can take a long time without the test doing so"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class _TimingOutInverter:
+    """A pymodbus client for an inverter which never responds: each request takes as long as the timeout allows"""
+
+    def __init__(self, clock: _FakeClock) -> None:
+        self.clock = clock
+        self.timeouts: list[float] = []
+        self.pymodbus_client = MagicMock()
+        self.pymodbus_client.comm_params.timeout_connect = _DEFAULT_TIMEOUT
+        self.pymodbus_client.socket = None
+        self.pymodbus_client.connected = True
+        self.pymodbus_client.transaction.retries = 0
+        self.pymodbus_client.read_holding_registers.side_effect = self._read
+
+    def _read(self, *_args: Any) -> ModbusIOException:
+        timeout = self.pymodbus_client.comm_params.timeout_connect
+        self.timeouts.append(timeout)
+        self.clock.now += timeout
+        return ModbusIOException("No response received")
+
+
+@pytest.fixture
+def clock() -> Any:
+    clock = _FakeClock()
+    with patch("custom_components.foxess_modbus.client.modbus_client.time", clock):
+        yield clock
+
+
+def _create_client(hass: HomeAssistant, inverter: _TimingOutInverter) -> ModbusClient:
+    with patch(
+        "custom_components.foxess_modbus.client.modbus_client._load_client_class",
+        return_value=MagicMock(return_value=inverter.pymodbus_client),
+    ):
+        return ModbusClient(hass, TCP, ADAPTERS["elfin_ew11"], {"host": "192.168.1.10", "port": 502})
+
+
+async def test_timeout_without_deadline_is_a_failure(hass: HomeAssistant, clock: _FakeClock) -> None:
+    inverter = _TimingOutInverter(clock)
+    client = _create_client(hass, inverter)
+
+    with pytest.raises(ModbusClientFailedError):
+        await client.read_registers(11000, 10, RegisterType.HOLDING, 1)
+    assert inverter.timeouts == [_DEFAULT_TIMEOUT]
+
+
+async def test_timeout_within_deadline_is_a_failure(hass: HomeAssistant, clock: _FakeClock) -> None:
+    inverter = _TimingOutInverter(clock)
+    client = _create_client(hass, inverter)
+
+    with pytest.raises(ModbusClientFailedError):
+        await client.read_registers(11000, 10, RegisterType.HOLDING, 1, deadline=clock.now + 10)
+    assert inverter.timeouts == [_DEFAULT_TIMEOUT]
+
+
+async def test_timeout_shortened_by_deadline_exceeds_deadline(hass: HomeAssistant, clock: _FakeClock) -> None:
+    inverter = _TimingOutInverter(clock)
+    client = _create_client(hass, inverter)
+
+    with pytest.raises(ModbusClientDeadlineExceededError):
+        await client.read_registers(11000, 10, RegisterType.HOLDING, 1, deadline=clock.now + 1)
+    assert inverter.timeouts == [1]
+    # The client's own timeout is restored afterwards
+    assert inverter.pymodbus_client.comm_params.timeout_connect == _DEFAULT_TIMEOUT
+
+
+async def test_request_is_not_made_with_too_little_time_left(hass: HomeAssistant, clock: _FakeClock) -> None:
+    inverter = _TimingOutInverter(clock)
+    client = _create_client(hass, inverter)
+
+    with pytest.raises(ModbusClientDeadlineExceededError):
+        await client.read_registers(11000, 10, RegisterType.HOLDING, 1, deadline=clock.now + 0.01)
+    assert inverter.timeouts == []
@@ -0,0 +1,385 @@
+from datetime import timedelta
+from typing import Any
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed  # type: ignore[import-untyped]
+
+from custom_components.foxess_modbus.client.modbus_client import ModbusClientDeadlineExceededError
+from custom_components.foxess_modbus.client.modbus_client import ModbusClientFailedError
+from custom_components.foxess_modbus.common.entity_controller import ModbusControllerEntity
+from custom_components.foxess_modbus.common.types import ConnectionType
+from custom_components.foxess_modbus.common.types import InverterModel
+from custom_components.foxess_modbus.const import ENTITY_ID_PREFIX
+from custom_components.foxess_modbus.const import FRIENDLY_NAME
+from custom_components.foxess_modbus.const import INVERTER_BASE
+from custom_components.foxess_modbus.const import INVERTER_CONN
+from custom_components.foxess_modbus.const import INVERTER_MODEL
+from custom_components.foxess_modbus.const import UNIQUE_ID_PREFIX
+from custom_components.foxess_modbus.invalid_ranges_store import async_get_invalid_ranges_store
+from custom_components.foxess_modbus.inverter_profiles import INVERTER_PROFILES
+from custom_components.foxess_modbus.max_read_calibration import calibrate_max_read
+from custom_components.foxess_modbus.modbus_controller import InvalidRegisterRanges
+from custom_components.foxess_modbus.modbus_controller import ModbusController
+from custom_components.foxess_modbus.vendor.pymodbus import ExceptionResponse
+from custom_components.foxess_modbus.vendor.pymodbus import ModbusExceptions
+
+_POLL_RATE = 10
+_MAX_READ = 20
+
+
+class _FakeInverter:
+    """
+    Client for an inverter which returns IllegalAddress for any read which includes one of invalid_addresses, and
+    runs out of time for any read which includes one of deadline_addresses
+    """
+
+    def __init__(self, invalid_addresses: set[int]) -> None:
+        self.invalid_addresses = invalid_addresses
+        # Reads which include one of these addresses run out of time before the poll deadline
+        self.deadline_addresses: set[int] = set()
+        # (start address, count) of every read, and of every read which failed
+        self.reads: list[tuple[int, int]] = []
+        self.failed_reads: list[tuple[int, int]] = []
+        # (start address, values) of every write
+        self.writes: list[tuple[int, list[int]]] = []
+        self.client = MagicMock()
+        self.client.read_registers = AsyncMock(side_effect=self._read_registers)
+        self.client.write_registers = AsyncMock(side_effect=self._write_registers)
+
+    async def _read_registers(self, start_address: int, num_registers: int, *_args: Any, **_kwargs: Any) -> list[int]:
+        self.reads.append((start_address, num_registers))
+        if any(start_address <= address < start_address + num_registers for address in self.deadline_addresses):
+            raise ModbusClientDeadlineExceededError("Deadline exceeded")
+        if any(start_address <= address < start_address + num_registers for address in self.invalid_addresses):
+            self.failed_reads.append((start_address, num_registers))
+            raise ModbusClientFailedError(
+                "Failed to read registers",
+                self.client,
+                ExceptionResponse(0x04, ModbusExceptions.IllegalAddress),
+            )
+        return [address & 0xFFFF for address in range(start_address, start_address + num_registers)]
+
+    async def _write_registers(self, start_address: int, values: list[int], *_args: Any) -> None:
+        self.writes.append((start_address, list(values)))
+
+    def clear(self) -> None:
+        self.reads.clear()
+        self.failed_reads.clear()
+        self.writes.clear()
+
+
+class _FakeEntity(ModbusControllerEntity):
+    def __init__(self, addresses: list[int]) -> None:
+        self._addresses = addresses
+
+    @property
+    def addresses(self) -> list[int]:
+        return self._addresses
+
+    def update_callback(self, _changed_addresses: set[int]) -> None:
+        pass
+
+    def is_connected_changed_callback(self) -> None:
+        pass
+
+
+def _create_controller(hass: HomeAssistant, inverter: _FakeInverter, **kwargs: Any) -> ModbusController:
+    connection_type_profile = INVERTER_PROFILES[InverterModel.H1_G1].connection_types[ConnectionType.AUX]
+    inverter_details = {
+        INVERTER_BASE: InverterModel.H1_G1,
+        INVERTER_CONN: ConnectionType.AUX,
+        INVERTER_MODEL: "H1-5.0-E",
+        ENTITY_ID_PREFIX: "",
+        FRIENDLY_NAME: "",
+        UNIQUE_ID_PREFIX: "",
+    }
+    return ModbusController(
+        hass, inverter.client, connection_type_profile, inverter_details, 1, _POLL_RATE, _MAX_READ, **kwargs
+    )
+
+
+async def _poll(hass: HomeAssistant, inverter: _FakeInverter) -> None:
+    inverter.clear()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=_POLL_RATE))
+    await hass.async_block_till_done()
+
+
+def _reads_in(reads: list[tuple[int, int]], addresses: range) -> list[tuple[int, int]]:
+    return [read for read in reads if read[0] in addresses]
+
+
+def _ranges(*ranges: tuple[int, int]) -> InvalidRegisterRanges:
+    invalid_ranges = InvalidRegisterRanges()
+    for start, count in ranges:
+        invalid_ranges.add_range(start, count)
+    return invalid_ranges
+
+
+@pytest.mark.parametrize(
+    ("initial", "added", "expected"),
+    [
+        # Disjoint, added out of order
+        ([(10, 2)], (1, 2), [(1, 2), (10, 2)]),
+        ([(1, 2)], (10, 2), [(1, 2), (10, 2)]),
+        ([(1, 2), (20, 2)], (10, 2), [(1, 2), (10, 2), (20, 2)]),
+        # Adjacent on either side
+        ([(10, 2)], (12, 3), [(10, 5)]),
+        ([(10, 2)], (7, 3), [(7, 5)]),
+        # Filling the gap between two ranges exactly
+        ([(1, 2), (5, 2)], (3, 2), [(1, 6)]),
+        # Overlapping one end
+        ([(10, 5)], (13, 5), [(10, 8)]),
+        ([(10, 5)], (8, 3), [(8, 7)]),
+        # Already covered
+        ([(10, 5)], (11, 2), [(10, 5)]),
+        ([(10, 5)], (10, 5), [(10, 5)]),
+        # Covering several ranges
+        ([(2, 1), (5, 1), (8, 1)], (1, 10), [(1, 10)]),
+        ([(2, 1), (5, 1), (8, 1)], (3, 3), [(2, 4), (8, 1)]),
+        # Empty
+        ([(10, 2)], (20, 0), [(10, 2)]),
+    ],
+)
+def test_add_range(initial: list[tuple[int, int]], added: tuple[int, int], expected: list[tuple[int, int]]) -> None:
+    invalid_ranges = _ranges(*initial)
+    invalid_ranges.add_range(*added)
+    assert invalid_ranges.ranges == expected
+
+
+@pytest.mark.parametrize(
+    ("initial", "removed", "expected"),
+    [
+        # Not overlapping, including adjacent ranges
+        ([(10, 5)], (1, 2), [(10, 5)]),
+        ([(10, 5)], (8, 2), [(10, 5)]),
+        ([(10, 5)], (15, 2), [(10, 5)]),
+        # Splitting a range
+        ([(10, 5)], (12, 1), [(10, 2), (13, 2)]),
+        # Trimming either end
+        ([(10, 5)], (8, 4), [(12, 3)]),
+        ([(10, 5)], (13, 4), [(10, 3)]),
+        # Removing a whole range
+        ([(10, 5)], (10, 5), []),
+        ([(1, 2), (10, 5), (20, 2)], (9, 7), [(1, 2), (20, 2)]),
+        # Spanning several ranges
+        ([(1, 3), (5, 3), (9, 3)], (2, 8), [(1, 1), (10, 2)]),
+        # Empty
+        ([(10, 5)], (12, 0), [(10, 5)]),
+    ],
+)
+def test_remove_range(
+    initial: list[tuple[int, int]], removed: tuple[int, int], expected: list[tuple[int, int]]
+) -> None:
+    invalid_ranges = _ranges(*initial)
+    invalid_ranges.remove_range(*removed)
+    assert invalid_ranges.ranges == expected
+
+
+def test_add_all_coalesces_runs() -> None:
+    invalid_ranges = _ranges((20, 1))
+    invalid_ranges.add_all([5, 3, 4, 10, 21, 4])
+    assert invalid_ranges.ranges == [(3, 3), (10, 1), (20, 2)]
+
+
+def test_version_only_changes_when_set_changes() -> None:
+    invalid_ranges = _ranges((10, 5))
+    version = invalid_ranges.version
+
+    invalid_ranges.add_range(11, 2)
+    invalid_ranges.remove_range(1, 2)
+    assert invalid_ranges.version == version
+
+    invalid_ranges.add(20)
+    assert invalid_ranges.version != version
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "expected"),
+    [
+        (1, 9, False),
+        (1, 10, True),
+        (12, 12, True),
+        (14, 19, True),
+        (15, 19, False),
+        (15, 20, True),
+        (1, 100, True),
+        (21, 100, False),
+    ],
+)
+def test_overlaps(start: int, end: int, expected: bool) -> None:
+    invalid_ranges = _ranges((10, 5), (20, 1))
+    assert invalid_ranges.overlaps(start, end) == expected
+    assert any(address in invalid_ranges for address in range(start, end + 1)) == expected
+
+
+async def test_second_poll_reads_around_bisected_invalid_registers(hass: HomeAssistant) -> None:
+    # 11063 isn't used by any entity, but the first poll reads across it
+    inverter = _FakeInverter(invalid_addresses={11063})
+    controller = _create_controller(hass, inverter)
+    controller.register_modbus_entity(_FakeEntity([11060, 11061, 11065, 11066]))
+    try:
+        await _poll(hass, inverter)
+        assert _reads_in(inverter.failed_reads, range(11060, 11070)) == [(11060, 7), (11063, 4), (11063, 2), (11063, 1)]
+        assert controller.read(11065, signed=False) == 11065
+
+        await _poll(hass, inverter)
+        assert inverter.failed_reads == []
+        assert _reads_in(inverter.reads, range(11060, 11070)) == [(11060, 2), (11065, 2)]
+        assert controller.read(11065, signed=False) == 11065
+    finally:
+        controller.unload()
+
+
+async def test_stored_invalid_ranges_are_not_read(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    hass_storage["foxess_modbus.invalid_registers"] = {
+        "version": 1,
+        "data": {"H1-5.0-E_AUX_latest": [[11063, 1]]},
+    }
+    invalid_ranges_store = await async_get_invalid_ranges_store(hass)
+
+    inverter = _FakeInverter(invalid_addresses={11063})
+    controller = _create_controller(hass, inverter, invalid_ranges_store=invalid_ranges_store)
+    controller.register_modbus_entity(_FakeEntity([11060, 11061, 11065, 11066]))
+    try:
+        await _poll(hass, inverter)
+        assert inverter.failed_reads == []
+        assert _reads_in(inverter.reads, range(11060, 11070)) == [(11060, 2), (11065, 2)]
+    finally:
+        controller.unload()
+
+
+async def test_warm_state_invalid_ranges_are_not_read(hass: HomeAssistant) -> None:
+    inverter = _FakeInverter(invalid_addresses={11063})
+    previous_controller = _create_controller(hass, inverter)
+    previous_controller.register_modbus_entity(_FakeEntity([11060, 11061, 11065, 11066]))
+    try:
+        await _poll(hass, inverter)
+        assert len(inverter.failed_reads) > 0
+        warm_state = previous_controller.warm_state()
+    finally:
+        previous_controller.unload()
+
+    controller = _create_controller(hass, inverter, warm_state=warm_state)
+    controller.register_modbus_entity(_FakeEntity([11060, 11061, 11065, 11066]))
+    try:
+        await _poll(hass, inverter)
+        assert inverter.failed_reads == []
+        assert _reads_in(inverter.reads, range(11060, 11070)) == [(11060, 2), (11065, 2)]
+    finally:
+        controller.unload()
+
+
+async def test_invalid_single_register_is_not_read_twice(hass: HomeAssistant) -> None:
+    inverter = _FakeInverter(invalid_addresses={11063})
+    controller = _create_controller(hass, inverter)
+    controller.register_modbus_entity(_FakeEntity([11063]))
+    try:
+        await _poll(hass, inverter)
+        assert _reads_in(inverter.reads, range(11060, 11070)) == [(11063, 1)]
+        assert controller.read(11063, signed=False) is None
+    finally:
+        controller.unload()
+
+
+async def test_ranges_after_deadline_are_deferred_to_next_poll(hass: HomeAssistant) -> None:
+    inverter = _FakeInverter(invalid_addresses=set())
+    inverter.deadline_addresses = {11090}
+    controller = _create_controller(hass, inverter)
+    controller.register_modbus_entity(_FakeEntity([11060, 11090]))
+    try:
+        await _poll(hass, inverter)
+        assert inverter.reads[-2:] == [(11060, 1), (11090, 1)]
+        # The ranges read before the deadline aren't thrown away
+        assert controller.read(11060, signed=False) == 11060
+        assert controller.read(11090, signed=False) is None
+
+        # The next poll starts with the range which ran out of time, then wraps around
+        inverter.deadline_addresses.clear()
+        await _poll(hass, inverter)
+        assert inverter.reads[:3] == [(11090, 1), (41000, 11), (44012, 1)]
+        assert inverter.reads[-1] == (11060, 1)
+        assert controller.read(11090, signed=False) == 11090
+    finally:
+        controller.unload()
+
+
+async def test_poll_which_runs_out_of_time_immediately_keeps_its_place(hass: HomeAssistant) -> None:
+    inverter = _FakeInverter(invalid_addresses=set())
+    inverter.deadline_addresses = {11090}
+    controller = _create_controller(hass, inverter)
+    controller.register_modbus_entity(_FakeEntity([11060, 11090]))
+    try:
+        await _poll(hass, inverter)
+        # This poll runs out of time on its first range, so it fails without reading anything
+        await _poll(hass, inverter)
+        assert inverter.reads == [(11090, 1)]
+
+        inverter.deadline_addresses.clear()
+        await _poll(hass, inverter)
+        assert inverter.reads[0] == (11090, 1)
+        assert controller.read(11090, signed=False) == 11090
+    finally:
+        controller.unload()
+
+
+async def test_valid_read_ranges_include_gaps_read_by_polls(hass: HomeAssistant) -> None:
+    inverter = _FakeInverter(invalid_addresses=set())
+    controller = _create_controller(hass, inverter)
+    controller.register_modbus_entity(_FakeEntity([11060, 11061, 11065, 11066]))
+    try:
+        assert controller.find_valid_read_ranges(1) == []
+        await _poll(hass, inverter)
+        assert (11060, 7) in _reads_in(inverter.reads, range(11060, 11070))
+        assert (11060, 7) in controller.find_valid_read_ranges(7)
+        assert controller.find_valid_read_ranges(12) == []
+    finally:
+        controller.unload()
+
+
+async def test_calibration_does_not_lower_max_read_when_it_runs_out_of_ranges(hass: HomeAssistant) -> None:
+    inverter = _FakeInverter(invalid_addresses=set())
+    inverter.client.metrics.request_latency.last = 0.01
+    controller = _create_controller(hass, inverter)
+    controller.register_modbus_entity(_FakeEntity([11060, 11061, 11065, 11066]))
+    try:
+        await _poll(hass, inverter)
+        result = await calibrate_max_read(controller)
+        # The largest known-valid range is 11 registers long, so 12 couldn't be tested
+        assert max(result.timings) == 8
+        assert result.max_read == _MAX_READ
+    finally:
+        controller.unload()
+
+
+@pytest.mark.parametrize(
+    ("writes", "expected"),
+    [
+        # Contiguous registers are grouped, and groups are written in the order in which they first appear
+        ([(11064, 1), (11061, 2), (11060, 3), (11062, 4)], [(11064, [1]), (11060, [3, 2, 4])]),
+        # Later writes to the same address win
+        ([(11060, 1), (11061, 2), (11060, 3)], [(11060, [3, 2])]),
+        # Groups which wouldn't change anything are skipped
+        ([(11060, 11060), (11061, 11061), (11064, 1)], [(11064, [1])]),
+        ([(11060, 11060), (11061, 11061)], []),
+        # Groups which would change something are written whole
+        ([(11060, 11060), (11061, 1), (11062, 11062)], [(11060, [11060, 1, 11062])]),
+        # Values are converted to unsigned
+        ([(11064, -1)], [(11064, [0xFFFF])]),
+    ],
+)
+async def test_write_batch(
+    hass: HomeAssistant, writes: list[tuple[int, int]], expected: list[tuple[int, list[int]]]
+) -> None:
+    inverter = _FakeInverter(invalid_addresses=set())
+    controller = _create_controller(hass, inverter)
+    controller.register_modbus_entity(_FakeEntity([11060, 11061, 11062, 11064]))
+    try:
+        await _poll(hass, inverter)
+        await controller.write_batch(writes)
+        assert inverter.writes == expected
+    finally:
+        controller.unload()
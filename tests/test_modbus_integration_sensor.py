@@ -0,0 +1,158 @@
+from typing import Any
+from typing import Callable
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from homeassistant.components.sensor import SensorExtraStoredData
+from homeassistant.const import UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.core import State
+from pytest_homeassistant_custom_component.common import (  # type: ignore[import-untyped]
+    mock_restore_cache_with_extra_data,
+)
+
+from custom_components.foxess_modbus.const import ENTITY_ID_PREFIX
+from custom_components.foxess_modbus.entities.modbus_integration_sensor import ModbusIntegrationSensorDescription
+from custom_components.foxess_modbus.entities.modbus_integration_sensor import ModbusPollIntegrationSensor
+from custom_components.foxess_modbus.entities.modbus_sensor import ModbusSensor
+
+_SOURCE_ENTITY = "sensor.pv1_power"
+_ENTITY_ID = "sensor.pv1_energy_total"
+
+
+class _FakeClock:
+    """Stands in for time.monotonic"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class _Harness:
+    """A ModbusPollIntegrationSensor attached to a fake controller, which lets the test drive polls and writes"""
+
+    def __init__(self, hass: HomeAssistant, clock: _FakeClock) -> None:
+        self.clock = clock
+        self.source = MagicMock(spec=ModbusSensor)
+        self.poll_complete_listeners: list[Callable[[], None]] = []
+
+        self.controller = MagicMock()
+        self.controller.hass = hass
+        self.controller.inverter_details = {ENTITY_ID_PREFIX: ""}
+        self.controller.get_modbus_entity.side_effect = lambda entity_id: (
+            self.source if entity_id == _SOURCE_ENTITY else None
+        )
+        self.controller.add_poll_complete_listener.side_effect = self._add_poll_complete_listener
+
+        description = ModbusIntegrationSensorDescription(
+            key="pv1_energy_total",
+            models=[],
+            name="PV1 Power Total",
+            integration_method="trapezoidal",
+            sample_in_controller=True,
+            source_entity="pv1_power",
+            unit_time=UnitOfTime.SECONDS,
+        )
+        self.sensor = ModbusPollIntegrationSensor(
+            controller=self.controller,
+            entity_description=description,
+            integration_method=description.integration_method,
+            round_digits=3,
+            source_entity=_SOURCE_ENTITY,
+            unit_time=description.unit_time,
+        )
+        self.sensor.hass = hass
+        self.sensor.async_write_ha_state = MagicMock()  # type: ignore[method-assign]
+
+    def _add_poll_complete_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        self.poll_complete_listeners.append(listener)
+        return lambda: self.poll_complete_listeners.remove(listener)
+
+    def poll(self, value: float | None, *, after_seconds: float = 10) -> None:
+        """Moves time on, and simulates a poll which reads the given value for the source sensor"""
+        self.clock.now += after_seconds
+        self.source.raw_native_value = value
+        self.sensor.update_callback(set())
+        for listener in self.poll_complete_listeners:
+            listener()
+
+    def write(self, value: float) -> None:
+        """Simulates a write which changes the source sensor's value, without a poll"""
+        self.clock.now += 1
+        self.source.raw_native_value = value
+        self.sensor.update_callback(set())
+
+    @property
+    def total(self) -> Any:
+        return self.sensor.native_value
+
+
+@pytest.fixture
+def clock() -> Any:
+    clock = _FakeClock()
+    with patch("custom_components.foxess_modbus.entities.modbus_integration_sensor.time", clock):
+        yield clock
+
+
+async def _create_harness(hass: HomeAssistant, clock: _FakeClock) -> _Harness:
+    harness = _Harness(hass, clock)
+    await harness.sensor.async_added_to_hass()
+    return harness
+
+
+async def test_integrates_source_over_polls(hass: HomeAssistant, clock: _FakeClock) -> None:
+    harness = await _create_harness(hass, clock)
+
+    harness.poll(1.0)
+    assert harness.total == 0
+    harness.poll(3.0)
+    assert harness.total == 20
+    harness.poll(3.0)
+    assert harness.total == 50
+
+
+async def test_writes_do_not_add_samples(hass: HomeAssistant, clock: _FakeClock) -> None:
+    harness = await _create_harness(hass, clock)
+
+    harness.poll(2.0)
+    # If these were sampled, most of the time between the polls would be integrated at 10 rather than at 2
+    harness.write(10.0)
+    harness.write(10.0)
+    harness.poll(2.0, after_seconds=8)
+    assert harness.total == 20
+
+
+async def test_does_not_integrate_across_gaps(hass: HomeAssistant, clock: _FakeClock) -> None:
+    harness = await _create_harness(hass, clock)
+
+    harness.poll(1.0)
+    # A missing value breaks the run of samples
+    harness.poll(None)
+    harness.poll(1.0)
+    assert harness.total == 0
+
+    # As does a long gap between polls, e.g. because polls failed
+    harness.poll(1.0, after_seconds=3600)
+    assert harness.total == 0
+
+    # As does a disconnection
+    harness.sensor.is_connected_changed_callback()
+    harness.poll(1.0)
+    assert harness.total == 0
+
+    harness.poll(1.0)
+    assert harness.total == 10
+
+
+async def test_restores_total(hass: HomeAssistant, clock: _FakeClock) -> None:
+    extra_data = SensorExtraStoredData(native_value=12.5, native_unit_of_measurement="kWh")
+    mock_restore_cache_with_extra_data(hass, [(State(_ENTITY_ID, "12.5"), extra_data.as_dict())])
+    harness = await _create_harness(hass, clock)
+    assert harness.total == 12.5
+
+    harness.poll(1.0)
+    harness.poll(1.0)
+    assert harness.total == 22.5
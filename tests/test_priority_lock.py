@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from custom_components.foxess_modbus.client.priority_lock import PriorityLock
+from custom_components.foxess_modbus.client.priority_lock import RequestPriority
+
+
+async def _acquire(lock: PriorityLock, priority: RequestPriority, name: str, acquired: list[str]) -> None:
+    async with lock.acquire(priority):
+        acquired.append(name)
+        # Give anything else a chance to barge in while we hold the lock
+        await asyncio.sleep(0)
+
+
+async def _start_waiters(
+    lock: PriorityLock, waiters: list[tuple[RequestPriority, str]], acquired: list[str]
+) -> list[asyncio.Task[None]]:
+    """Starts a task for each waiter, and lets them all queue on the lock"""
+    tasks = [asyncio.create_task(_acquire(lock, priority, name, acquired)) for priority, name in waiters]
+    await asyncio.sleep(0)
+    return tasks
+
+
+async def test_uncontended_lock_is_acquired_immediately() -> None:
+    lock = PriorityLock()
+    async with lock.acquire(RequestPriority.BACKGROUND):
+        assert lock.locked
+    assert not lock.locked
+
+
+async def test_waiters_are_served_in_priority_order() -> None:
+    lock = PriorityLock()
+    acquired: list[str] = []
+    async with lock.acquire(RequestPriority.READ):
+        tasks = await _start_waiters(
+            lock,
+            [
+                (RequestPriority.BACKGROUND, "background"),
+                (RequestPriority.READ, "read"),
+                (RequestPriority.WRITE, "write"),
+            ],
+            acquired,
+        )
+        assert acquired == []
+
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=1)
+    assert acquired == ["write", "read", "background"]
+    assert not lock.locked
+
+
+async def test_waiters_with_same_priority_are_served_in_arrival_order() -> None:
+    lock = PriorityLock()
+    acquired: list[str] = []
+    async with lock.acquire(RequestPriority.READ):
+        tasks = await _start_waiters(
+            lock,
+            [
+                (RequestPriority.READ, "read 1"),
+                (RequestPriority.WRITE, "write 1"),
+                (RequestPriority.READ, "read 2"),
+                (RequestPriority.WRITE, "write 2"),
+                (RequestPriority.READ, "read 3"),
+            ],
+            acquired,
+        )
+
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=1)
+    assert acquired == ["write 1", "write 2", "read 1", "read 2", "read 3"]
+
+
+async def test_new_request_does_not_barge_ahead_of_waiter() -> None:
+    lock = PriorityLock()
+    acquired: list[str] = []
+    async with lock.acquire(RequestPriority.READ):
+        tasks = await _start_waiters(lock, [(RequestPriority.BACKGROUND, "background")], acquired)
+
+    # The lock has been handed to the waiter, even though it hasn't run yet
+    assert lock.locked
+    tasks.append(asyncio.create_task(_acquire(lock, RequestPriority.WRITE, "write", acquired)))
+
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=1)
+    assert acquired == ["background", "write"]
+
+
+async def test_cancelled_waiter_is_skipped() -> None:
+    lock = PriorityLock()
+    acquired: list[str] = []
+    async with lock.acquire(RequestPriority.READ):
+        write_task, read_task = await _start_waiters(
+            lock, [(RequestPriority.WRITE, "write"), (RequestPriority.READ, "read")], acquired
+        )
+        write_task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await write_task
+
+    await asyncio.wait_for(read_task, timeout=1)
+    assert acquired == ["read"]
+    assert not lock.locked
+
+
+async def test_waiter_cancelled_after_being_handed_lock_passes_it_on() -> None:
+    lock = PriorityLock()
+    acquired: list[str] = []
+    async with lock.acquire(RequestPriority.READ):
+        write_task, read_task = await _start_waiters(
+            lock, [(RequestPriority.WRITE, "write"), (RequestPriority.READ, "read")], acquired
+        )
+
+    # Releasing the lock handed it to write_task, but write_task hasn't run yet
+    write_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await write_task
+
+    await asyncio.wait_for(read_task, timeout=1)
+    assert acquired == ["read"]
+    assert not lock.locked
+
+    # And the lock can still be acquired afterwards
+    async with asyncio.timeout(1), lock.acquire(RequestPriority.READ):
+        assert lock.locked